@@ -1,19 +1,29 @@
-from math import sqrt
-
 import numpy as np
 
+DTW_BAND_RATIO = 0.1
+
+
+class ObservationStats:
+    def __init__(self, observations):
+        '''
+        Statistics of the observation series that are fixed for the whole run
+        :param observations: Time series of observations for corresponding station
+        '''
+        self.values = np.asarray(observations, dtype=float)
+        self.var = np.var(self.values)
+        self.peak_thr = np.mean(self.values)
+        self.peak_mask = self.values >= self.peak_thr
+
 
 def error_dtw_all(forecast, observations):
     '''
-    Calculate DTW metric of between forecasts and observations for corresponding station
+    Calculate DTW metric (constrained by Sakoe-Chiba band) of between forecasts and observations
+    for corresponding station
     :param forecast: Forecast object
     :param observations: ObservationFile object
     '''
 
-    # distance, path = fastdtw(forecast.hsig_series, observations, dist=euclidean)
-    distance = 1
-    # print("DTW")
-    return distance
+    return dtw_all_kernel(_series(forecast), ObservationStats(observations))
 
 
 def error_rmse_all(forecast, observations):
@@ -23,14 +33,7 @@ def error_rmse_all(forecast, observations):
     :param observations: ObservationFile object
     '''
 
-    penalty_var = abs((np.var(observations) - np.var(forecast.hsig_series)) / np.var(observations)) + 1
-
-    result = 0.0
-
-    for pred, obs in zip(forecast.hsig_series, observations):
-        result += pow(pred - obs, 2)
-
-    return sqrt(result / len(observations)) * penalty_var
+    return rmse_all_kernel(_series(forecast), ObservationStats(observations))
 
 
 def error_rmse_peak(forecast, observations):
@@ -40,17 +43,7 @@ def error_rmse_peak(forecast, observations):
     :param observations: ObservationFile object
     '''
 
-    peak_thr = np.mean(observations)
-
-    result = 0.0
-    points = 0
-    for pred, obs in zip(forecast.hsig_series, observations):
-
-        if obs >= peak_thr:
-            result += pow(pred - obs, 2)
-            points += 1
-
-    return sqrt(result / points)
+    return rmse_peak_kernel(_series(forecast), ObservationStats(observations))
 
 
 def error_mae_peak(forecast, observations):
@@ -60,21 +53,238 @@ def error_mae_peak(forecast, observations):
     :param observations: ObservationFile object
     '''
 
-    peak_thr = np.mean(observations)
+    return mae_peak_kernel(_series(forecast), ObservationStats(observations))
 
-    result = 0.0
-    points = 0
-    for pred, obs in zip(forecast.hsig_series, observations):
 
-        if obs >= peak_thr:
-            result += abs(pred - obs)
-            points += 1
+def error_mae_all(forecast, observations):
+    return mae_all_kernel(_series(forecast), ObservationStats(observations))
 
-    return (result / points)
 
+def dtw_all_kernel(forecasts, stats, band=None, cutoff=None):
+    '''
+    DTW distance with Sakoe-Chiba band for many forecasts against one observation series.
+    Rows of the cost matrix are computed for all forecasts at once, the recurrence along a row
+    is resolved with cumulative sums and minimums.
+    :param forecasts: Array of forecasts with time as the last axis
+    :param stats: ObservationStats of the observations
+    :param band: Half-width of the band in time steps, by default - DTW_BAND_RATIO of the series length
+    :param cutoff: If passed, forecasts with the error greater than cutoff get np.inf,
+    most of them are abandoned early by LB_Keogh bound or by partial cost matrix
+    :return: Array of RMSE-like errors sqrt(distance / length) with the shape of forecasts without the last axis
+    '''
+    pred, obs = _aligned(forecasts, stats.values)
+    shape, points = pred.shape[:-1], pred.shape[-1]
+    pred = pred.reshape((-1, points))
 
-def error_mae_all(forecast, observations):
-    pred = np.array(forecast.hsig_series)
-    obs = observations[:len(forecast.hsig_series)]
+    band = max(1, int(DTW_BAND_RATIO * points)) if band is None else band
+
+    distances = np.full(len(pred), np.inf)
+    active = np.arange(len(pred))
+
+    if cutoff is not None:
+        max_distance = cutoff ** 2 * points
+        active = active[lb_keogh(pred, obs, band) <= max_distance]
+    else:
+        max_distance = np.inf
+
+    # costs[:, j + 1] is the cost of the path to (i - 1, j) for the previous row i - 1
+    costs = np.full((len(active), points + 1), np.inf)
+    costs[:, 0] = 0.0
+    for i in range(points):
+        if len(active) == 0:
+            break
+
+        lo, hi = max(0, i - band), min(points, i + band + 1)
+        step = (pred[active, i][:, None] - obs[lo:hi]) ** 2
+        from_prev = np.minimum(costs[:, lo:hi], costs[:, lo + 1:hi + 1])
+
+        cumulative = np.cumsum(step, axis=1)
+        row = cumulative + np.minimum.accumulate(from_prev - (cumulative - step), axis=1)
+
+        costs[:, lo + 1:hi + 1] = row
+        costs[:, lo] = np.inf
+
+        alive = row.min(axis=1) <= max_distance
+        if not np.all(alive):
+            active, costs = active[alive], costs[alive]
+
+    distances[active] = costs[:, points]
+    distances[distances > max_distance] = np.inf
+
+    return np.sqrt(distances / points).reshape(shape)
+
+
+def lb_keogh(forecasts, observations, band):
+    '''
+    LB_Keogh lower bound of the banded DTW distance for (forecasts, time) array
+    '''
+    padded = np.pad(observations, band, mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded, 2 * band + 1)
+    upper, lower = windows.max(axis=1), windows.min(axis=1)
+
+    above = np.clip(forecasts - upper, 0, None)
+    below = np.clip(lower - forecasts, 0, None)
+
+    return np.sum(above ** 2 + below ** 2, axis=-1)
+
+
+def rmse_all_kernel(forecasts, stats):
+    '''
+    RMSE with the variance penalty for many forecasts against one observation series
+    :param forecasts: Array of forecasts with time as the last axis
+    :param stats: ObservationStats of the observations
+    :return: Array of errors with the shape of forecasts without the last axis
+    '''
+    pred, obs = _aligned(forecasts, stats.values)
+
+    penalty_var = np.abs((stats.var - np.var(forecasts, axis=-1)) / stats.var) + 1
+
+    return np.sqrt(np.sum((pred - obs) ** 2, axis=-1) / len(stats.values)) * penalty_var
+
+
+def rmse_peak_kernel(forecasts, stats):
+    '''
+    Peakwise RMSE for many forecasts against one observation series
+    '''
+    pred, obs = _aligned(forecasts, stats.values)
+    peaks = stats.peak_mask[:obs.shape[-1]]
+
+    return np.sqrt(np.sum((pred - obs) ** 2 * peaks, axis=-1) / np.sum(peaks))
+
+
+def mae_peak_kernel(forecasts, stats):
+    '''
+    Peakwise MAE for many forecasts against one observation series
+    '''
+    pred, obs = _aligned(forecasts, stats.values)
+    peaks = stats.peak_mask[:obs.shape[-1]]
+
+    return np.sum(np.abs(pred - obs) * peaks, axis=-1) / np.sum(peaks)
+
+
+def mae_all_kernel(forecasts, stats):
+    '''
+    MAE for many forecasts against one observation series
+    '''
+    pred, obs = _aligned(forecasts, stats.values)
+
+    return np.sum(np.abs(pred - obs), axis=-1) / len(stats.values)
+
+
+ERROR_KERNELS = {
+    error_dtw_all: dtw_all_kernel,
+    error_rmse_all: rmse_all_kernel,
+    error_rmse_peak: rmse_peak_kernel,
+    error_mae_peak: mae_peak_kernel,
+    error_mae_all: mae_all_kernel
+}
+
+
+def error_kernel(error):
+    '''
+    :param error: One of error_* functions
+    :return: Array kernel of the error or None if the error has no kernel
+    '''
+    return ERROR_KERNELS.get(error)
+
+
+class OnlineErrors:
+    def __init__(self, error, forecasts, observations):
+        '''
+        Incremental sufficient statistics of the error for many forecasts against one growing observation series.
+        The peak threshold of peakwise errors is fixed by the initial observations.
+        :param error: One of error_rmse_all, error_rmse_peak, error_mae_all, error_mae_peak
+        :param forecasts: Array of initial forecasts with time as the last axis
+        :param observations: Initial time series of observations
+        '''
+        if error not in [error_rmse_all, error_rmse_peak, error_mae_all, error_mae_peak]:
+            raise ValueError(f'{error.__name__} can not be accumulated online')
+
+        self.error = error
+
+        pred, obs = _aligned(forecasts, np.asarray(observations, dtype=float))
+        shape = pred.shape[:-1]
+
+        self.points = 0
+        self.peak_thr = np.mean(obs)
+        self.peak_points = 0
+
+        self._obs_mean, self._obs_m2 = 0.0, 0.0
+        self._pred_mean, self._pred_m2 = np.zeros(shape), np.zeros(shape)
+        self._sum_sq, self._sum_abs = np.zeros(shape), np.zeros(shape)
+        self._sum_sq_peak, self._sum_abs_peak = np.zeros(shape), np.zeros(shape)
+
+        self.update(pred, obs)
+
+    def update(self, forecasts, observations):
+        '''
+        Append new points in O(forecasts x new points)
+        :param forecasts: Array of new forecast steps with time as the last axis
+        :param observations: New observations corresponding to the steps
+        '''
+        forecasts = np.asarray(forecasts, dtype=float)
+        observations = np.asarray(observations, dtype=float)
+
+        assert forecasts.shape[-1] == len(observations)
+
+        new_points = len(observations)
+        if new_points == 0:
+            return
+
+        self._obs_mean, self._obs_m2 = _merged_moments(self.points, self._obs_mean, self._obs_m2,
+                                                       new_points, observations)
+        self._pred_mean, self._pred_m2 = _merged_moments(self.points, self._pred_mean, self._pred_m2,
+                                                         new_points, forecasts)
+        self.points += new_points
+
+        diff = forecasts - observations
+        peaks = observations >= self.peak_thr
+
+        self._sum_sq += np.sum(diff ** 2, axis=-1)
+        self._sum_abs += np.sum(np.abs(diff), axis=-1)
+        self._sum_sq_peak += np.sum(diff ** 2 * peaks, axis=-1)
+        self._sum_abs_peak += np.sum(np.abs(diff) * peaks, axis=-1)
+        self.peak_points += np.sum(peaks)
+
+    def errors(self):
+        '''
+        :return: Array of current errors with the shape of forecasts without the last axis
+        '''
+        if self.error is error_rmse_all:
+            obs_var = self._obs_m2 / self.points
+            penalty_var = np.abs((obs_var - self._pred_m2 / self.points) / obs_var) + 1
+            return np.sqrt(self._sum_sq / self.points) * penalty_var
+        if self.error is error_rmse_peak:
+            return np.sqrt(self._sum_sq_peak / self.peak_points)
+        if self.error is error_mae_peak:
+            return self._sum_abs_peak / self.peak_points
+
+        return self._sum_abs / self.points
+
+
+def _merged_moments(points, mean, m2, new_points, values):
+    '''
+    Merge running mean and sum of squared deviations (Welford / Chan et al.) with a batch of new values
+    along the last axis
+    '''
+    new_mean = np.mean(values, axis=-1)
+    new_m2 = np.sum((values - np.expand_dims(new_mean, -1)) ** 2, axis=-1)
+
+    total = points + new_points
+    delta = new_mean - mean
+
+    return mean + delta * new_points / total, m2 + new_m2 + delta ** 2 * points * new_points / total
+
+
+def _series(forecast):
+    return np.asarray(forecast.hsig_series, dtype=float)
+
+
+def _aligned(forecasts, observations):
+    '''
+    Truncate forecasts and observations to the common length of the time axis
+    '''
+    forecasts = np.asarray(forecasts, dtype=float)
+    points = min(forecasts.shape[-1], len(observations))
 
-    return np.sum(np.abs(pred - obs)) / len(observations)
+    return forecasts[..., :points], observations[:points]
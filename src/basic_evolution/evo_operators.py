@@ -2,10 +2,9 @@ import pickle
 import random
 
 import numpy as np
-from pyDOE import lhs
-from scipy.stats.distributions import norm
 
 from src.basic_evolution.swan import SWANParams
+from src.utils.design import params_design
 
 drf_range = [0.2, 0.4, 0.6000000000000001, 0.8, 1.0, 1.2, 1.4, 1.5999999999999999, 1.7999999999999998,
              1.9999999999999998, 2.1999999999999997, 2.4, 2.6, 2.8000000000000003]
@@ -13,8 +12,6 @@ drf_range = [0.2, 0.4, 0.6000000000000001, 0.8, 1.0, 1.2, 1.4, 1.599999999999999
 cfw_range = [0.005, 0.01, 0.015, 0.02, 0.025, 0.030000000000000002, 0.035, 0.04, 0.045, 0.049999999999999996]
 stpm_range = [0.001, 0.0025, 0.004, 0.0055, 0.006999999999999999, 0.008499999999999999, 0.009999999999999998]
 
-PARAMS = 3
-
 
 def calculate_objectives(model, pop):
     '''
@@ -37,9 +34,10 @@ def calculate_objectives_interp(model, pop):
     :param pop: Population of SWAN-params i.e. individuals
     '''
 
-    for p in pop:
-        params = p.genotype
-        p.objectives = tuple(model.output(params=params))
+    outputs = model.output_batch(params=[p.genotype for p in pop])
+
+    for p, out in zip(pop, outputs):
+        p.objectives = tuple(out)
 
 
 def crossover(p1, p2, rate):
@@ -79,9 +77,15 @@ def default_initial_pop(size):
 
 
 def initial_pop_lhs(size, **kwargs):
-    samples_grid = lhs(PARAMS, size, 'center')
-    for idx, params_range in enumerate([drf_range, cfw_range, stpm_range]):
-        samples_grid[:, idx] = norm(loc=np.mean(params_range), scale=np.std(params_range)).ppf(samples_grid[:, idx])
+    '''
+    :param seed: Seed of the LHS design, the design with a seed is computed once (see src.utils.design)
+    '''
+    if 'seed' in kwargs:
+        seed = kwargs['seed']
+    else:
+        seed = None
+
+    samples_grid = params_design(size, [drf_range, cfw_range, stpm_range], seed=seed)
 
     population = [SWANParams(drf=sample[0], cfw=sample[1], stpm=sample[2]) for sample in samples_grid]
 
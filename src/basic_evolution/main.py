@@ -25,8 +25,8 @@ from src.basic_evolution.model import (
 from src.basic_evolution.swan import SWANParams
 from src.evolution.operators import default_operators
 from src.evolution.spea2.default import DefaultSPEA2
-from src.utils.files import (
-    wave_watch_results
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 from src.utils.vis import (
     plot_results,
@@ -55,9 +55,7 @@ def get_rmse_for_all_stations(forecasts, observations):
 
 def model_all_stations(forecasts_range=(0, 1)):
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)
 
     model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=ALL_STATIONS, error=error_rmse_all,
                               forecasts_path='../../../2fidelity/*', forecasts_range=forecasts_range)
@@ -117,8 +115,7 @@ def save_archive_history(history, file_name='history.csv'):
 def run_genetic_opt(max_gens, pop_size, archive_size, crossover_rate, mutation_rate, mutation_value_rate, stations,
                     **kwargs):
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in wave_watch_results(path_to_results='../../samples/ww-res/', stations=stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=stations)
 
     train_model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=stations,
                                     error=error_rmse_all,
@@ -149,8 +146,9 @@ def run_genetic_opt(max_gens, pop_size, archive_size, crossover_rate, mutation_r
         forecasts = test_model.grid[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx]
 
         plot_results(forecasts=forecasts,
-                     observations=wave_watch_results(path_to_results='../../samples/ww-res/',
-                                                     stations=ALL_STATIONS),
+                     observations=wave_watch_observations(path_to_results='../../samples/ww-res/',
+                                                          stations=ALL_STATIONS),
+                     stations=ALL_STATIONS,
                      baseline=default_params_forecasts(test_model),
                      save=True, file_path=kwargs['figure_path'],
                      values_range=test_range)
@@ -236,9 +234,7 @@ def init_models_to_tests():
                'mae_peak': error_mae_peak}
 
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)
 
     models = {}
     for metric_name in metrics.keys():
@@ -275,9 +271,7 @@ def optimize_by_ww3_obs(train_stations, max_gens, pop_size, archive_size, crosso
                         mutation_value_rate, iter_ind, plot_figures=True):
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
 
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=train_stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=train_stations)
 
     error = error_rmse_all
     test_range = (0, 1)
@@ -308,7 +302,9 @@ def optimize_by_ww3_obs(train_stations, max_gens, pop_size, archive_size, crosso
         forecasts = test_model.grid[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx]
 
         plot_results(forecasts=forecasts,
-                     observations=wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS),
+                     observations=wave_watch_observations(path_to_results='../../samples/ww-res/',
+                                                          stations=ALL_STATIONS),
+                     stations=ALL_STATIONS,
                      baseline=default_params_forecasts(test_model),
                      values_range=test_range)
         plot_population_movement(archive_history, grid)
@@ -6,13 +6,25 @@ from collections import Counter
 import numpy as np
 from scipy.interpolate import interpn
 
+from src.basic_evolution.errors import (
+    ObservationStats,
+    OnlineErrors,
+    error_kernel
+)
 from src.basic_evolution.noisy_wind_files import (
     files_by_stations,
     forecast_files_from_dir,
     extracted_forecast_params
 )
 from src.basic_evolution.swan import SWANParams
-from src.surrogate.kriging import KrigingModel
+from src.surrogate.backends import GP_BACKEND
+from src.surrogate.kriging import (
+    REOPTIMISE_EVERY,
+    KrigingModel,
+    is_multi_output_backend
+)
+from src.surrogate.sparse_gp import INDUCING_POINTS
+from src.surrogate.target_store import TargetStore
 from src.utils.files import (
     ForecastFile,
     extracted_fidelity,
@@ -22,6 +34,8 @@ from src.utils.files import (
 
 GRID_PATH = '../../grid'
 
+DEFAULT_WINDOW = 'default'
+
 
 class AbstractFakeModel:
     def __init__(self, **kwargs):
@@ -30,6 +44,13 @@ class AbstractFakeModel:
     def output(self, params):
         raise NotImplementedError()
 
+    def output_batch(self, params):
+        '''
+        :param params: List of SWANParams
+        :return: Array of (params, outputs)
+        '''
+        return np.asarray([self.output(params=single_params) for single_params in params])
+
 
 class FidelityFakeModel(AbstractFakeModel):
     def __init__(self, grid_file, error, observations, stations_to_out, forecasts_path, noise_run=0, **kwargs):
@@ -41,6 +62,9 @@ class FidelityFakeModel(AbstractFakeModel):
         :param forecasts_path: Path to directory with forecast files
         :param fidelity: Index of fidelity case (corresponds to name of forecasts directory)
         :param noise_run: Value of the noise applied to input forcing , by default = 0 (see forecast files naming)
+        :param noise_runs: List of noise runs loaded at once as the ensemble, by default = [noise_run]
+        :param forecasts_range: Relative range of the series used by default, by default = (0, 1)
+        :param windows: Dict with named relative ranges to query errors for, e.g. {'train': (0, 0.7), 'test': (0.7, 1)}
         '''
 
         super().__init__()
@@ -52,11 +76,23 @@ class FidelityFakeModel(AbstractFakeModel):
         self.forecasts_path = forecasts_path
         self.noise_run = noise_run
 
+        if 'noise_runs' in kwargs:
+            self.noise_runs = list(kwargs['noise_runs'])
+        else:
+            self.noise_runs = [noise_run]
+
+        if self.noise_run not in self.noise_runs:
+            self.noise_runs.insert(0, self.noise_run)
+
         if 'forecasts_range' in kwargs:
             self.forecasts_range = kwargs['forecasts_range']
         else:
             self.forecasts_range = (0, 1)
 
+        self.windows = {DEFAULT_WINDOW: self.forecasts_range}
+        if 'windows' in kwargs:
+            self.windows.update(kwargs['windows'])
+
         if 'is_surrogate' in kwargs:
             self.is_surrogate = kwargs['is_surrogate']
         else:
@@ -72,6 +108,40 @@ class FidelityFakeModel(AbstractFakeModel):
         else:
             self.sur_points = 10
 
+        # name of the surrogate backend, see src.surrogate.backends.SURROGATE_BACKENDS
+        if 'surrogate' in kwargs:
+            self.sur_backend = kwargs['surrogate']
+        else:
+            self.sur_backend = GP_BACKEND
+
+        if 'sur_reoptimise_every' in kwargs:
+            self.sur_reoptimise_every = kwargs['sur_reoptimise_every']
+        else:
+            self.sur_reoptimise_every = REOPTIMISE_EVERY
+
+        if 'sur_inducing' in kwargs:
+            self.sur_inducing = kwargs['sur_inducing']
+        else:
+            self.sur_inducing = INDUCING_POINTS
+
+        # SurrogateStore with models trained by previous runs, see src.surrogate.surrogate_store
+        if 'surrogate_store' in kwargs:
+            self.surrogate_store = kwargs['surrogate_store']
+        else:
+            self.surrogate_store = None
+
+        # stations predicted by surrogates (e.g. train stations), output_batch of surrogates gives these only
+        if 'sur_stations' in kwargs:
+            self.sur_stations = list(kwargs['sur_stations'])
+        else:
+            self.sur_stations = list(self.stations)
+
+        # one surrogate shares the training points and the factorization for all stations
+        if 'sur_multi_output' in kwargs:
+            self.sur_multi_output = kwargs['sur_multi_output']
+        else:
+            self.sur_multi_output = is_multi_output_backend(self.sur_backend)
+
         self._init_fidelity_grids()
         self._init_grids()
 
@@ -80,30 +150,63 @@ class FidelityFakeModel(AbstractFakeModel):
             self.ready_sur_points = []
 
     def __init_surrogates(self):
+        self.target_store = TargetStore(self, cost=SWANPerfModel.get_execution_time)
         self.surrogates_by_stations = []
-        for station in range(len(self.stations)):
-            krig = KrigingModel(grid_file=self.grid_file, fake_model=self,
-                                station_idx=station, points_to_train=self.sur_points,
-                                initial_fidelity=self.initial_fidelity)
+
+        station_idxs = [self.stations.index(station) for station in self.sur_stations]
+
+        if self.sur_multi_output:
+            all_stations = station_idxs == list(range(len(self.stations)))
+            self.surrogates_by_stations.append(self._surrogate(station_idx=None if all_stations
+                                                               else tuple(station_idxs)))
+            return
+
+        for station in station_idxs:
+            krig = self._surrogate(station_idx=station)
             # krig.mix_with_additional_points(points=[])
             # TODO: train should be somewhere else
             # krig.train(mode='lhs')
             self.surrogates_by_stations.append(krig)
 
+    def _surrogate(self, station_idx):
+        return KrigingModel(grid_file=self.grid_file, fake_model=self,
+                            station_idx=station_idx, points_to_train=self.sur_points,
+                            initial_fidelity=self.initial_fidelity, backend=self.sur_backend,
+                            reoptimise_every=self.sur_reoptimise_every, target_store=self.target_store,
+                            inducing=self.sur_inducing, fidelity_cost=SWANPerfModel.get_execution_time,
+                            surrogate_store=self.surrogate_store)
+
+    def available_fidelities(self):
+        '''
+        :return: List of (fid_time, fid_space) presented in forecasts
+        '''
+        return [(fid_time, fid_space) for fid_time in self._fid_time_grid for fid_space in self._fid_space_grid]
+
     def _init_fidelity_grids(self):
         fid_time, fid_space = presented_fidelity(forecast_files_from_dir(self.forecasts_path))
         self._fid_time_grid = sorted(fid_time)
         self._fid_space_grid = sorted(fid_space)
 
     def _init_grids(self):
-        self.grid = self._empty_grid()
-
         files = forecast_files_from_dir(self.forecasts_path)
 
         if not files:
             raise FileNotFoundError("EMPTY FORECAST")
 
-        stations = files_by_stations(files, noise_run=self.noise_run, stations=[str(st) for st in self.stations])
+        self.grids_by_noise = {noise_run: self._grid_of_noise_run(files, noise_run) for noise_run in self.noise_runs}
+        self.grid = self.grids_by_noise[self.noise_run]
+
+        self._err_grids = {}
+        self._ensemble_err_grids = {}
+        # series extended by extend_series differ from the files, so errors saved on disk are not valid for them
+        self._series_extended = False
+        self.err_grid = self.error_grid(window=DEFAULT_WINDOW)
+        self._online_errors = None
+
+    def _grid_of_noise_run(self, files, noise_run):
+        grid = self._empty_grid()
+
+        stations = files_by_stations(files, noise_run=noise_run, stations=[str(st) for st in self.stations])
 
         files_by_run_idx = dict()
 
@@ -135,35 +238,170 @@ class FidelityFakeModel(AbstractFakeModel):
                                       fidelity_time=fid_time,
                                       fidelity_space=fid_space))
 
-                self.grid[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx] = forecasts
+                grid[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx] = forecasts
+
+        return grid
+
+    def error_grid(self, window=DEFAULT_WINDOW):
+        '''
+        Grid of errors for the forecasts window, computed once from already loaded series and cached
+        :param window: Name of the window from self.windows or tuple with relative range of the series
+        :return: Array with errors for every point of the grid and every station
+        '''
+        range_values = self._window_range(window)
+
+        if range_values not in self._err_grids:
+            self._err_grids[range_values] = self._calculated_error_grid(range_values)
+
+        return self._err_grids[range_values]
+
+    def ensemble_error_grid(self, window=DEFAULT_WINDOW, error=None):
+        '''
+        Grids of errors for all noise runs, computed in one pass and cached
+        :param window: Name of the window from self.windows or tuple with relative range of the series
+        :param error: Error metrics to evaluate instead of self.error, by default = None
+        :return: Array with errors with the shape (noise runs,) + err_grid.shape, noise runs as in self.noise_runs
+        '''
+        range_values = self._window_range(window)
+        error = self.error if error is None else error
+
+        if (range_values, error) not in self._ensemble_err_grids:
+            grids = [self.grids_by_noise[noise_run] for noise_run in self.noise_runs]
+            self._ensemble_err_grids[(range_values, error)] = self._errors_for_grids(grids, range_values, error)
+
+        return self._ensemble_err_grids[(range_values, error)]
+
+    def ensemble_stats(self, window=DEFAULT_WINDOW, quantiles=(0.1, 0.5, 0.9)):
+        '''
+        Statistics of errors across noise runs for every point of the grid and every station
+        :return: Dict with 'mean', 'spread' (standard deviation) and 'quantiles' (quantiles as the first axis)
+        '''
+        errors = self.ensemble_error_grid(window)
+
+        return {'mean': np.mean(errors, axis=0),
+                'spread': np.std(errors, axis=0),
+                'quantiles': np.quantile(errors, quantiles, axis=0)}
+
+    def extend_series(self, observations, forecasts):
+        '''
+        Append new observations and forecast steps, errors of the default window are updated
+        incrementally in O(grid points x new steps). Forecast series of the grid are extended too,
+        errors of other windows are dropped from cache and computed again from the extended series.
+        :param observations: List with arrays of new observations for every station
+        :param forecasts: Array of new forecast steps with the shape of err_grid + (steps,)
+        '''
+        assert tuple(self.forecasts_range) == (0, 1)
+
+        if len(self.noise_runs) > 1:
+            raise ValueError('series of several noise runs can not be extended by one run of forecasts')
 
-        # empty array
-        self.err_grid = np.zeros(shape=self.grid.shape + (len(stations),))
+        if self._online_errors is None:
+            self._online_errors = [OnlineErrors(self.error, self._full_series(station_idx), observation)
+                                   for station_idx, observation in enumerate(self.observations)]
+
+        for station_idx, accumulated in enumerate(self._online_errors):
+            accumulated.update(forecasts[..., station_idx, :], observations[station_idx])
+            self.err_grid[..., station_idx] = accumulated.errors()
+
+        for idx in self.__grid_idxs():
+            self.grid[tuple(idx)] = [forecast.extended(forecasts[tuple(idx) + (station_idx,)])
+                                     for station_idx, forecast in enumerate(self.grid[tuple(idx)])]
+
+        self.observations = [np.concatenate([old, new]) for old, new in zip(self.observations, observations)]
+        self._series_extended = True
+        self._err_grids = {tuple(self.forecasts_range): self.err_grid}
+        self._ensemble_err_grids = {}
+
+        # targets of surrogates are errors of the old series
+        if self.is_surrogate:
+            self.target_store.clear()
+
+    def _full_series(self, station_idx):
+        groups = self._stacked_series(station_idx, range_values=(0, 1), grids=[self.grid])
+
+        if len(groups) > 1:
+            raise ValueError('online errors require forecasts of the same length')
+
+        idxs, series = groups[0]
+        full_series = np.empty(self.grid.shape + series.shape[-1:])
+        full_series[idxs[1:]] = series
+
+        return full_series
+
+    def _window_range(self, window):
+        range_values = self.windows[window] if isinstance(window, str) else window
+
+        assert 0 <= range_values[0] <= range_values[1] <= 1
+
+        return tuple(range_values)
+
+    def _calculated_error_grid(self, range_values):
+        if self._series_extended:
+            return self._errors_for_grids([self.grid], range_values)[0]
 
         # calc fitness for every point
         st_set_id = ("-".join(str(self.stations)))
-        file_path = f'grid-saved-{self.error.__name__}_range_{self.forecasts_range}_st{st_set_id}.pik'
+        noise_id = f'_noise{self.noise_run}' if self.noise_run != 0 else ''
+        file_path = f'grid-saved-{self.error.__name__}_range_{range_values}_st{st_set_id}{noise_id}.pik'
 
         grid_file_path = os.path.join(GRID_PATH, file_path)
 
         if not os.path.isfile(grid_file_path):
-            grid_idxs = self.__grid_idxs()
-
-            for i, j, k, m, n in grid_idxs:
-                forecasts = [forecast for forecast in self.grid[i, j, k, m, n]]
-                for forecast, observation in zip(forecasts, self.observations):
-                    station_idx = forecasts.index(forecast)
-
-                    obs_in_range = observations_from_range(observation, self.forecasts_range)
-                    self.err_grid[i, j, k, m, n, station_idx] = self.error(forecast, obs_in_range)
+            err_grid = self._errors_for_grids([self.grid], range_values)[0]
 
             pickle_out = open(grid_file_path, 'wb')
-            pickle.dump(self.err_grid, pickle_out)
+            pickle.dump(err_grid, pickle_out)
             pickle_out.close()
             print(f"FITNESS GRID SAVED, file_name: {grid_file_path}")
         else:
             with open(grid_file_path, 'rb') as f:
-                self.err_grid = pickle.load(f)
+                err_grid = pickle.load(f)
+
+        return err_grid
+
+    def _errors_for_grids(self, grids, range_values, error=None):
+        '''
+        Errors for several grids of forecasts (e.g. noise runs), the kernel of the error
+        is applied to the series of all grids at once for every station
+        :return: Array with errors with the shape (grids,) + grid shape + (stations,)
+        '''
+        err_grids = np.zeros(shape=(len(grids),) + self.grid.shape + (len(self.stations),))
+
+        error = self.error if error is None else error
+
+        observations = [observations_from_range(observation, range_values) for observation in self.observations]
+        kernel = error_kernel(error)
+
+        if kernel is not None:
+            for station_idx, observation in enumerate(observations):
+                stats = ObservationStats(observation)
+                for idxs, series in self._stacked_series(station_idx, range_values, grids):
+                    err_grids[idxs + (station_idx,)] = kernel(series, stats)
+        else:
+            for grid_idx, grid in enumerate(grids):
+                for i, j, k, m, n in self.__grid_idxs():
+                    forecasts = grid[i, j, k, m, n]
+                    for station_idx, (forecast, observation) in enumerate(zip(forecasts, observations)):
+                        err_grids[grid_idx, i, j, k, m, n, station_idx] = \
+                            error(forecast.in_range(range_values), observation)
+
+        return err_grids
+
+    def _stacked_series(self, station_idx, range_values, grids):
+        '''
+        Forecasts of the station in range for all points of the grids stacked into (points, time) arrays
+        :return: List of (indexes with the grid index first, series) grouped by the length of series
+        '''
+        groups = dict()
+        for grid_idx, grid in enumerate(grids):
+            for idx in self.__grid_idxs():
+                series = grid[tuple(idx)][station_idx].in_range(range_values).hsig_series
+                if len(series) not in groups:
+                    groups[len(series)] = ([], [])
+                groups[len(series)][0].append([grid_idx] + idx)
+                groups[len(series)][1].append(series)
+
+        return [(tuple(np.asarray(idxs).T), np.stack(series)) for idxs, series in groups.values()]
 
     def __grid_idxs(self):
         idxs = []
@@ -204,6 +442,13 @@ class FidelityFakeModel(AbstractFakeModel):
 
         return groups
 
+    def grid_coords(self):
+        '''
+        :return: Dict with values along every axis of err_grid
+        '''
+        return {'drf': self.grid_file.drf_grid, 'cfw': self.grid_file.cfw_grid, 'stpm': self.grid_file.stpm_grid,
+                'fid_time': self._fid_time_grid, 'fid_space': self._fid_space_grid, 'station': self.stations}
+
     def params_idxs(self, params):
         drf_idx = self.grid_file.drf_grid.index(params.drf)
         cfw_idx = self.grid_file.cfw_grid.index(params.cfw)
@@ -222,44 +467,49 @@ class FidelityFakeModel(AbstractFakeModel):
 
         return drf, cfw, stpm, fid_time, fid_space
 
-    def output_from_model(self, params):
+    def output_from_model(self, params, window=DEFAULT_WINDOW, noise_run=None):
+        return self.output_from_model_batch(params=[params], window=window, noise_run=noise_run)[0]
 
+    def output_from_model_batch(self, params, window=DEFAULT_WINDOW, noise_run=None):
+        '''
+        Errors for many params interpolated over the error grid for all stations at once
+        :param params: List of SWANParams
+        :return: Array of (params, stations)
+        '''
         points = (
             np.asarray(self.grid_file.drf_grid), np.asarray(self.grid_file.cfw_grid),
             np.asarray(self.grid_file.stpm_grid),
             np.asarray(self._fid_time_grid),
             np.asarray(self._fid_space_grid))
 
-        params_fixed = self._fixed_params(params)
+        interp_points = np.abs(np.asarray([[fixed.drf, fixed.cfw, fixed.stpm, fixed.fid_time, fixed.fid_space]
+                                           for fixed in map(self._fixed_params, params)], dtype=float))
 
-        interp_mesh = np.array(
-            np.meshgrid(params_fixed.drf, params_fixed.cfw, params_fixed.stpm,
-                        params_fixed.fid_time, params_fixed.fid_space))
-        interp_points = abs(np.rollaxis(interp_mesh, 0, 6).reshape((1, 5)))
+        if noise_run is None:
+            err_grid = self.error_grid(window)
+        else:
+            err_grid = self.ensemble_error_grid(window)[self.noise_runs.index(noise_run)]
 
-        out = np.zeros(len(self.stations))
-        for i in range(0, len(self.stations)):
-            int_obs = interpn(np.asarray(points), self.err_grid[:, :, :, :, :, i], interp_points, method="linear",
-                              bounds_error=False)
-            out[i] = int_obs
+        return interpn(points, err_grid, interp_points, method="linear", bounds_error=False)
 
-        return out
+    def output(self, params, window=DEFAULT_WINDOW):
+        return self.output_batch(params=[params], window=window)[0]
 
-    def output(self, params):
+    def output_batch(self, params, window=DEFAULT_WINDOW):
+        '''
+        Errors for many params (e.g. the whole population) by the model or by one batch prediction of surrogates
+        :param params: List of SWANParams
+        :return: Array of (params, stations), surrogates give sur_stations only
+        '''
+        if not self.is_surrogate:
+            return self.output_from_model_batch(params=params, window=window)
 
-        params_fixed = self._fixed_params(params)
+        features = np.asarray([[fixed.drf, fixed.cfw, fixed.stpm] for fixed in map(self._fixed_params, params)])
 
-        if not self.is_surrogate:
-            return self.output_from_model(params=params)
-        else:
-            out = np.zeros(len(self.stations))
-            for station_idx in range(len(self.stations)):
-                int_obs = \
-                    self.surrogates_by_stations[station_idx].prediction(
-                        [params_fixed.drf, params_fixed.cfw, params_fixed.stpm])
-                out[station_idx] = int_obs
+        if self.sur_multi_output:
+            return self.surrogates_by_stations[0].prediction_batch(features)
 
-        return out
+        return np.column_stack([surrogate.prediction_batch(features) for surrogate in self.surrogates_by_stations])
 
     def _fixed_params(self, params):
         params_fixed = SWANParams(drf=min(max(params.drf, min(self.grid_file.drf_grid)), max(self.grid_file.drf_grid)),
@@ -282,12 +532,13 @@ class FidelityFakeModel(AbstractFakeModel):
         return out
 
     class Forecast:
-        def __init__(self, station_idx, forecast_file, range_values=(0, 1)):
+        def __init__(self, station_idx, forecast_file, range_values=(0, 1), **kwargs):
             '''
 
             :param station_idx: Index of a station
             :param forecast_file: Path to file with forecasts
             :param range_values: tuple with relative indexes of a sublist to extract, default = (0, 1) - full list
+            :param series: Already loaded full series of the file, if passed the file isn't read
             '''
 
             self.station_idx = station_idx
@@ -296,17 +547,32 @@ class FidelityFakeModel(AbstractFakeModel):
 
             assert 0 <= self.range_values[0] <= self.range_values[1] <= 1
 
-            self.hsig_series = self._from_range(self._station_series())
+            if 'series' in kwargs:
+                self.series = kwargs['series']
+            else:
+                self.series = self._station_series()
+
+            self.hsig_series = self._from_range(self.series)
+
+        def in_range(self, range_values):
+            '''
+            Forecast for another range of the same series (a view, without reading the file again)
+            '''
+            return FidelityFakeModel.Forecast(self.station_idx, self.file, range_values=range_values,
+                                              series=self.series)
+
+        def extended(self, steps):
+            '''
+            Forecast with new steps appended to the full series
+            '''
+            return FidelityFakeModel.Forecast(self.station_idx, self.file, range_values=self.range_values,
+                                              series=np.concatenate([self.series, steps]))
 
         def _station_series(self):
-            hsig_idx = 1
-            return [float(line.split(',')[hsig_idx]) for line in self.file.time_series()]
+            return self.file.column(ForecastFile.HSIG_COLUMN)
 
         def _from_range(self, series):
-            from_idx = int(len(series) * self.range_values[0])
-            to_idx = int(len(series) * self.range_values[1])
-
-            return series[from_idx:to_idx]
+            return observations_from_range(series, self.range_values)
 
 
 class CSVGridFile:
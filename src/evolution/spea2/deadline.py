@@ -0,0 +1,207 @@
+import time
+from contextlib import contextmanager
+
+from src.basic_evolution.model import SWANPerfModel
+
+TRAIN = 'train'
+RETRAIN = 'retrain'
+SWITCH = 'switch'
+
+# estimates of costs are multiplied by the factor to keep a reserve for their variance
+SAFETY_FACTOR = 1.2
+MIN_POP_SIZE = 4
+# amount of the last measurements of a stage that its worst case is estimated by
+COST_WINDOW = 5
+
+
+class DeadlineController:
+    def __init__(self, deadline, **kwargs):
+        '''
+        Keeps DynamicSPEA2 within the deadline: measures costs of generations, retrainings of surrogates
+        and changes of fidelity as they go and adapts the rest of the run to the remaining time:
+        - population size and the amount of generations are reduced (population - down to min_pop_size)
+          if the remaining generations do not fit, and are restored up to the planned values if the time allows;
+        - retrainings and changes of fidelity are skipped if they do not fit with the remaining generations,
+          so the frequency of retrainings falls and the fidelity is kept as the deadline approaches;
+        - the run stops before the generation that does not fit.
+        Stages with known points and fidelity are estimated by the unit cost: time of the stage per point
+        per time of one run at its fidelity, e.g. the initial training gives the estimate for a change of fidelity
+        to the finer level before the first change
+        :param deadline: Time of the run in units of the clock
+        :param clock: Function without arguments that gives the current time, by default - wall-clock seconds,
+        see simulated_clock for the time of model runs
+        :param cost: Function of fidelity that gives the time of one run, by default - SWANPerfModel.get_execution_time
+        :param safety: Factor of estimated costs
+        :param min_pop_size: Min size of population
+        '''
+        self.deadline = deadline
+
+        if 'clock' in kwargs:
+            self.clock = kwargs['clock']
+        else:
+            self.clock = time.perf_counter
+
+        if 'cost' in kwargs:
+            self.cost_model = kwargs['cost']
+        else:
+            self.cost_model = SWANPerfModel.get_execution_time
+
+        if 'safety' in kwargs:
+            self.safety = kwargs['safety']
+        else:
+            self.safety = SAFETY_FACTOR
+
+        if 'min_pop_size' in kwargs:
+            self.min_pop_size = kwargs['min_pop_size']
+        else:
+            self.min_pop_size = MIN_POP_SIZE
+
+        self.costs = {TRAIN: [], RETRAIN: [], SWITCH: []}
+        self.unit_costs = []
+        # cost of a generation per individual
+        self.individ_costs = []
+
+        self.planned_gens = None
+        self.planned_pop_size = None
+
+        # log of decisions with their justification
+        self.history = []
+        self._denied = set()
+
+        self.start()
+
+    def start(self):
+        self._started = self.clock()
+        self._gen_started = None
+        self._gen_stages = 0.0
+
+    def elapsed(self):
+        return self.clock() - self._started
+
+    def remaining(self):
+        return self.deadline - self.elapsed()
+
+    @contextmanager
+    def timed(self, stage):
+        '''
+        Measure the cost of the stage (TRAIN, RETRAIN or SWITCH), it is excluded from the cost of the generation.
+        The yielded measurement can be marked as not done, then its time is left to the generation,
+        its points and fidelity give the unit cost
+        '''
+        measurement = Measurement()
+        started = self.clock()
+        try:
+            yield measurement
+        finally:
+            if measurement.done:
+                cost = self.clock() - started
+                self.costs[stage].append(cost)
+                self._gen_stages += cost
+                if measurement.points and measurement.fidelity is not None:
+                    self.unit_costs.append(cost / (measurement.points * self.cost_model(measurement.fidelity)))
+
+    def start_generation(self):
+        self._gen_started = self.clock()
+        self._gen_stages = 0.0
+
+    def end_generation(self, pop_size):
+        cost = self.clock() - self._gen_started - self._gen_stages
+        self.individ_costs.append(max(0.0, cost) / max(1, pop_size))
+
+    def estimate(self, stage, points=None, fidelity=None):
+        '''
+        :param points: Amount of training points of the stage
+        :param fidelity: Fidelity of the stage
+        :return: The worst of the last unit costs for the points and the fidelity if they are known,
+        otherwise the worst of the last costs of the stage or the cost of the initial training
+        '''
+        if points is not None and fidelity is not None and self.unit_costs:
+            return max(self.unit_costs[-COST_WINDOW:]) * points * self.cost_model(fidelity)
+
+        costs = self.costs[stage][-COST_WINDOW:] or self.costs[TRAIN][-1:]
+
+        return max(costs) if costs else 0.0
+
+    def generation_cost(self, pop_size):
+        individ_cost = max(self.individ_costs[-COST_WINDOW:]) if self.individ_costs else 0.0
+
+        return individ_cost * pop_size
+
+    def can_continue(self, pop_size, gen_idx):
+        '''
+        :return: True if one more generation fits the remaining time
+        '''
+        if self.safety * self.generation_cost(pop_size) <= self.remaining():
+            return True
+
+        self._log(gen_idx, 'stop', f'generation does not fit {self.remaining():.4g} left')
+        return False
+
+    def allows(self, stage, pop_size, gen_idx, gens_left=1, points=None, fidelity=None):
+        '''
+        :param gens_left: Amount of generations to run after the stage
+        :return: True if the stage fits the remaining time with the remaining generations,
+        changes of the decision are logged
+        '''
+        cost = self.estimate(stage, points, fidelity) + self.generation_cost(pop_size) * max(1, gens_left)
+        allowed = self.safety * cost <= self.remaining()
+
+        if allowed == (stage in self._denied):
+            decision = f'allow {stage}' if allowed else f'skip {stage}'
+            self._log(gen_idx, decision, f'expected {cost:.4g} with {gens_left} generations, '
+                                         f'{self.remaining():.4g} left')
+            self._denied.symmetric_difference_update({stage})
+
+        return allowed
+
+    def adapt(self, params, gen_idx):
+        '''
+        Fit population size and the amount of generations of SPEA2.Params to the remaining time,
+        their initial values are the upper bounds
+        '''
+        if self.planned_gens is None:
+            self.planned_gens, self.planned_pop_size = params.max_gens, params.pop_size
+
+        gens_left = self.planned_gens - gen_idx - 1
+        if gens_left <= 0:
+            return
+
+        budget = self.remaining() / self.safety
+        individ_cost = self.generation_cost(1)
+
+        pop_size = self.planned_pop_size
+        if individ_cost > 0:
+            affordable = budget / gens_left / individ_cost
+            pop_size = int(min(self.planned_pop_size, max(self.min_pop_size, affordable)))
+
+        if pop_size != params.pop_size:
+            self._log(gen_idx, 'population', f'{params.pop_size} -> {pop_size} for {gens_left} generations')
+            params.pop_size = pop_size
+
+        gen_cost = self.generation_cost(pop_size)
+        max_gens = self.planned_gens
+        if gen_cost > 0:
+            max_gens = int(min(self.planned_gens, gen_idx + 1 + max(0.0, budget) // gen_cost))
+
+        if max_gens != params.max_gens:
+            self._log(gen_idx, 'generations', f'{params.max_gens} -> {max_gens}, {self.remaining():.4g} left')
+            params.max_gens = max_gens
+
+    def _log(self, gen_idx, decision, reason):
+        self.history.append({'gen': gen_idx, 'decision': decision, 'reason': reason})
+        print(f'deadline at generation {gen_idx}: {decision}: {reason}')
+
+
+class Measurement:
+    def __init__(self):
+        self.done = True
+        self.points = None
+        self.fidelity = None
+
+
+def simulated_clock(target_store):
+    '''
+    Clock of the simulated time of model runs, e.g. simulated_clock(FidelityFakeModel.target_store)
+    :param target_store: TargetStore with the cost of runs
+    '''
+    return lambda: target_store.spent
@@ -1,8 +1,16 @@
+import contextlib
 import copy
+from functools import partial
 
 from src.basic_evolution.model import (
     SWANPerfModel
 )
+from .deadline import (
+    Measurement,
+    RETRAIN,
+    SWITCH,
+    TRAIN
+)
 from .default import (
     mean_obj,
     print_new_best_individ,
@@ -13,6 +21,17 @@ from .spea2 import SPEA2
 
 class DynamicSPEA2(SPEA2):
     def __init__(self, params, objectives, evolutionary_operators, fidelity_handler, **kwargs):
+        '''
+        :param points_by_fidelity: Dict of points of previous runs by fidelity to train surrogates with
+        :param deadline: DeadlineController to finish the run before its deadline, max_gens and pop_size of params
+        become the upper bounds (params are copied), by default - max_gens generations are run
+        '''
+        if 'deadline' in kwargs:
+            self.deadline = kwargs['deadline']
+            params = copy.copy(params)
+        else:
+            self.deadline = None
+
         super().__init__(params=params, objectives=objectives, evolutionary_operators=evolutionary_operators)
         self.handler = fidelity_handler
 
@@ -26,9 +45,19 @@ class DynamicSPEA2(SPEA2):
         history = SPEA2.ErrorHistory()
 
         gen = 0
-        self.handler.init(population=self._archive + self._pop)
+        if self.deadline is not None:
+            self.deadline.start()
+
+        with self._timed(TRAIN) as train:
+            self.handler.init(population=self._archive + self._pop)
+            train.points, train.fidelity = self._training_points(), self._fidelity(self._pop)
 
         while gen < self.params.max_gens:
+            if self.deadline is not None:
+                if not self.deadline.can_continue(self.params.pop_size, gen):
+                    break
+                self.deadline.start_generation()
+
             self.fitness()
             self._archive = self.environmental_selection(self._pop, self._archive)
             best = sorted(self._archive, key=lambda p: mean_obj(p))[0]
@@ -46,7 +75,14 @@ class DynamicSPEA2(SPEA2):
                 history.add_new(best_gens, gen, mean_obj(best),
                                 rmse(best))
 
-                self.handler.handle_new_min_found(population=self._archive, gen_idx=gen)
+                points, fidelity = self.handler.point_for_retrain, self._fidelity(self._archive)
+                if self._allows(RETRAIN, gen, points=points, fidelity=fidelity):
+                    with self._timed(RETRAIN) as retrain:
+                        self.handler.handle_new_min_found(population=self._archive, gen_idx=gen)
+                        retrain.points, retrain.fidelity = points, fidelity
+                else:
+                    # the new minimum still delays the change of fidelity
+                    self.handler.last_min_at_gen = gen
 
             selected = self.selected(self.params.pop_size, self._archive)
             self._pop = self.reproduce(selected, self.params.pop_size)
@@ -55,12 +91,39 @@ class DynamicSPEA2(SPEA2):
             self.objectives(to_add)
             archive_history.append(to_add)
 
-            self.handler.handle_new_generation(population=self._archive + self._pop, gen_idx=gen,
-                                               points_by_fidelity=self.points_by_fidelity)
+            fidelity = self._fidelity(self._archive)
+            with self._timed(SWITCH) as switch:
+                # the fidelity is kept if the training at a new one does not fit the deadline
+                self.handler.handle_new_generation(population=self._archive + self._pop, gen_idx=gen,
+                                                   points_by_fidelity=self.points_by_fidelity,
+                                                   allows_switch=partial(self._allows, SWITCH, gen))
+                switch.points, switch.fidelity = self._training_points(), self._fidelity(self._archive)
+                switch.done = switch.fidelity != fidelity
+
+            if self.deadline is not None:
+                self.deadline.end_generation(self.params.pop_size)
+                self.deadline.adapt(self.params, gen)
             gen += 1
 
         return history, archive_history, self.points_by_fidelity
 
+    def _allows(self, stage, gen_idx, points=None, fidelity=None):
+        if self.deadline is None:
+            return True
+
+        return self.deadline.allows(stage, self.params.pop_size, gen_idx,
+                                    gens_left=self.params.max_gens - gen_idx, points=points, fidelity=fidelity)
+
+    def _timed(self, stage):
+        return self.deadline.timed(stage) if self.deadline is not None else contextlib.nullcontext(Measurement())
+
+    def _fidelity(self, population):
+        genotype = population[0].genotype
+        return genotype.fid_time, genotype.fid_space
+
+    def _training_points(self):
+        return len(self.handler.surrogates[0].features) if self.handler.surrogates else None
+
 
 class DynamicSPEA2PerfModel:
 
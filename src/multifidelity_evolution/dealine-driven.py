@@ -22,8 +22,9 @@ from src.evolution.operators import default_operators
 from src.evolution.spea2.dynamic import DynamicSPEA2, DynamicSPEA2PerfModel
 from src.evolution.spea2.spea2 import SPEA2
 from src.multifidelity_evolution.fidelity_handler import FidelityHandler
-from src.utils.files import (
-    wave_watch_results
+from src.surrogate.surrogate_store import SurrogateStore
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 
 import os
@@ -44,9 +45,7 @@ def init_models_to_tests():
                'mae_peak': error_mae_peak}
 
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)
 
     models = {}
     for metric_name in metrics.keys():
@@ -60,6 +59,9 @@ def init_models_to_tests():
 
 models_to_tests = init_models_to_tests()
 
+# iterations repeat the same configurations, trained surrogates are reused between them
+surrogate_store = SurrogateStore()
+
 
 def run_evolution(sur_points, time_delta, space_delta, point_for_retrain, gens_to_change_fidelity, max_gens, pop_size,
                   archive_size, iter_id, deadline, points_by_fid):
@@ -69,15 +71,14 @@ def run_evolution(sur_points, time_delta, space_delta, point_for_retrain, gens_t
 
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
 
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=train_stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=train_stations)
 
     train_model = FidelityFakeModel(grid_file=grid, observations=ww3_obs,
                                     stations_to_out=train_stations, error=error_rmse_all,
                                     forecasts_path='../../../2fidelity/*', forecasts_range=(0, 1),
                                     sur_points=sur_points,
-                                    is_surrogate=True, initial_fidelity=initial_fidelity)
+                                    is_surrogate=True, initial_fidelity=initial_fidelity,
+                                    surrogate_store=surrogate_store)
 
     operators = default_operators()
 
@@ -17,8 +17,8 @@ from src.multifidelity_evolution.fidelity_handler import (
     FidelityHandler,
     default_points_by_fidelity
 )
-from src.utils.files import (
-    wave_watch_results
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 
 
@@ -26,9 +26,7 @@ def run_evolution():
     train_stations = [1]
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
 
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=train_stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=train_stations)
 
     initial_fidelity = (180, 56)
     sur_points = 5
@@ -8,10 +8,21 @@ from itertools import product
 
 from src.basic_evolution.swan import SWANParams
 from src.evolution.spea2.default import mean_obj
+from src.surrogate.infill import supports_infill
 
 
 class FidelityHandler:
-    def __init__(self, surrogates, time_delta, space_delta, point_for_retrain, gens_to_change_fidelity):
+    def __init__(self, surrogates, time_delta, space_delta, point_for_retrain, gens_to_change_fidelity, **kwargs):
+        '''
+        :param trainer: ParallelTrainer to train surrogates concurrently, by default they are trained one by one
+        :param infill: Infill to choose points for retraining by the predictive variance of surrogates,
+        by default (or for surrogates without the variance) - the best individuals are taken
+        :param retrain_policy: RetrainPolicy to skip retrainings of accurate surrogates, the best individual
+        of every new minimum is evaluated to track the error, by default - surrogates are retrained at every new minimum
+        :param scheduler: FidelityScheduler to choose the next fidelity by the cost and the expected error,
+        by default - fidelity values are decreased by time_delta and space_delta.
+        Target stores of surrogates report the time of runs to the scheduler
+        '''
         self.surrogates = surrogates
         self.time_delta = time_delta
         self.space_delta = space_delta
@@ -19,6 +30,28 @@ class FidelityHandler:
         self.last_min_at_gen = -1
         self.gens_to_change_fidelity = gens_to_change_fidelity
 
+        if 'trainer' in kwargs:
+            self.trainer = kwargs['trainer']
+        else:
+            self.trainer = None
+
+        if 'infill' in kwargs:
+            self.infill = kwargs['infill']
+        else:
+            self.infill = None
+
+        if 'retrain_policy' in kwargs:
+            self.retrain_policy = kwargs['retrain_policy']
+        else:
+            self.retrain_policy = None
+
+        if 'scheduler' in kwargs:
+            self.scheduler = kwargs['scheduler']
+            for target_store in set(model.target_store for model in surrogates):
+                target_store.scheduler = self.scheduler
+        else:
+            self.scheduler = None
+
     def init(self, population):
         initial_fidelity = self.surrogates[0].fidelity
         print(f'initial fid: {initial_fidelity}')
@@ -29,27 +62,64 @@ class FidelityHandler:
         # fidelity = self.surrogates[0].fidelity
         if 'points_to_train' in kwargs:
             for model in self.surrogates:
-                model.train_with_mixed_points(fidelity=fidelity, external_points=kwargs['points_to_train'])
+                model.train_with_mixed_points(fidelity=fidelity, external_points=kwargs['points_to_train'],
+                                              fit=self.trainer is None)
         else:
             for model in self.surrogates:
-                model.train_with_mixed_points(fidelity=fidelity)
+                model.train_with_mixed_points(fidelity=fidelity, fit=self.trainer is None)
+
+        self.__fit_pending()
 
     def handle_new_min_found(self, population, gen_idx):
         self.last_min_at_gen = gen_idx
 
+        if self.retrain_policy is not None:
+            # the error at the new minimum is measured even if the retraining is skipped
+            best = sorted(population, key=lambda p: mean_obj(p))[0].genotype
+            for model in self.surrogates:
+                model.observe_infill([best])
+
+            if not self.retrain_policy.should_retrain(self.surrogates, gen_idx):
+                return
+
         print(f'starting to retrain at generation: {gen_idx}')
 
-        new_points = self.best_individuals(population=population)
+        if self.infill is not None and supports_infill(self.surrogates):
+            new_points = self.infill_individuals(population=population)
+        else:
+            new_points = self.best_individuals(population=population)
 
         for model in self.surrogates:
-            model.retrain_with_new_points(new_points=new_points)
+            model.retrain_with_new_points(new_points=new_points, fit=self.trainer is None)
+
+        self.__fit_pending()
 
     def handle_new_generation(self, population, gen_idx, **kwargs):
+        '''
+        :param points_by_fidelity: Dict of external points by fidelity to train surrogates at a new fidelity with
+        :param allows_switch: Function of (points=, fidelity=) that tells whether the training of surrogates
+        at a new fidelity is affordable, the fidelity is kept if not (see DeadlineController)
+        '''
         if self.last_min_at_gen != -1 and self.__gens_after_last_min(gen_idx) >= self.gens_to_change_fidelity:
             current_fid_time = population[0].genotype.fid_time
             current_fid_space = population[0].genotype.fid_space
 
-            new_fidelity = self.__next_fidelity(current_fidelity=(current_fid_time, current_fid_space))
+            if self.scheduler is not None:
+                self.scheduler.observe((current_fid_time, current_fid_space), self.surrogates)
+                new_fidelity = self.scheduler.next_fidelity((current_fid_time, current_fid_space), gen_idx=gen_idx)
+                # the choice is revised after the next gens_to_change_fidelity generations without a new minimum
+                self.last_min_at_gen = gen_idx
+            else:
+                new_fidelity = self.__next_fidelity(current_fidelity=(current_fid_time, current_fid_space))
+
+            if 'allows_switch' in kwargs and new_fidelity != (current_fid_time, current_fid_space):
+                points = len(population)
+                if 'points_by_fidelity' in kwargs:
+                    points += len(self.external_points(new_fidelity, kwargs['points_by_fidelity']))
+                points = max(points, max(model.points_to_train for model in self.surrogates))
+
+                if not kwargs['allows_switch'](points=points, fidelity=new_fidelity):
+                    new_fidelity = (current_fid_time, current_fid_space)
 
             self.set_fidelity(population=population, new_fidelity=new_fidelity)
 
@@ -62,8 +132,14 @@ class FidelityHandler:
                     external_points = self.external_points(new_fidelity, kwargs['points_by_fidelity'])
                     print(f'external points: {len(external_points)}')
                     points_for_train = self.__extracted_points(population) + external_points
+
+                    old_models = [model.krig for model in self.surrogates]
                     self.train_surrogates(points_to_train=points_for_train, fidelity=new_fidelity)
 
+                    if self.scheduler is not None:
+                        self.scheduler.observe_switch((current_fid_time, current_fid_space), new_fidelity,
+                                                      old_models, self.surrogates)
+
     def external_points(self, fidelity, points_by_fidelity):
         points = []
         if fidelity in points_by_fidelity:
@@ -80,7 +156,9 @@ class FidelityHandler:
     def retrain_models_with_new_fidelity(self, points, fidelity):
         new_points = [point.genotype for point in points]
         for model in self.surrogates:
-            model.retrain_full(points=new_points, fidelity=fidelity)
+            model.retrain_full(points=new_points, fidelity=fidelity, fit=self.trainer is None)
+
+        self.__fit_pending()
 
     def best_individuals(self, population):
         assert self.point_for_retrain <= len(population)
@@ -89,6 +167,18 @@ class FidelityHandler:
 
         return [individ.genotype for individ in best]
 
+    def infill_individuals(self, population):
+        genotypes = [individ.genotype for individ in population]
+        candidates = [[params.drf, params.cfw, params.stpm] for params in genotypes]
+
+        chosen = self.infill.select(surrogates=self.surrogates, candidates=candidates, points=self.point_for_retrain)
+
+        return [genotypes[idx] for idx in chosen]
+
+    def __fit_pending(self):
+        if self.trainer is not None:
+            self.trainer.fit(self.surrogates)
+
     def __gens_after_last_min(self, gen_idx):
         return gen_idx - self.last_min_at_gen
 
@@ -0,0 +1,144 @@
+import numpy as np
+
+from src.basic_evolution.model import SWANPerfModel
+from src.surrogate.accuracy import relative_error
+from src.surrogate.gp import non_zero
+
+# relative error of the objective added by every halving of time or space resolution,
+# used until it is measured by switches of fidelity
+DISCREPANCY_RATE = 0.05
+# min reduction of the expected error relative to the current one to change the level
+MIN_GAIN = 0.1
+
+
+class FidelityScheduler:
+    def __init__(self, fidelities, **kwargs):
+        '''
+        Chooses the next fidelity from the available grid by the expected error reduction per unit of simulation cost.
+        The expected error of a level is sqrt(surrogate error ^ 2 + discrepancy ^ 2), both relative to the std
+        of the objective:
+        - surrogate error is observed at visited levels (see relative_error), at other levels it is scaled by
+          sqrt(cost ratio) as more points of cheap levels fit into the same budget;
+        - discrepancy from the finest level grows by rate for every halving of time and space resolution,
+          the rate is measured by errors of old surrogates on the training points of a new level.
+        The level can be finer (more expensive) or coarser than the current one
+        :param fidelities: List of available (fid_time, fid_space), e.g. FidelityFakeModel.available_fidelities()
+        :param cost: Function of fidelity that gives the time of one run, by default - SWANPerfModel.get_execution_time
+        :param discrepancy_rate: Initial rate of the discrepancy
+        :param min_gain: Min relative reduction of the expected error to change the level (against oscillations)
+        '''
+        self.fidelities = sorted(set(tuple(fidelity) for fidelity in fidelities))
+
+        if 'cost' in kwargs:
+            self.cost_model = kwargs['cost']
+        else:
+            self.cost_model = SWANPerfModel.get_execution_time
+
+        if 'discrepancy_rate' in kwargs:
+            self.discrepancy_rate = kwargs['discrepancy_rate']
+        else:
+            self.discrepancy_rate = DISCREPANCY_RATE
+
+        if 'min_gain' in kwargs:
+            self.min_gain = kwargs['min_gain']
+        else:
+            self.min_gain = MIN_GAIN
+
+        self.finest = (min(fid_time for fid_time, _ in self.fidelities),
+                       min(fid_space for _, fid_space in self.fidelities))
+
+        self.surrogate_errors = {}
+        self.measured_rates = []
+        self._run_times = {}
+
+        # log of decisions with their justification
+        self.history = []
+
+    def observe(self, fidelity, surrogates):
+        '''
+        Remember the error of surrogates trained at the fidelity
+        '''
+        error = relative_error(surrogates)
+        if error is not None:
+            self.surrogate_errors[tuple(fidelity)] = error
+
+    def observe_switch(self, old_fidelity, new_fidelity, old_models, surrogates):
+        '''
+        Measure the discrepancy between levels by predictions of models of the old level
+        at training points of surrogates retrained at the new level
+        :param old_models: Trained models (KrigingModel.krig) of the old level in the order of surrogates
+        '''
+        distance = _levels_distance(old_fidelity, new_fidelity)
+        if distance == 0 or any(model is None for model in old_models):
+            return
+
+        residuals = [np.sqrt(np.mean((surrogate.target - model.predict(surrogate.features)) ** 2)) /
+                     non_zero(np.std(surrogate.target)) for model, surrogate in zip(old_models, surrogates)]
+        old_error = self.surrogate_errors.get(tuple(old_fidelity), 0.0)
+        discrepancy = np.sqrt(max(0.0, max(residuals) ** 2 - old_error ** 2))
+
+        self.measured_rates.append(discrepancy / distance)
+        print(f'discrepancy {old_fidelity} -> {new_fidelity}: {discrepancy:.4f}, rate: {self.rate():.4f}')
+
+    def record_cost(self, fidelity, seconds):
+        '''
+        Remember measured time of one run, it is used instead of the cost model.
+        Called by TargetStore for every batch of new runs
+        '''
+        self._run_times.setdefault(tuple(fidelity), []).append(seconds)
+
+    def cost(self, fidelity):
+        fidelity = tuple(fidelity)
+        if fidelity in self._run_times:
+            return float(np.mean(self._run_times[fidelity]))
+
+        return self.cost_model(fidelity)
+
+    def rate(self):
+        return float(np.mean(self.measured_rates)) if self.measured_rates else self.discrepancy_rate
+
+    def expected_error(self, fidelity, current_fidelity):
+        fidelity = tuple(fidelity)
+        current_error = self.surrogate_errors.get(tuple(current_fidelity), 0.0)
+
+        if fidelity in self.surrogate_errors:
+            surrogate_error = self.surrogate_errors[fidelity]
+        else:
+            surrogate_error = current_error * np.sqrt(self.cost(fidelity) / self.cost(current_fidelity))
+
+        discrepancy = self.rate() * _levels_distance(fidelity, self.finest)
+
+        return float(np.sqrt(surrogate_error ** 2 + discrepancy ** 2))
+
+    def next_fidelity(self, current_fidelity, gen_idx=None):
+        '''
+        :return: Available fidelity with the best error reduction per unit of cost, the current one if nothing
+        reduces the expected error by min_gain
+        '''
+        current_fidelity = tuple(current_fidelity)
+        current_error = self.expected_error(current_fidelity, current_fidelity)
+
+        best, best_score = current_fidelity, 0.0
+        for fidelity in self.fidelities:
+            gain = current_error - self.expected_error(fidelity, current_fidelity)
+            score = gain / self.cost(fidelity)
+            if fidelity != current_fidelity and gain > self.min_gain * current_error and score > best_score:
+                best, best_score = fidelity, score
+
+        if best == current_fidelity:
+            reason = f'no level reduces the expected error {current_error:.4f}'
+        else:
+            reason = (f'expected error {current_error:.4f} -> {self.expected_error(best, current_fidelity):.4f} '
+                      f'for cost {self.cost(best):.1f}')
+
+        self.history.append({'gen': gen_idx, 'from': current_fidelity, 'to': best, 'reason': reason})
+        print(f'fidelity schedule at generation {gen_idx}: {current_fidelity} -> {best}: {reason}')
+
+        return best
+
+
+def _levels_distance(fidelity_a, fidelity_b):
+    '''
+    Amount of halvings of time and space resolution between levels
+    '''
+    return abs(np.log2(fidelity_a[0] / fidelity_b[0])) + abs(np.log2(fidelity_a[1] / fidelity_b[1]))
@@ -16,8 +16,8 @@ from src.basic_evolution.model import (
 from src.basic_evolution.swan import SWANParams
 from src.evolution.operators import default_operators
 from src.evolution.spea2.default import DefaultSPEA2
-from src.utils.files import (
-    wave_watch_results
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 from src.utils.vis import (
     plot_results,
@@ -30,20 +30,6 @@ np.random.seed(42)
 random.seed(42)
 
 
-def model_all_stations(forecasts_range=(0, 1)):
-    grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)]
-
-    print("ffm")
-    model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=ALL_STATIONS, error=error_rmse_all,
-                              forecasts_path='../../../2fidelity/*', forecasts_range=forecasts_range,
-                              is_surrogate=False)
-
-    return model
-
-
 def default_params_forecasts(model):
     '''
     Our baseline:  forecasts with default SWAN params
@@ -66,14 +52,15 @@ def optimize_test(train_stations, max_gens, pop_size, archive_size, crossover_ra
 
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
 
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=train_stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)
 
     error = error_rmse_all
-    train_model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=train_stations, error=error,
-                                    forecasts_path='../../../2fidelity/*', forecasts_range=train_range,
-                                    is_surrogate=True, sur_points=sur_points)
+    # forecasts are loaded once for all stations, the train and the test windows are queried from the same model,
+    # surrogates are trained for the train stations only
+    model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=ALL_STATIONS, error=error,
+                              forecasts_path='../../../2fidelity/*', forecasts_range=train_range,
+                              windows={'train': train_range, 'test': test_range},
+                              is_surrogate=True, sur_points=sur_points, sur_stations=train_stations)
 
     operators = default_operators()
 
@@ -81,24 +68,27 @@ def optimize_test(train_stations, max_gens, pop_size, archive_size, crossover_ra
         params=DefaultSPEA2.Params(max_gens, pop_size=pop_size, archive_size=archive_size,
                                    crossover_rate=crossover_rate, mutation_rate=mutation_rate,
                                    mutation_value_rate=mutation_value_rate),
-        objectives=partial(calculate_objectives_interp, train_model),
+        objectives=partial(calculate_objectives_interp, model),
         evolutionary_operators=operators).solution(verbose=True)
 
     params = history.last().genotype
 
     if plot_figures:
-        test_model = model_all_stations(forecasts_range=test_range)
-        params = test_model.closest_params(params)
+        params = model.closest_params(params)
         closest_params = SWANParams(drf=params[0], cfw=params[1], stpm=params[2],
                                     fidelity_time=params[3], fidelity_space=params[4])
 
-        drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx = test_model.params_idxs(closest_params)
+        drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx = model.params_idxs(closest_params)
+
+        test_errors = model.error_grid('test')[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx]
+        print(f'test errors: {test_errors}')
 
-        forecasts = test_model.grid[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx]
+        forecasts = [forecast.in_range(test_range)
+                     for forecast in model.grid[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx]]
+        baseline = [forecast.in_range(test_range) for forecast in default_params_forecasts(model)]
 
-        plot_results(forecasts=forecasts,
-                     observations=wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS),
-                     baseline=default_params_forecasts(test_model))
+        plot_results(forecasts=forecasts, observations=ww3_obs, stations=ALL_STATIONS,
+                     baseline=baseline, values_range=test_range)
         plot_population_movement(archive_history, grid)
 
     return history.last().error_value
@@ -32,8 +32,8 @@ from src.evolution.spea2.dynamic import DynamicSPEA2
 from src.evolution.spea2.spea2 import SPEA2
 from src.multifidelity_evolution.fidelity_handler import FidelityHandler
 
-from src.utils.files import (
-    wave_watch_results
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 from src.utils.vis import (
     plot_results,
@@ -62,9 +62,7 @@ def get_rmse_for_all_stations(forecasts, observations):
 
 def model_all_stations(forecasts_range=(0, 1)):
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)
 
     model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=ALL_STATIONS, error=error_rmse_all,
                               forecasts_path='../../../2fidelity/*', forecasts_range=forecasts_range,
@@ -126,8 +124,7 @@ def run_genetic_opt(max_gens, pop_size, archive_size, crossover_rate, mutation_r
                     stations,
                     **kwargs):
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in wave_watch_results(path_to_results='../../samples/ww-res/', stations=stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=stations)
 
     train_model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=stations,
                                     error=error_rmse_all,
@@ -236,9 +233,7 @@ def init_models_to_tests():
                'mae_peak': error_mae_peak}
 
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)
 
     models = {}
     for metric_name in metrics.keys():
@@ -19,8 +19,8 @@ from src.evolution.operators import default_operators
 from src.evolution.spea2.dynamic import DynamicSPEA2, DynamicSPEA2PerfModel
 from src.evolution.spea2.spea2 import SPEA2
 from src.multifidelity_evolution.fidelity_handler import FidelityHandler
-from src.utils.files import (
-    wave_watch_results
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 
 import os
@@ -45,9 +45,7 @@ def run_evolution(sur_points, time_delta, space_delta, point_for_retrain, gens_t
 
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
 
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=train_stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=train_stations)
 
     train_model = FidelityFakeModel(grid_file=grid, observations=ww3_obs,
                                     stations_to_out=train_stations, error=error_rmse_all,
@@ -16,8 +16,8 @@ from src.basic_evolution.model import (
 from src.basic_evolution.swan import SWANParams
 from src.evolution.operators import default_operators
 from src.evolution.spea2.default import DefaultSPEA2
-from src.utils.files import (
-    wave_watch_results
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 from src.utils.vis import (
     plot_results,
@@ -32,9 +32,7 @@ random.seed(42)
 
 def model_all_stations(forecasts_range=(0, 1)):
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS)
 
     model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=ALL_STATIONS, error=error_rmse_all,
                               forecasts_path='../../../2fidelity/*', forecasts_range=forecasts_range)
@@ -64,9 +62,7 @@ def optimize_test(train_stations, max_gens, pop_size, archive_size, crossover_ra
 
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
 
-    ww3_obs = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=train_stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=train_stations)
 
     error = error_rmse_all
     train_model = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=train_stations, error=error,
@@ -94,7 +90,9 @@ def optimize_test(train_stations, max_gens, pop_size, archive_size, crossover_ra
         forecasts = test_model.grid[drf_idx, cfw_idx, stpm_idx, fid_time_idx, fid_space_idx]
 
         plot_results(forecasts=forecasts,
-                     observations=wave_watch_results(path_to_results='../../samples/ww-res/', stations=ALL_STATIONS),
+                     observations=wave_watch_observations(path_to_results='../../samples/ww-res/',
+                                                          stations=ALL_STATIONS),
+                     stations=ALL_STATIONS,
                      baseline=default_params_forecasts(test_model),
                      values_range=test_range)
         plot_population_movement(archive_history, grid)
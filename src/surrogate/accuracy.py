@@ -0,0 +1,84 @@
+import numpy as np
+
+from src.surrogate.gp import non_zero
+
+ERROR_THRESHOLD = 0.05
+DRIFT_RATIO = 2.0
+MAX_SKIPS = 3
+
+
+class RetrainPolicy:
+    def __init__(self, **kwargs):
+        '''
+        Decides whether surrogates need new points by cheap estimates of their error:
+        closed-form leave-one-out error and the error of predictions at previous infill points and new minima
+        (see KrigingModel.loo_error, KrigingModel.infill_error), both relative to the std of the training target.
+        Surrogates are retrained if the worst estimate exceeds the threshold, if infill error drifts away
+        from the LOO error (the model goes to the regions that it has not seen) or after max_skips skipped retrainings
+        :param threshold: Max relative error of accurate surrogates
+        :param drift: Max ratio of infill error to LOO error of accurate surrogates
+        :param max_skips: Amount of retrainings in a row that can be skipped
+        '''
+        if 'threshold' in kwargs:
+            self.threshold = kwargs['threshold']
+        else:
+            self.threshold = ERROR_THRESHOLD
+
+        if 'drift' in kwargs:
+            self.drift = kwargs['drift']
+        else:
+            self.drift = DRIFT_RATIO
+
+        if 'max_skips' in kwargs:
+            self.max_skips = kwargs['max_skips']
+        else:
+            self.max_skips = MAX_SKIPS
+
+        self.skips = 0
+        # log of accuracy of surrogates at every decision
+        self.history = []
+
+    def should_retrain(self, surrogates, gen_idx):
+        '''
+        :param surrogates: Trained KrigingModel objects
+        :return: True if surrogates should be retrained with new points
+        '''
+        loo = _worst_relative([surrogate.loo_error() for surrogate in surrogates], surrogates)
+        infill = _worst_relative([surrogate.infill_error() for surrogate in surrogates], surrogates)
+        estimates = [error for error in [loo, infill] if error is not None]
+
+        if not estimates:
+            retrain, reason = True, 'no error estimate'
+        elif max(estimates) > self.threshold:
+            retrain, reason = True, f'error {max(estimates):.4f} > {self.threshold}'
+        elif loo is not None and infill is not None and infill > self.drift * loo:
+            retrain, reason = True, f'infill error {infill:.4f} drifts from LOO error {loo:.4f}'
+        elif self.skips >= self.max_skips:
+            retrain, reason = True, f'{self.skips} retrainings skipped'
+        else:
+            retrain, reason = False, 'surrogates are accurate'
+
+        self.skips = 0 if retrain else self.skips + 1
+        self.history.append({'gen': gen_idx, 'loo': loo, 'infill': infill, 'retrain': retrain, 'reason': reason})
+        print(f'gen {gen_idx}: relative LOO error: {loo}, infill error: {infill}, retrain: {retrain} ({reason})')
+
+        return retrain
+
+
+def relative_error(surrogates):
+    '''
+    :return: Worst of LOO and infill errors of surrogates relative to the std of their targets,
+    None if there are no estimates
+    '''
+    estimates = [_worst_relative([surrogate.loo_error() for surrogate in surrogates], surrogates),
+                 _worst_relative([surrogate.infill_error() for surrogate in surrogates], surrogates)]
+    estimates = [error for error in estimates if error is not None]
+
+    return max(estimates) if estimates else None
+
+
+def _worst_relative(errors, surrogates):
+    relative = [error / non_zero(np.std(surrogate.target)) for error, surrogate in zip(errors, surrogates)
+                if error is not None]
+
+    return max(relative) if relative else None
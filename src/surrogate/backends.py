@@ -0,0 +1,216 @@
+import numpy as np
+from pyKriging.krige import kriging
+from scipy.interpolate import RBFInterpolator
+
+from src.surrogate.gp import GaussianProcess
+from src.surrogate.sparse_gp import SparseGaussianProcess
+
+GP_BACKEND = 'gp'
+SPARSE_GP_BACKEND = 'sparse_gp'
+RBF_BACKEND = 'rbf'
+QUADRATIC_BACKEND = 'quadratic'
+RANDOM_FOREST_BACKEND = 'random_forest'
+PYKRIGING_BACKEND = 'pykriging'
+
+
+class Surrogate:
+    '''
+    Common part of surrogates: features are normalized to [0, 1], a point gives a scalar (or outputs),
+    an array of points gives an array as in GaussianProcess
+    '''
+    multi_output = True
+    # False if predict_var raises NotImplementedError
+    estimates_variance = True
+
+    def fit(self, features, target):
+        features = np.asarray(features, dtype=float)
+        target = np.asarray(target, dtype=float)
+
+        self._x_min = features.min(axis=0)
+        self._x_range = np.where(features.max(axis=0) > self._x_min, features.max(axis=0) - self._x_min, 1.0)
+
+        self._fit_normalized(self._norm_x(features), target)
+
+        return self
+
+    def predict(self, features):
+        return self._for_points(features, self._predict_normalized)
+
+    def predict_var(self, features):
+        return self._for_points(features, self._predict_var_normalized)
+
+    def _for_points(self, features, predict):
+        features = np.asarray(features, dtype=float)
+        values = predict(self._norm_x(np.atleast_2d(features)))
+
+        return values[0] if features.ndim == 1 else values
+
+    def _norm_x(self, features):
+        return (features - self._x_min) / self._x_range
+
+    def _fit_normalized(self, features, target):
+        raise NotImplementedError()
+
+    def _predict_normalized(self, features):
+        raise NotImplementedError()
+
+    def _predict_var_normalized(self, features):
+        raise NotImplementedError(f'{type(self).__name__} does not estimate the variance')
+
+
+class RBFSurrogate(Surrogate):
+    estimates_variance = False
+
+    def __init__(self, **kwargs):
+        '''
+        Radial basis function interpolation (scipy RBFInterpolator)
+        :param kernel: Kernel of RBFInterpolator
+        :param smoothing: Smoothing of RBFInterpolator, 0 - exact interpolation
+        '''
+        if 'kernel' in kwargs:
+            self.kernel = kwargs['kernel']
+        else:
+            self.kernel = 'thin_plate_spline'
+
+        if 'smoothing' in kwargs:
+            self.smoothing = kwargs['smoothing']
+        else:
+            self.smoothing = 0.0
+
+    def _fit_normalized(self, features, target):
+        self._rbf = RBFInterpolator(features, target, kernel=self.kernel, smoothing=self.smoothing)
+
+    def _predict_normalized(self, features):
+        return self._rbf(features)
+
+
+class QuadraticSurrogate(Surrogate):
+    '''
+    Quadratic response surface fitted by least squares
+    '''
+    estimates_variance = False
+
+    def _fit_normalized(self, features, target):
+        self._coefs, *_ = np.linalg.lstsq(_quadratic_terms(features), target, rcond=None)
+
+    def _predict_normalized(self, features):
+        return _quadratic_terms(features).dot(self._coefs)
+
+
+class RandomForestSurrogate(Surrogate):
+    def __init__(self, **kwargs):
+        '''
+        Random forest of scikit-learn (optional dependency), the variance is estimated by the spread of trees
+        :param trees: Amount of trees
+        :param seed: Random state of the forest
+        '''
+        if 'trees' in kwargs:
+            self.trees = kwargs['trees']
+        else:
+            self.trees = 100
+
+        if 'seed' in kwargs:
+            self.seed = kwargs['seed']
+        else:
+            self.seed = None
+
+    def _fit_normalized(self, features, target):
+        self._forest = _random_forest_regressor()(n_estimators=self.trees, random_state=self.seed)
+        self._forest.fit(features, target)
+
+    def _predict_normalized(self, features):
+        return self._forest.predict(features)
+
+    def _predict_var_normalized(self, features):
+        return np.var([tree.predict(features) for tree in self._forest.estimators_], axis=0)
+
+
+class PyKrigingSurrogate:
+    '''
+    Adapter of pyKriging trained by GA, one output only
+    '''
+    multi_output = False
+
+    def fit(self, features, target):
+        self._krig = kriging(np.asarray(features, dtype=float), np.asarray(target, dtype=float), name='multikrieg')
+        self._krig.train(optimizer='ga')
+
+        return self
+
+    def predict(self, features):
+        return self._for_points(features, self._krig.predict)
+
+    def predict_var(self, features):
+        # predict_var of pyKriging returns the standard deviation
+        return self._for_points(features, lambda feature: self._krig.predict_var(feature) ** 2)
+
+    def _for_points(self, features, predict):
+        features = np.asarray(features, dtype=float)
+        if features.ndim == 1:
+            return predict(features)
+
+        return np.asarray([predict(feature) for feature in features])
+
+
+SURROGATE_BACKENDS = {
+    GP_BACKEND: GaussianProcess,
+    SPARSE_GP_BACKEND: SparseGaussianProcess,
+    RBF_BACKEND: RBFSurrogate,
+    QUADRATIC_BACKEND: QuadraticSurrogate,
+    RANDOM_FOREST_BACKEND: RandomForestSurrogate,
+    PYKRIGING_BACKEND: PyKrigingSurrogate
+}
+
+
+def new_surrogate(backend, **kwargs):
+    '''
+    :param backend: Name of the backend from SURROGATE_BACKENDS
+    :param kwargs: Params of the backend
+    :return: Untrained surrogate with fit(features, target) and predict(features),
+    predict_var(features) is estimated by backends with estimates_variance only
+    '''
+    if backend not in SURROGATE_BACKENDS:
+        raise ValueError(f'unknown surrogate backend: {backend}')
+
+    return SURROGATE_BACKENDS[backend](**kwargs)
+
+
+def is_multi_output(backend):
+    return getattr(SURROGATE_BACKENDS[backend], 'multi_output', True)
+
+
+def estimates_variance(backend):
+    '''
+    :return: True if the surrogate estimates the variance of predictions by predict_var
+    '''
+    return getattr(SURROGATE_BACKENDS[backend], 'estimates_variance', True)
+
+
+def is_incremental(backend):
+    '''
+    :return: True if a trained surrogate can be extended with new points by add_points
+    '''
+    return hasattr(SURROGATE_BACKENDS[backend], 'add_points')
+
+
+def is_shippable(backend):
+    '''
+    :return: True if hyperparameters can be found by optimize in other process and passed to fit_with_theta
+    '''
+    return hasattr(SURROGATE_BACKENDS[backend], 'fit_with_theta')
+
+
+def _quadratic_terms(features):
+    dims = features.shape[1]
+    cross = [features[:, i] * features[:, j] for i in range(dims) for j in range(i, dims)]
+
+    return np.column_stack([np.ones(len(features)), features] + cross)
+
+
+def _random_forest_regressor():
+    try:
+        from sklearn.ensemble import RandomForestRegressor
+    except ImportError as err:
+        raise ImportError('random_forest surrogate requires scikit-learn') from err
+
+    return RandomForestRegressor
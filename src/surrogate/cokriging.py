@@ -0,0 +1,102 @@
+import numpy as np
+
+from src.surrogate.gp import GaussianProcess
+
+
+class CoKriging:
+    def __init__(self, **kwargs):
+        '''
+        Autoregressive multi-fidelity kriging (Kennedy & O'Hagan AR(1) in the recursive form of Le Gratiet):
+        f_t(x) = rho_t * f_{t-1}(x) + delta_t(x), where delta_t is a kriging model of the discrepancy
+        between neighbouring levels. Levels don't need nested designs, f_{t-1} is taken by its prediction.
+        Many cheap evaluations of low levels keep informing the top one, so it needs far fewer points
+        :param kwargs: Params of GaussianProcess for every level
+        '''
+        self.gp_params = kwargs
+
+        self.models = []
+        self.rhos = []
+
+    def fit(self, levels):
+        '''
+        :param levels: List of (features, target) from the cheapest level to the most expensive one,
+        target is an array of values or (points, outputs) array as in GaussianProcess
+        '''
+        self.models, self.rhos = [], []
+
+        for features, target in levels:
+            target = np.asarray(target, dtype=float)
+
+            if not self.models:
+                rho, discrepancy = None, target
+            else:
+                previous, _ = self._predicted(features, len(self.models), with_variance=False)
+                rho = _scaling(previous, target)
+                discrepancy = target - rho * previous
+
+            self.models.append(GaussianProcess(**self.gp_params).fit(features, discrepancy))
+            self.rhos.append(rho)
+
+        return self
+
+    def add_points(self, features, target):
+        '''
+        Extend the discrepancy of the top level with new points, see GaussianProcess.add_points
+        '''
+        target = np.asarray(target, dtype=float)
+        if len(self.models) > 1:
+            target = target - self.rhos[-1] * self._predicted(features, len(self.models) - 1, with_variance=False)[0]
+
+        self.models[-1].add_points(features, target)
+
+        return self
+
+    def loo_residuals(self):
+        '''
+        Leave-one-out residuals of the top level with lower levels fixed, see GaussianProcess.loo_residuals
+        '''
+        return self.models[-1].loo_residuals()
+
+    def predict(self, features):
+        '''
+        :return: Prediction of the top level for a point or an array of them
+        '''
+        mean, _ = self._predicted(features, len(self.models), with_variance=False)
+
+        return mean
+
+    def predict_var(self, features):
+        '''
+        :return: Variance of the top level prediction assuming independent discrepancies
+        '''
+        _, variance = self._predicted(features, len(self.models), with_variance=True)
+
+        return variance
+
+    def _predicted(self, features, levels, with_variance):
+        '''
+        Mean and variance of the level that is built on the first 'levels' models
+        '''
+        mean, variance = 0.0, 0.0
+        for model, rho in zip(self.models[:levels], self.rhos[:levels]):
+            if rho is not None:
+                mean, variance = rho * mean, rho ** 2 * variance
+
+            mean = mean + model.predict(features)
+            if with_variance:
+                variance = variance + model.predict_var(features)
+
+        return mean, variance if with_variance else None
+
+
+def _scaling(previous, target):
+    '''
+    Least-squares scaling between levels for every output, the intercept is left to the discrepancy model
+    '''
+    previous_dev = previous - np.mean(previous, axis=0)
+    target_dev = target - np.mean(target, axis=0)
+
+    covariance = np.sum(previous_dev * target_dev, axis=0)
+    variance = np.sum(previous_dev ** 2, axis=0)
+
+    return np.where(variance > 0, covariance / np.where(variance > 0, variance, 1.0), 1.0)
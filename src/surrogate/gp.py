@@ -0,0 +1,308 @@
+import numpy as np
+from scipy.linalg import (
+    cho_factor,
+    cho_solve,
+    cholesky,
+    solve_triangular
+)
+from scipy.optimize import minimize
+
+from src.utils.design import unit_design
+
+THETA_BOUNDS = (1e-5, 100.0)
+NUGGET = 1e-10
+
+
+class GaussianProcess:
+    def __init__(self, **kwargs):
+        '''
+        Ordinary kriging with the anisotropic (ARD) gaussian correlation exp(-sum(theta_k * (x_k - x'_k) ** 2)).
+        Features and target are normalized to [0, 1] as in pyKriging, hyperparameters are found by multi-start L-BFGS
+        over the concentrated log-likelihood with the analytic gradient.
+        Several outputs (e.g. errors for all stations) share the correlation parameters and the factorization,
+        each of them has own mean and process variance
+        :param restarts: Amount of starting points of L-BFGS
+        :param theta_bounds: Bounds of correlation parameters
+        :param nugget: Value added to the diagonal of the correlation matrix
+        :param seed: Seed of the starting points
+        :param initial_theta: Hyperparameters of a similar model (see hyperparameters) added to the starting points
+        '''
+        if 'restarts' in kwargs:
+            self.restarts = kwargs['restarts']
+        else:
+            self.restarts = 5
+
+        if 'theta_bounds' in kwargs:
+            self.theta_bounds = kwargs['theta_bounds']
+        else:
+            self.theta_bounds = THETA_BOUNDS
+
+        if 'nugget' in kwargs:
+            self.nugget = kwargs['nugget']
+        else:
+            self.nugget = NUGGET
+
+        if 'seed' in kwargs:
+            self.seed = kwargs['seed']
+        else:
+            self.seed = None
+
+        if 'initial_theta' in kwargs:
+            self.initial_theta = kwargs['initial_theta']
+        else:
+            self.initial_theta = None
+
+        self.theta = None
+
+    def fit(self, features, target):
+        '''
+        Train the model: normalize the data, find the hyperparameters and factorize the correlation matrix
+        :param features: Array of (points, dimensions)
+        :param target: Array of target values for the points or (points, outputs) array
+        '''
+        self.optimize(features, target)
+        self._factorize()
+
+        return self
+
+    def optimize(self, features, target):
+        '''
+        Find the hyperparameters without factorization of the final model
+        :return: Correlation parameters, see fit_with_theta
+        '''
+        self._set_data(features, target)
+        self.theta = self._optimized_theta()
+
+        return self.theta
+
+    def fit_with_theta(self, features, target, theta):
+        '''
+        Train the model with known correlation parameters (e.g. found by other process)
+        '''
+        self._set_data(features, target)
+        self.theta = np.asarray(theta, dtype=float)
+        self._factorize()
+
+        return self
+
+    def hyperparameters(self):
+        '''
+        :return: Hyperparameters of the trained model in the form returned by optimize
+        '''
+        return self.theta
+
+    def __getstate__(self):
+        # squared distances are needed for optimization only and take O(n^2) memory
+        state = self.__dict__.copy()
+        state.pop('_sq_dists', None)
+
+        return state
+
+    def add_points(self, features, target):
+        '''
+        Extend the trained model with new points keeping hyperparameters and normalization fixed.
+        The Cholesky factor is extended by the block of new rows in O(n^2 k) for k new points
+        :param features: Array of (new points, dimensions)
+        :param target: Array of target values for the new points or (new points, outputs) array
+        '''
+        assert self.theta is not None
+
+        new_x = self._norm_x(np.atleast_2d(np.asarray(features, dtype=float)))
+        new_y = (np.asarray(target, dtype=float).reshape((len(new_x), -1)) - self._y_min) / self._y_range
+
+        lower = self._chol[0]
+        cross = solve_triangular(lower, self._correlation(self._x, new_x), lower=True)
+        schur = self._correlation(new_x, new_x) + self.nugget * np.eye(len(new_x)) - cross.T.dot(cross)
+
+        lower = np.block([[lower, np.zeros((self._points, len(new_x)))],
+                          [cross.T, cholesky(schur, lower=True)]])
+
+        self._x = np.vstack([self._x, new_x])
+        self._y = np.vstack([self._y, new_y])
+        self._points = len(self._x)
+        self._sq_dists = (self._x[:, None, :] - self._x[None, :, :]) ** 2
+
+        self._chol = (lower, True)
+        self._update_weights()
+
+        return self
+
+    def loo_residuals(self):
+        '''
+        Closed-form leave-one-out residuals of ordinary kriging (Dubrule, 1983): differences between targets
+        and predictions of the model trained without the point (with the same hyperparameters) in O(n^3)
+        instead of n trainings
+        :return: Array of residuals in real world units with the shape of the target
+        '''
+        assert self.theta is not None
+
+        inv_diag = np.diag(cho_solve(self._chol, np.eye(self._points))) - self._inv_ones ** 2 / np.sum(self._inv_ones)
+        residuals = self._alpha / inv_diag[:, None] * self._y_range
+
+        return residuals if self._is_multi_output else residuals[:, 0]
+
+    def predict(self, features):
+        '''
+        :param features: A point or an array of (points, dimensions) in real world units
+        :return: Predicted value for a point or an array of them, outputs are the last axis for multi-output model
+        '''
+        mean, _ = self._predicted(features, with_variance=False)
+
+        return mean
+
+    def predict_var(self, features):
+        '''
+        :return: Kriging variance of the prediction (in real world units) for a point or an array of them
+        '''
+        _, variance = self._predicted(features, with_variance=True)
+
+        return variance
+
+    def neg_log_likelihood(self, log_theta):
+        '''
+        Concentrated negative log-likelihood of the normalized data and its gradient
+        :param log_theta: Natural logarithms of correlation parameters
+        :return: Tuple (value, gradient by log_theta)
+        '''
+        theta = np.exp(log_theta)
+        corr = np.exp(-np.tensordot(self._sq_dists, theta, axes=([2], [0])))
+
+        try:
+            chol = cho_factor(corr + self.nugget * np.eye(self._points), lower=True)
+        except np.linalg.LinAlgError:
+            return np.inf, np.zeros_like(log_theta)
+
+        mu, sigma2, alpha = self._concentrated(chol, self._y)
+        if np.any(sigma2 <= 0):
+            return np.inf, np.zeros_like(log_theta)
+
+        outputs = self._y.shape[1]
+        log_det = 2.0 * np.sum(np.log(np.diag(chol[0])))
+        value = 0.5 * self._points * np.sum(np.log(sigma2)) + 0.5 * outputs * log_det
+
+        # d(value)/d(corr) = 0.5 * sum by outputs (corr^-1 - alpha alpha^T / sigma2),
+        # d(corr)/d(theta_k) = -sq_dists_k * corr
+        weights = outputs * cho_solve(chol, np.eye(self._points)) - (alpha / sigma2).dot(alpha.T)
+        grad = -0.5 * np.tensordot(weights * corr, self._sq_dists, axes=([0, 1], [0, 1])) * theta
+
+        return value, grad
+
+    def _set_data(self, features, target):
+        self._normalize(features, target)
+
+        diffs = self._x[:, None, :] - self._x[None, :, :]
+        self._sq_dists = diffs ** 2
+
+    def _normalize(self, features, target):
+        features = np.asarray(features, dtype=float)
+        target = np.asarray(target, dtype=float)
+        self._is_multi_output = target.ndim > 1
+        target = target.reshape((len(features), -1))
+
+        self._x_min = features.min(axis=0)
+        self._x_range = non_zero(features.max(axis=0) - self._x_min)
+        self._y_min = target.min(axis=0)
+        self._y_range = non_zero(target.max(axis=0) - self._y_min)
+
+        self._x = self._norm_x(features)
+        self._y = (target - self._y_min) / self._y_range
+        self._points = len(self._x)
+
+    def _optimized_theta(self):
+        bounds = [tuple(np.log(self.theta_bounds))] * self._x.shape[1]
+        initial = None if self.initial_theta is None else np.log(self.initial_theta)
+
+        return np.exp(multi_start_minimum(self.neg_log_likelihood, bounds, self.restarts, self.seed, jac=True,
+                                          initial=initial))
+
+    def _factorize(self):
+        corr = self._correlation(self._x, self._x) + self.nugget * np.eye(self._points)
+        self._chol = (cholesky(corr, lower=True), True)
+        self._update_weights()
+
+    def _update_weights(self):
+        self._mu, self._sigma2, self._alpha = self._concentrated(self._chol, self._y)
+        self._inv_ones = cho_solve(self._chol, np.ones(self._points))
+
+    def _concentrated(self, chol, y):
+        '''
+        Closed-form means, process variances and weights corr^-1 (y - mu) of all outputs for the given factorization
+        '''
+        ones = np.ones(self._points)
+        inv_ones = cho_solve(chol, ones)
+        mu = inv_ones.dot(y) / inv_ones.dot(ones)
+
+        alpha = cho_solve(chol, y - mu)
+        sigma2 = np.sum((y - mu) * alpha, axis=0) / self._points
+
+        return mu, sigma2, alpha
+
+    def _predicted(self, features, with_variance):
+        assert self.theta is not None
+
+        features = np.asarray(features, dtype=float)
+        is_point = features.ndim == 1
+        features = np.atleast_2d(features)
+
+        corr = self._correlation(self._norm_x(features), self._x)
+        mean = self._mu + corr.dot(self._alpha)
+        mean = mean * self._y_range + self._y_min
+
+        variance = None
+        if with_variance:
+            inv_corr = cho_solve(self._chol, corr.T)
+            ones_term = (1.0 - corr.dot(self._inv_ones)) ** 2 / np.sum(self._inv_ones)
+            factor = np.clip(1.0 - np.sum(corr.T * inv_corr, axis=0) + ones_term, 0.0, None)
+            variance = factor[:, None] * self._sigma2 * self._y_range ** 2
+
+        return self._shaped(mean, is_point), None if variance is None else self._shaped(variance, is_point)
+
+    def _shaped(self, values, is_point):
+        '''
+        Drop axes of (points, outputs) array that were not presented in the features and the target
+        '''
+        if not self._is_multi_output:
+            values = values[:, 0]
+
+        return values[0] if is_point else values
+
+    def _correlation(self, features_a, features_b):
+        sq_dists = (features_a[:, None, :] - features_b[None, :, :]) ** 2
+
+        return np.exp(-np.tensordot(sq_dists, self.theta, axes=([2], [0])))
+
+    def _norm_x(self, features):
+        return (features - self._x_min) / self._x_range
+
+
+def multi_start_minimum(fun, bounds, restarts, seed, jac, initial=None):
+    '''
+    Minimize fun by L-BFGS-B from LHS starting points, the same seed gives the same starting points
+    :param bounds: List of (low, high) for every argument
+    :param jac: If True, fun returns (value, gradient), otherwise the gradient is estimated by finite differences
+    :param initial: Starting point (e.g. from a similar model) to try first
+    :return: Best found arguments
+    '''
+    low, high = np.asarray(bounds).T
+    starts = low + (high - low) * unit_design(len(bounds), restarts, seed=seed)
+
+    if initial is not None:
+        starts = np.vstack([np.clip(initial, low, high), starts])
+
+    best = None
+    for start in starts:
+        result = minimize(fun, start, jac=jac, method='L-BFGS-B', bounds=bounds)
+        if np.isfinite(result.fun) and (best is None or result.fun < best.fun):
+            best = result
+
+    if best is None:
+        raise ValueError('likelihood is not finite for all starting points')
+
+    return best.x
+
+
+def non_zero(value):
+    '''
+    Value (e.g. a range or a std) with zeros replaced by 1.0 to be used as a divisor, arrays are replaced element-wise
+    '''
+    return np.where(value > 0, value, 1.0)
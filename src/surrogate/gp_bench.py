@@ -0,0 +1,64 @@
+import time
+
+import numpy as np
+from pyDOE import lhs
+from pyKriging.krige import kriging
+
+from src.surrogate.gp import GaussianProcess
+
+# ranges of drf, cfw, stpm as in wind-exp-params grids
+PARAMS_RANGES = np.asarray([[0.2, 2.0], [0.005, 0.05], [0.001, 0.01]])
+
+
+def synthetic_error(features):
+    '''
+    Smooth error-like surface over (drf, cfw, stpm) with a single valley
+    '''
+    normed = (features - PARAMS_RANGES[:, 0]) / (PARAMS_RANGES[:, 1] - PARAMS_RANGES[:, 0])
+
+    return 0.3 + np.sum((normed - [0.4, 0.6, 0.3]) ** 2 * [1.0, 2.0, 0.5], axis=1) + 0.1 * np.sin(5 * normed[:, 0])
+
+
+def samples(points, seed):
+    np.random.seed(seed)
+    normed = lhs(len(PARAMS_RANGES), points, 'center')
+
+    return PARAMS_RANGES[:, 0] + normed * (PARAMS_RANGES[:, 1] - PARAMS_RANGES[:, 0])
+
+
+def train_gp(features, target):
+    return GaussianProcess(seed=42).fit(features, target).predict
+
+
+def train_pykriging(features, target):
+    krig = kriging(features, target, name='multikrieg')
+    krig.train(optimizer='ga')
+
+    return lambda test: np.asarray([krig.predict(point) for point in test])
+
+
+def evaluate(train, points, test_points=500):
+    features, test = samples(points, seed=1), samples(test_points, seed=2)
+
+    start = time.perf_counter()
+    predict = train(features, synthetic_error(features))
+    elapsed = time.perf_counter() - start
+
+    rmse = np.sqrt(np.mean((predict(test) - synthetic_error(test)) ** 2))
+
+    return elapsed, rmse
+
+
+def run_benchmark(points_range=(20, 50, 100, 200)):
+    for points in points_range:
+        for name, train in [('gp', train_gp), ('pykriging', train_pykriging)]:
+            try:
+                elapsed, rmse = evaluate(train, points)
+            except Exception as err:
+                print(f'{name}: {points} points: failed with {err!r}')
+                continue
+            print(f'{name}: {points} points: train {elapsed:.2f}s, test rmse {rmse:.5f}')
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -0,0 +1,141 @@
+import copy
+
+import numpy as np
+from scipy.stats import norm
+
+EXPECTED_IMPROVEMENT = 'ei'
+LOWER_CONFIDENCE_BOUND = 'lcb'
+
+LCB_KAPPA = 2.0
+
+
+class Infill:
+    def __init__(self, **kwargs):
+        '''
+        Choice of points to evaluate by the true model for retraining of surrogates.
+        The objective is the mean error by stations (see mean_obj), its variance is taken from surrogates
+        of all stations assuming independent errors. Several points are chosen by Kriging Believer:
+        after every choice surrogates are extended (on copies) with the predicted value of the chosen point,
+        so the next point is taken from a less explored region
+        :param criterion: EXPECTED_IMPROVEMENT (by default) or LOWER_CONFIDENCE_BOUND
+        :param kappa: Weight of the standard deviation in LOWER_CONFIDENCE_BOUND
+        :param believer: If False, several points are just the best ones by the criterion
+        '''
+        if 'criterion' in kwargs:
+            self.criterion = kwargs['criterion']
+        else:
+            self.criterion = EXPECTED_IMPROVEMENT
+
+        if self.criterion not in [EXPECTED_IMPROVEMENT, LOWER_CONFIDENCE_BOUND]:
+            raise ValueError(f'unknown infill criterion: {self.criterion}')
+
+        if 'kappa' in kwargs:
+            self.kappa = kwargs['kappa']
+        else:
+            self.kappa = LCB_KAPPA
+
+        if 'believer' in kwargs:
+            self.believer = kwargs['believer']
+        else:
+            self.believer = True
+
+    def select(self, surrogates, candidates, points):
+        '''
+        :param surrogates: Trained KrigingModel objects of all stations (or one multi-output model)
+        :param candidates: Array of (candidates, 3) with drf, cfw, stpm
+        :param points: Amount of points to choose
+        :return: List of indices of chosen candidates
+        '''
+        if not supports_infill(surrogates):
+            raise ValueError(f'infill requires surrogates with the variance of predictions, '
+                             f'{surrogates[0].backend} backend does not estimate it')
+
+        candidates = np.asarray(candidates, dtype=float)
+
+        # repeated and already trained points give nothing new
+        trained = {tuple(feature) for feature in surrogates[0].features}
+        available = [idx for idx in _unique_indices(candidates) if tuple(candidates[idx]) not in trained]
+
+        models = [surrogate.krig for surrogate in surrogates]
+        best = np.min(np.mean(np.column_stack([surrogate.target for surrogate in surrogates]), axis=1))
+
+        chosen = []
+        while available and len(chosen) < points:
+            mean, variance = _objective(models, candidates[available])
+            scores = self.scores(mean, variance, best)
+
+            if not self.believer:
+                order = np.argsort(-scores)[:points]
+                return [available[idx] for idx in order]
+
+            idx = available.pop(int(np.argmax(scores)))
+            chosen.append(idx)
+
+            if available and len(chosen) < points:
+                models = _believed(models, candidates[idx])
+
+        return chosen
+
+    def scores(self, mean, variance, best):
+        '''
+        :return: Values of the criterion for predicted objectives, the greater the better
+        '''
+        std = np.sqrt(variance)
+
+        if self.criterion == LOWER_CONFIDENCE_BOUND:
+            return -(mean - self.kappa * std)
+
+        return expected_improvement(mean, std, best)
+
+
+def supports_infill(surrogates):
+    '''
+    :return: True if all surrogates (KrigingModel objects) estimate the variance of predictions
+    '''
+    return all(surrogate.estimates_variance() for surrogate in surrogates)
+
+
+def expected_improvement(mean, std, best):
+    '''
+    Expected improvement of minimization over the best found value
+    :param mean: Array of predicted values
+    :param std: Array of standard deviations of the predictions
+    '''
+    improvement = best - mean
+    safe_std = np.where(std > 0, std, 1.0)
+    z = improvement / safe_std
+
+    return np.where(std > 0, improvement * norm.cdf(z) + std * norm.pdf(z), np.clip(improvement, 0, None))
+
+
+def _objective(models, features):
+    '''
+    :return: Tuple (mean error by stations, its variance) for the features
+    '''
+    means = [np.asarray(model.predict(features)).reshape((len(features), -1)) for model in models]
+    variances = [np.asarray(model.predict_var(features)).reshape((len(features), -1)) for model in models]
+
+    means, variances = np.hstack(means), np.hstack(variances)
+    stations = means.shape[1]
+
+    return np.mean(means, axis=1), np.sum(variances, axis=1) / stations ** 2
+
+
+def _believed(models, feature):
+    '''
+    Copies of models extended with their own prediction at the feature (models without add_points stay the same)
+    '''
+    believed = []
+    for model in models:
+        if hasattr(model, 'add_points'):
+            model = copy.deepcopy(model)
+            model.add_points(feature[None, :], model.predict(feature[None, :]))
+        believed.append(model)
+
+    return believed
+
+
+def _unique_indices(features):
+    _, indices = np.unique(features, axis=0, return_index=True)
+
+    return sorted(indices)
@@ -1,17 +1,66 @@
 from datetime import datetime
 
 import numpy as np
-from pyDOE import lhs
-from pyKriging.krige import kriging
-from scipy.stats.distributions import norm
 
-from src.basic_evolution.swan import SWANParams
+from src.surrogate.backends import (
+    GP_BACKEND,
+    SPARSE_GP_BACKEND,
+    SURROGATE_BACKENDS,
+    estimates_variance,
+    is_incremental,
+    is_multi_output,
+    is_shippable,
+    new_surrogate
+)
+from src.surrogate.cokriging import CoKriging
+from src.surrogate.sparse_gp import INDUCING_POINTS
+from src.surrogate.target_store import TargetStore
+from src.surrogate.training_set import (
+    DUPLICATE_TOLERANCE,
+    TrainingSet
+)
+from src.utils.design import (
+    LHS_DESIGN,
+    extend_design,
+    params_design,
+    params_from_unit,
+    unit_from_params
+)
 
 DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
 
+COKRIGING_BACKEND = 'cokriging'
+
+REOPTIMISE_EVERY = 5
+
+# seed of the initial design by default, so the design of the same size is computed once
+DESIGN_SEED = 42
+
+# amount of last retrainings with new points to estimate the error of predictions
+INFILL_WINDOW = 3
+
 
 class KrigingModel:
-    def __init__(self, grid_file, fake_model, station_idx, points_to_train, initial_fidelity):
+    def __init__(self, grid_file, fake_model, station_idx, points_to_train, initial_fidelity, **kwargs):
+        '''
+        :param station_idx: Index of a station to predict, tuple of indices - one multi-output model for these stations,
+        None - one multi-output model for all stations (backends with multi-output support only)
+        :param backend: Name of the surrogate from SURROGATE_BACKENDS (GP_BACKEND - native kriging by default)
+        or COKRIGING_BACKEND (kriging over all trained fidelity levels)
+        :param inducing: Max amount of inducing points of SPARSE_GP_BACKEND
+        :param fidelity_cost: Function of fidelity that orders levels of COKRIGING_BACKEND,
+        e.g. SWANPerfModel.get_execution_time
+        :param target_store: TargetStore shared with surrogates of other stations, by default - own one
+        :param surrogate_store: SurrogateStore to restore trained models from and to warm-start the optimizer,
+        by default - models are not saved
+        :param reoptimise_every: Incremental backends are trained from scratch on every n-th retraining
+        with new points, other retrainings only extend the factorization of the model
+        :param duplicate_tolerance: Max difference of duplicated training points relative to ranges of the grid
+        :param max_points: Max size of the training set, by default - not bounded (see TrainingSet)
+        :param design: Kind of the initial design from src.utils.design (centered LHS by default)
+        :param design_seed: Seed of the initial design, the design with a seed is computed once,
+        by default - DESIGN_SEED, None - new design for every training
+        '''
         self.grid = grid_file
         self.model = fake_model
         self.station = station_idx
@@ -20,86 +69,340 @@ class KrigingModel:
 
         self.fidelity = initial_fidelity
 
-        # self.features = self.features_from_lhs()
-        self.features = None
-
         self.krig = None
 
-    def features_from_lhs(self):
-        dim_num = 3
-        samples_grid = lhs(dim_num, self.points_to_train, 'center')
+        if 'backend' in kwargs:
+            self.backend = kwargs['backend']
+        else:
+            self.backend = GP_BACKEND
+
+        if self.backend not in list(SURROGATE_BACKENDS) + [COKRIGING_BACKEND]:
+            raise ValueError(f'unknown surrogate backend: {self.backend}')
+
+        if not isinstance(self.station, int) and not self.is_multi_output():
+            raise ValueError(f'{self.backend} backend supports one station only')
+
+        if 'inducing' in kwargs:
+            self.inducing = kwargs['inducing']
+        else:
+            self.inducing = INDUCING_POINTS
+
+        if 'fidelity_cost' in kwargs:
+            self.fidelity_cost = kwargs['fidelity_cost']
+        elif self.backend == COKRIGING_BACKEND:
+            raise ValueError(f'{self.backend} backend requires fidelity_cost')
+        else:
+            self.fidelity_cost = None
+
+        # training data of previous fidelity levels for COKRIGING_BACKEND
+        self.levels = {}
+
+        if 'reoptimise_every' in kwargs:
+            self.reoptimise_every = kwargs['reoptimise_every']
+        else:
+            self.reoptimise_every = REOPTIMISE_EVERY
+
+        if 'target_store' in kwargs:
+            self.target_store = kwargs['target_store']
+        else:
+            self.target_store = TargetStore(fake_model)
+
+        if 'surrogate_store' in kwargs:
+            self.surrogate_store = kwargs['surrogate_store']
+        else:
+            self.surrogate_store = None
+
+        if 'duplicate_tolerance' in kwargs:
+            duplicate_tolerance = kwargs['duplicate_tolerance']
+        else:
+            duplicate_tolerance = DUPLICATE_TOLERANCE
+
+        if 'max_points' in kwargs:
+            max_points = kwargs['max_points']
+        else:
+            max_points = None
+
+        if 'design' in kwargs:
+            self.design = kwargs['design']
+        else:
+            self.design = LHS_DESIGN
+
+        if 'design_seed' in kwargs:
+            self.design_seed = kwargs['design_seed']
+        else:
+            self.design_seed = DESIGN_SEED
+
+        scale = [np.ptp(params_range) for params_range in self._params_ranges()]
+        self.training_set = TrainingSet(scale=scale, tolerance=duplicate_tolerance, max_size=max_points)
+
+        self.updates_since_fit = 0
+        self.pending_fit = False
+        # the next fit optimizes hyperparameters of the grown training set again
+        self.reoptimising = False
+
+        # differences between true targets and predictions at new points before the model got them
+        self.infill_residuals = []
+        # features with residuals observed without retraining, they are not counted again by the retraining
+        self._observed_infill = set()
+
+    @property
+    def features(self):
+        return self.training_set.features
+
+    @property
+    def target(self):
+        return self.training_set.target
 
-        for idx, params_range in enumerate([self.grid.drf_grid, self.grid.cfw_grid, self.grid.stpm_grid]):
-            samples_grid[:, idx] = norm(loc=np.mean(params_range), scale=np.std(params_range)).ppf(samples_grid[:, idx])
+    def features_from_lhs(self):
+        '''
+        :return: Array of (points_to_train, 3) with drf, cfw, stpm of the space-filling design
+        '''
+        return params_design(self.points_to_train, self._params_ranges(), kind=self.design, seed=self.design_seed)
 
-        features = [[drf, cfw, stpm] for drf, cfw, stpm in samples_grid]
+    def features_extending(self, features, points):
+        '''
+        :return: Array of (points, 3) with drf, cfw, stpm that fill the space between features
+        '''
+        ranges = self._params_ranges()
+        unit = extend_design(unit_from_params(features, ranges), points, seed=self.design_seed)
 
-        return np.asarray(features)
+        return params_from_unit(unit, ranges)
 
-    def train_with_mixed_points(self, fidelity, external_points=[]):
+    def train_with_mixed_points(self, fidelity, external_points=[], fit=True):
         self.fidelity = fidelity
-        features_from_lhs = self.features_from_lhs().tolist()
 
         # Take all points as new features for train
-        features_total = []
-        for point in external_points:
-            features_total.append([point.drf, point.cfw, point.stpm])
+        external_features = np.asarray([[point.drf, point.cfw, point.stpm] for point in external_points])
+        self.training_set.reset(external_features.reshape((-1, 3)))
 
-        # Extend features with points from lhs
-        lhs_features_idx = 0
-        while len(features_total) < self.points_to_train:
-            drf, cfw, stpm = features_from_lhs[lhs_features_idx]
-            features_total.append([drf, cfw, stpm])
-            lhs_features_idx += 1
+        # Extend unique features with space-filling points
+        lhs_points = max(0, self.points_to_train - len(self.training_set))
+        if lhs_points > 0:
+            if len(self.training_set) == 0:
+                new_features = self.features_from_lhs()
+            else:
+                new_features = self.features_extending(self.features, lhs_points)
+            self.training_set.reset(np.vstack([self.features, new_features]))
 
-        self.points_to_train = len(features_total)
-        self.features = np.asarray(features_total)
+        self.points_to_train = len(self.training_set)
 
         print(
-            f'train with mixed points: external points: {len(external_points)}, from lhs: {lhs_features_idx};'
-            f' with fidelity: {self.fidelity}')
-
-        self.train()
+            f'train with mixed points: external points: {len(external_points)}, from lhs: {lhs_points},'
+            f' unique: {len(self.training_set)}; with fidelity: {self.fidelity}')
+
+        self.train(fit=fit)
+
+    def retrain_with_new_points(self, new_points, fit=True):
+        new_features = np.asarray([[point.drf, point.cfw, point.stpm] for point in new_points])
+
+        # targets of duplicates are not evaluated at all
+        new_features = new_features[self.training_set.new_indices(new_features)]
+        if len(new_features) == 0:
+            print(f'all {len(new_points)} features are already in the training set')
+            return
+
+        new_target = self._target(new_features)
+        unobserved = [tuple(feature) not in self._observed_infill for feature in new_features]
+        if any(unobserved):
+            self.infill_residuals.append(new_target[unobserved] - self.krig.predict(new_features[unobserved]))
+
+        evicted = self.training_set.add(new_features, new_target)
+        self.points_to_train = len(self.training_set)
+        self.levels[self.fidelity] = (self.features, self.target)
+        self.updates_since_fit += 1
+
+        # evicted points can't be removed from the factorization
+        if not self.is_incremental() or evicted or self.updates_since_fit >= self.reoptimise_every:
+            print(f'retrain with new {len(new_features)} features')
+            self.reoptimising = True
+            self._fit_or_defer(fit)
+        else:
+            print(f'update with new {len(new_features)} features, targets: {new_target}')
+            self.krig.add_points(new_features, new_target)
+
+    def train(self, mode='lhs', fit=True, **kwargs):
+        '''
+        :param fit: If False, only targets are computed and the model waits for ParallelTrainer
+        '''
+        if mode == 'lhs':
+            self.training_set.target = self._target(self.features)
+
+        # errors of the previous training set (e.g. of other fidelity) say nothing about the new one
+        self.infill_residuals = []
+        self._observed_infill = set()
+
+        self.reoptimising = False
+        self._fit_or_defer(fit)
+
+    def observe_infill(self, points):
+        '''
+        Evaluate points (e.g. the best individual at a new minimum) without adding them to the training set,
+        so infill_error follows the model between retrainings. Targets are kept by the target store
+        for the next retraining, points of the training set and already observed ones are skipped
+        '''
+        if self.krig is None:
+            return
+
+        features = np.asarray([[point.drf, point.cfw, point.stpm] for point in points]).reshape((-1, 3))
+        features = features[self.training_set.new_indices(features)]
+        features = features[[tuple(feature) not in self._observed_infill for feature in features]]
+        if len(features) == 0:
+            return
+
+        self.infill_residuals.append(self._target(features) - self.krig.predict(features))
+        self._observed_infill.update(tuple(feature) for feature in features)
+
+    def loo_error(self):
+        '''
+        :return: RMSE of closed-form leave-one-out residuals or None if the backend has no closed form
+        '''
+        if not hasattr(self.krig, 'loo_residuals'):
+            return None
+
+        try:
+            residuals = self.krig.loo_residuals()
+        except NotImplementedError:
+            return None
+
+        return float(np.sqrt(np.mean(residuals ** 2)))
+
+    def infill_error(self, window=INFILL_WINDOW):
+        '''
+        :return: RMSE of predictions at points of last retrainings before the model got them,
+        None if there were no retrainings with new points
+        '''
+        if not self.infill_residuals:
+            return None
+
+        residuals = np.concatenate([np.ravel(batch) for batch in self.infill_residuals[-window:]])
+
+        return float(np.sqrt(np.mean(residuals ** 2)))
+
+    def is_shippable(self):
+        '''
+        :return: True if hyperparameters can be found in other process by (features, target) only
+        '''
+        return self.backend != COKRIGING_BACKEND and is_shippable(self.backend)
+
+    def is_incremental(self):
+        return self.backend == COKRIGING_BACKEND or is_incremental(self.backend)
+
+    def is_multi_output(self):
+        return is_multi_output_backend(self.backend)
+
+    def estimates_variance(self):
+        return self.backend == COKRIGING_BACKEND or estimates_variance(self.backend)
+
+    def new_surrogate(self):
+        '''
+        :return: Untrained surrogate of the backend from SURROGATE_BACKENDS,
+        hyperparameters of the nearest saved model are the starting point of its optimizer
+        '''
+        params = self.backend_settings()
+
+        if self.surrogate_store is not None:
+            theta = self.surrogate_store.hyperparameters(self.fidelity, self.station, self.backend,
+                                                         settings=self.backend_settings())
+            if theta is not None:
+                params['initial_theta'] = theta
+
+        return new_surrogate(self.backend, **params)
+
+    def backend_settings(self):
+        '''
+        :return: Dict with params the surrogate of the backend is created with, saved models with
+        other settings are not restored
+        '''
+        if self.backend == SPARSE_GP_BACKEND:
+            return {'inducing': self.inducing}
+
+        return {}
+
+    def restore(self):
+        '''
+        Take the model trained on the current training data (or on a subset of it) from surrogate_store,
+        a model for re-optimisation is taken only if it was trained on the same data
+        :return: True if the model is restored
+        '''
+        if self.surrogate_store is None or self.backend == COKRIGING_BACKEND:
+            return False
+
+        krig = self.surrogate_store.restored(self.features, self.target, self.fidelity, self.station, self.backend,
+                                             settings=self.backend_settings(), extend=not self.reoptimising)
+        if krig is None:
+            return False
+
+        self._set_trained(krig)
+        print(f'restored kriging model with {self.points_to_train} points for station: {self.station}')
+
+        return True
+
+    def fit(self, theta=None):
+        '''
+        :param theta: Hyperparameters found by ParallelTrainer, if None - the model is restored from surrogate_store
+        or they are searched here
+        '''
+        if theta is None and self.restore():
+            return
 
-    def retrain_with_new_points(self, new_points):
-        extended_features = self.features.tolist()
-        for point in new_points:
-            extended_features.append([point.drf, point.cfw, point.stpm])
-            params = SWANParams(drf=point.drf, cfw=point.cfw, stpm=point.stpm,
-                                fidelity_time=self.fidelity[0], fidelity_space=self.fidelity[1])
-            print(self.fake_model.output_from_model(params=params)[0])
+        start_time = datetime.now().strftime(DATE_FORMAT)
+        print(f'{start_time}: starting to train kriging model '
+              f'with {self.points_to_train} points for station: {self.station}')
 
-        self.points_to_train += len(new_points)
+        if self.backend == COKRIGING_BACKEND:
+            self.levels[self.fidelity] = (self.features, self.target)
+            krig = CoKriging().fit(self._cokriging_levels())
+        elif theta is None:
+            krig = self.new_surrogate().fit(self.features, self.target)
+        else:
+            krig = self.new_surrogate().fit_with_theta(self.features, self.target, theta)
+        self._set_trained(krig)
 
-        print(f'retrain with new {len(new_points)} features')
+        if self.surrogate_store is not None and self.backend != COKRIGING_BACKEND:
+            self.surrogate_store.save(krig, self.features, self.target, self.fidelity, self.station, self.backend,
+                                      settings=self.backend_settings())
 
-        self.features = np.asarray(extended_features)
-        self.train()
+        end_time = datetime.now().strftime(DATE_FORMAT)
+        print(f'{end_time}: finished to train kriging model with'
+              f' {self.points_to_train} points for station: {self.station}')
 
-    def train(self, mode='lhs', **kwargs):
-        target = []
+    def _cokriging_levels(self):
+        '''
+        :return: Training data of levels not more expensive than the current fidelity, from the cheapest one
+        '''
+        current_cost = self.fidelity_cost(self.fidelity)
+        fidelities = [fidelity for fidelity in self.levels if self.fidelity_cost(fidelity) <= current_cost]
 
-        if mode is 'lhs':
-            for feature in self.features:
-                params = SWANParams(drf=feature[0], cfw=feature[1], stpm=feature[2],
-                                    fidelity_time=self.fidelity[0], fidelity_space=self.fidelity[1])
-                target.append(self.fake_model.output_from_model(params=params)[self.station])
+        fidelities = sorted(fidelities, key=lambda fidelity: (self.fidelity_cost(fidelity), fidelity == self.fidelity))
+        print(f'co-kriging levels: {fidelities}')
 
-        target = np.asarray(target)
+        return [self.levels[fidelity] for fidelity in fidelities]
 
-        start_time = datetime.now().strftime(DATE_FORMAT)
-        print(f'{start_time}: starting to train kriging model '
-              f'with {self.points_to_train} points for station: {self.station}')
+    def _params_ranges(self):
+        return [self.grid.drf_grid, self.grid.cfw_grid, self.grid.stpm_grid]
 
-        krig = kriging(self.features, target, name='multikrieg')
-        krig.train(optimizer='ga')
+    def _set_trained(self, krig):
         self.krig = krig
+        self.updates_since_fit = 0
+        self.pending_fit = False
+        # the next fit optimizes hyperparameters of the grown training set again
+        self.reoptimising = False
 
-        end_time = datetime.now().strftime(DATE_FORMAT)
-        print(f'{end_time}: finished to train kriging model with'
-              f' {self.points_to_train} points for station: {self.station}')
+    def _fit_or_defer(self, fit):
+        if fit:
+            self.fit()
+        else:
+            self.pending_fit = True
+
+    def _target(self, features):
+        outputs = self.target_store.targets(features, self.fidelity)
+
+        if self.station is None:
+            return outputs
+
+        return outputs[:, list(self.station)] if isinstance(self.station, tuple) else outputs[:, self.station]
 
-    def retrain_full(self, points, fidelity):
+    def retrain_full(self, points, fidelity, fit=True):
         self.fidelity = fidelity
 
         features = []
@@ -107,11 +410,34 @@ class KrigingModel:
             features.append([point.drf, point.cfw, point.stpm])
 
         print(f'retrain full with {len(points)} points with fidelity: {self.fidelity}')
-        self.features = np.asarray(features)
-        self.points_to_train = len(features)
-        self.train()
+        self.training_set.reset(features)
+        self.points_to_train = len(self.training_set)
+        self.train(fit=fit)
 
     def prediction(self, params):
         assert self.krig is not None
 
         return self.krig.predict(params)
+
+    def prediction_batch(self, features, with_variance=False):
+        '''
+        :param features: Array of (points, 3) with drf, cfw, stpm
+        :param with_variance: If True, the variance of the predictions is returned too (if the backend estimates it)
+        :return: Array of predictions (points for one station, (points, stations) for multi-output model)
+        or tuple (predictions, variances)
+        '''
+        assert self.krig is not None
+
+        features = np.asarray(features, dtype=float)
+
+        if with_variance:
+            return self.krig.predict(features), self.krig.predict_var(features)
+
+        return self.krig.predict(features)
+
+
+def is_multi_output_backend(backend):
+    '''
+    :return: True if one surrogate of the backend can predict all stations
+    '''
+    return backend == COKRIGING_BACKEND or is_multi_output(backend)
@@ -0,0 +1,180 @@
+import numpy as np
+from scipy.cluster.vq import kmeans2
+from scipy.linalg import (
+    cho_solve,
+    cholesky,
+    solve_triangular
+)
+
+from src.surrogate.gp import (
+    GaussianProcess,
+    multi_start_minimum
+)
+
+INDUCING_POINTS = 100
+
+VARIANCE_BOUNDS = (1e-4, 10.0)
+NOISE_BOUNDS = (1e-8, 1e-1)
+
+JITTER = 1e-8
+
+
+class SparseGaussianProcess(GaussianProcess):
+    def __init__(self, **kwargs):
+        '''
+        Variational sparse approximation of kriging (VFE, Titsias 2009) on inducing points found by k-means.
+        Training costs O(n m^2) for n points and m inducing points, the trained model keeps only (m x m) statistics
+        of the data, so its memory does not grow with the training set.
+        Correlation parameters, the process variance and the noise variance are shared by all outputs,
+        the likelihood gradient is estimated by finite differences
+        :param inducing: Max amount of inducing points
+        :param restarts, theta_bounds, seed, initial_theta: See GaussianProcess
+        '''
+        super().__init__(**kwargs)
+
+        if 'inducing' in kwargs:
+            self.inducing = kwargs['inducing']
+        else:
+            self.inducing = INDUCING_POINTS
+
+        self.variance = None
+        self.noise = None
+
+    def fit(self, features, target):
+        return self.fit_with_theta(features, target, self.optimize(features, target))
+
+    def optimize(self, features, target):
+        '''
+        :return: Tuple (inducing points, correlation parameters, process variance, noise variance)
+        to pass into fit_with_theta
+        '''
+        self._normalize(features, target)
+        self._inducing_x = self._kmeans_inducing()
+
+        bounds = [tuple(np.log(self.theta_bounds))] * self._x.shape[1] + [tuple(np.log(VARIANCE_BOUNDS)),
+                                                                          tuple(np.log(NOISE_BOUNDS))]
+        initial = None
+        if self.initial_theta is not None:
+            _, theta, variance, noise = self.initial_theta
+            initial = np.log(np.concatenate([theta, [variance, noise]]))
+
+        log_params = multi_start_minimum(self.neg_log_likelihood, bounds, self.restarts, self.seed, jac=False,
+                                         initial=initial)
+
+        return (self._inducing_x,) + self._unpacked(log_params)
+
+    def fit_with_theta(self, features, target, theta):
+        '''
+        :param theta: Hyperparameters returned by optimize
+        '''
+        self._normalize(features, target)
+        self._inducing_x, self.theta, self.variance, self.noise = theta
+
+        self._chol_mm, cross = self._projected(self._x)
+        self._mu = np.mean(self._y, axis=0)
+        self._stats = np.eye(len(self._inducing_x)) + cross.dot(cross.T)
+        self._proj_y = cross.dot(self._y - self._mu) / np.sqrt(self.noise)
+
+        self._update_weights()
+        # statistics above are enough for predictions and updates
+        self._x, self._y = None, None
+
+        return self
+
+    def hyperparameters(self):
+        return self._inducing_x, self.theta, self.variance, self.noise
+
+    def loo_residuals(self):
+        raise NotImplementedError('sparse model does not keep the training data')
+
+    def add_points(self, features, target):
+        '''
+        Accumulate new points into (m x m) statistics in O(k m^2) for k new points,
+        hyperparameters, inducing points and normalization stay fixed
+        '''
+        assert self.theta is not None
+
+        new_x = self._norm_x(np.atleast_2d(np.asarray(features, dtype=float)))
+        new_y = (np.asarray(target, dtype=float).reshape((len(new_x), -1)) - self._y_min) / self._y_range
+
+        _, cross = self._projected(new_x)
+        self._stats += cross.dot(cross.T)
+        self._proj_y += cross.dot(new_y - self._mu) / np.sqrt(self.noise)
+        self._points += len(new_x)
+
+        self._update_weights()
+
+        return self
+
+    def neg_log_likelihood(self, log_params):
+        '''
+        Negative collapsed variational bound of the log-likelihood of the normalized data
+        :param log_params: Natural logarithms of correlation parameters, process variance and noise variance
+        '''
+        self.theta, self.variance, self.noise = self._unpacked(log_params)
+
+        try:
+            _, cross = self._projected(self._x)
+            chol_stats = cholesky(np.eye(len(self._inducing_x)) + cross.dot(cross.T), lower=True)
+        except np.linalg.LinAlgError:
+            return np.inf
+
+        residuals = self._y - np.mean(self._y, axis=0)
+        proj = solve_triangular(chol_stats, cross.dot(residuals), lower=True) / np.sqrt(self.noise)
+
+        outputs = residuals.shape[1]
+        log_det = 2.0 * np.sum(np.log(np.diag(chol_stats))) + self._points * np.log(self.noise)
+        quad = np.sum(residuals ** 2) / self.noise - np.sum(proj ** 2)
+        trace = (self._points * self.variance - self.noise * np.sum(cross ** 2)) / self.noise
+
+        return 0.5 * (outputs * (self._points * np.log(2 * np.pi) + log_det + trace) + quad)
+
+    def _kmeans_inducing(self):
+        if self._points <= self.inducing:
+            return self._x.copy()
+
+        centroids, _ = kmeans2(self._x, self.inducing, seed=self.seed, minit='++')
+
+        return centroids
+
+    def _unpacked(self, log_params):
+        params = np.exp(log_params)
+
+        return params[:-2], params[-2], params[-1]
+
+    def _projected(self, features):
+        '''
+        :return: Tuple (Cholesky factor of inducing covariance L, L^-1 K(inducing, features) / noise std)
+        '''
+        cov_mm = self.variance * self._correlation(self._inducing_x, self._inducing_x)
+        chol_mm = cholesky(cov_mm + JITTER * self.variance * np.eye(len(self._inducing_x)), lower=True)
+
+        cov_mn = self.variance * self._correlation(self._inducing_x, features)
+        cross = solve_triangular(chol_mm, cov_mn, lower=True) / np.sqrt(self.noise)
+
+        return chol_mm, cross
+
+    def _update_weights(self):
+        self._chol_stats = (cholesky(self._stats, lower=True), True)
+        self._weights = cho_solve(self._chol_stats, self._proj_y)
+
+    def _predicted(self, features, with_variance):
+        assert self.theta is not None
+
+        features = np.asarray(features, dtype=float)
+        is_point = features.ndim == 1
+        features = np.atleast_2d(features)
+
+        cov_ms = self.variance * self._correlation(self._inducing_x, self._norm_x(features))
+        proj = solve_triangular(self._chol_mm, cov_ms, lower=True)
+
+        mean = self._mu + proj.T.dot(self._weights)
+        mean = mean * self._y_range + self._y_min
+
+        variance = None
+        if with_variance:
+            proj_stats = solve_triangular(self._chol_stats[0], proj, lower=True)
+            factor = self.variance - np.sum(proj ** 2, axis=0) + np.sum(proj_stats ** 2, axis=0)
+            variance = np.clip(factor, 0.0, None)[:, None] * self._y_range ** 2
+
+        return self._shaped(mean, is_point), None if variance is None else self._shaped(variance, is_point)
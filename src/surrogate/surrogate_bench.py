@@ -0,0 +1,100 @@
+import time
+
+import numpy as np
+
+from src.basic_evolution.errors import error_rmse_all
+from src.basic_evolution.model import (
+    CSVGridFile,
+    FidelityFakeModel
+)
+from src.basic_evolution.swan import SWANParams
+from src.surrogate.backends import (
+    SURROGATE_BACKENDS,
+    is_multi_output,
+    new_surrogate
+)
+from src.utils.observation_store import wave_watch_observations
+
+SAMPLE_SIZES = [10, 25, 50, 100, 250, 500, 1000]
+
+
+def grid_samples(model, points, fidelity, seed):
+    '''
+    Uniform samples of (drf, cfw, stpm) within the grid and errors of the fake model for them
+    :return: Tuple (features, target) with target as (points, stations) array
+    '''
+    random = np.random.RandomState(seed)
+    ranges = [model.grid_file.drf_grid, model.grid_file.cfw_grid, model.grid_file.stpm_grid]
+    features = np.column_stack([random.uniform(min(grid), max(grid), points) for grid in ranges])
+
+    params = [SWANParams(drf=drf, cfw=cfw, stpm=stpm, fidelity_time=fidelity[0], fidelity_space=fidelity[1])
+              for drf, cfw, stpm in features]
+
+    return features, model.output_from_model_batch(params=params)
+
+
+def evaluate(backend, features, target, test_features, test_target):
+    '''
+    :return: Tuple (train time in seconds, batch prediction throughput in points per second, hold-out RMSE)
+    '''
+    start = time.perf_counter()
+    surrogate = new_surrogate(backend).fit(features, target)
+    train_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    predicted = surrogate.predict(test_features)
+    throughput = len(test_features) / (time.perf_counter() - start)
+
+    rmse = np.sqrt(np.mean((np.reshape(predicted, test_target.shape) - test_target) ** 2))
+
+    return train_time, throughput, rmse
+
+
+def run_benchmark(model, backends=None, sizes=SAMPLE_SIZES, test_points=1000, fidelity=None):
+    '''
+    Compare surrogate backends on the error grid of the model, all stations are predicted by one surrogate
+    if the backend supports it and by one surrogate per station otherwise
+    :param model: FidelityFakeModel
+    :param backends: Names of backends, by default - all of SURROGATE_BACKENDS
+    :param sizes: Amounts of training points
+    :param fidelity: Tuple of (fid_time, fid_space), by default - the cheapest one
+    '''
+    backends = list(SURROGATE_BACKENDS) if backends is None else backends
+    fidelity = (max(model._fid_time_grid), max(model._fid_space_grid)) if fidelity is None else fidelity
+
+    test_features, test_target = grid_samples(model, test_points, fidelity, seed=0)
+
+    for points in sizes:
+        features, target = grid_samples(model, points, fidelity, seed=points)
+        for backend in backends:
+            try:
+                if is_multi_output(backend):
+                    train_time, throughput, rmse = evaluate(backend, features, target, test_features, test_target)
+                else:
+                    train_time, throughput, rmse = _per_station(backend, features, target, test_features,
+                                                                test_target)
+            except Exception as err:
+                print(f'{backend}: {points} points: failed with {err!r}')
+                continue
+            print(f'{backend}: {points} points: train {train_time:.2f}s, '
+                  f'predict {throughput:.0f} points/s, hold-out rmse {rmse:.5f}')
+
+
+def _per_station(backend, features, target, test_features, test_target):
+    results = [evaluate(backend, features, target[:, station], test_features, test_target[:, station])
+               for station in range(target.shape[1])]
+    train_times, throughputs, rmses = zip(*results)
+
+    return sum(train_times), 1.0 / sum(1.0 / throughput for throughput in throughputs), \
+        np.sqrt(np.mean(np.square(rmses)))
+
+
+if __name__ == '__main__':
+    grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
+    stations = [1, 2, 3]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=stations)
+
+    fake = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=stations, error=error_rmse_all,
+                             forecasts_path='../../../2fidelity/*')
+
+    run_benchmark(fake)
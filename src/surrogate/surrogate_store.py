@@ -0,0 +1,175 @@
+import hashlib
+import os
+import pickle
+from collections import Counter
+
+import numpy as np
+
+SURROGATES_PATH = '../../surrogates'
+INDEX_FILE = 'index.pik'
+
+
+class SurrogateStore:
+    def __init__(self, path=SURROGATES_PATH):
+        '''
+        Trained surrogates saved on disk by the hash of (features, target, fidelity, station, backend, settings),
+        so repeated runs over the same configuration don't train them again.
+        Settings are params of the backend (e.g. inducing of SPARSE_GP_BACKEND), models with other settings
+        are neither restored nor extended.
+        The index keeps keys and hyperparameters of models, their training data is saved next to them:
+        a model of a subset of new training data is extended by add_points,
+        hyperparameters of the nearest model are the starting point of the optimizer otherwise
+        :param path: Path to directory with saved surrogates
+        '''
+        self.path = path
+        os.makedirs(self.path, exist_ok=True)
+
+        index_path = os.path.join(self.path, INDEX_FILE)
+        if os.path.isfile(index_path):
+            with open(index_path, 'rb') as f:
+                self._index = pickle.load(f)
+        else:
+            self._index = {}
+
+        self.hits = 0
+        self.extended = 0
+        self.misses = 0
+
+    def restored(self, features, target, fidelity, station, backend, settings=None, extend=True):
+        '''
+        :param settings: Dict with params of the backend the model is created with
+        :param extend: If False, only the model trained on the same data is restored
+        (e.g. hyperparameters have to be optimized again for the new data)
+        :return: Saved surrogate trained on the same data or extended from a model of a subset of the data,
+        None if there are no such models
+        '''
+        key = surrogate_key(features, target, fidelity, station, backend, settings)
+        if key in self._index:
+            self.hits += 1
+            return self._load(key)
+
+        entry, saved_rows = None, None
+        if extend:
+            rows = _rows(features, target)
+            # training data of models is loaded for candidates that can be subsets only
+            candidates = sorted([entry for entry in self._similar(fidelity, station, backend, settings)
+                                 if entry['extendable'] and entry['points'] <= len(rows)],
+                                key=lambda item: item['points'], reverse=True)
+            for candidate in candidates:
+                candidate_rows = _rows(*self._load_data(candidate['key']))
+                if not Counter(candidate_rows) - Counter(rows):
+                    entry, saved_rows = candidate, candidate_rows
+                    break
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        new_idx = _missing_rows(rows, saved_rows)
+
+        surrogate = self._load(entry['key'])
+        if new_idx:
+            surrogate.add_points(np.asarray(features)[new_idx], np.asarray(target)[new_idx])
+        self.save(surrogate, features, target, fidelity, station, backend, settings)
+        self.extended += 1
+        print(f'surrogate for station {station} extended from {entry["points"]} saved points')
+
+        return surrogate
+
+    def hyperparameters(self, fidelity, station, backend, settings=None):
+        '''
+        :return: Hyperparameters of the nearest saved model (the same fidelity first, then the largest one)
+        of the same station, backend and settings, None if there are no such models
+        '''
+        entries = [entry for entry in self._index.values()
+                   if entry['station'] == station and entry['backend'] == backend and entry['theta'] is not None
+                   and entry.get('settings', ()) == _settings(settings)]
+        if not entries:
+            return None
+
+        nearest = max(entries, key=lambda entry: (entry['fidelity'] == tuple(fidelity), entry['points']))
+
+        return nearest['theta']
+
+    def save(self, surrogate, features, target, fidelity, station, backend, settings=None):
+        key = surrogate_key(features, target, fidelity, station, backend, settings)
+
+        with open(self._model_path(key), 'wb') as f:
+            pickle.dump(surrogate, f)
+        np.savez(self._data_path(key), features=np.asarray(features, dtype=float),
+                 target=np.asarray(target, dtype=float))
+
+        theta = surrogate.hyperparameters() if hasattr(surrogate, 'hyperparameters') else None
+        self._index[key] = {
+            'key': key, 'fidelity': tuple(fidelity), 'station': station, 'backend': backend,
+            'settings': _settings(settings), 'points': len(features), 'theta': theta,
+            'extendable': hasattr(surrogate, 'add_points')
+        }
+
+        with open(os.path.join(self.path, INDEX_FILE), 'wb') as f:
+            pickle.dump(self._index, f)
+
+    def __len__(self):
+        return len(self._index)
+
+    def _similar(self, fidelity, station, backend, settings):
+        return [entry for entry in self._index.values()
+                if entry['fidelity'] == tuple(fidelity) and entry['station'] == station and entry['backend'] == backend
+                and entry.get('settings', ()) == _settings(settings)]
+
+    def _load(self, key):
+        with open(self._model_path(key), 'rb') as f:
+            return pickle.load(f)
+
+    def _load_data(self, key):
+        with np.load(self._data_path(key)) as data:
+            return data['features'], data['target']
+
+    def _model_path(self, key):
+        return os.path.join(self.path, f'surrogate-{key}.pik')
+
+    def _data_path(self, key):
+        return os.path.join(self.path, f'surrogate-{key}.npz')
+
+
+def surrogate_key(features, target, fidelity, station, backend, settings=None):
+    digest = hashlib.sha1()
+    digest.update(np.ascontiguousarray(features, dtype=float).tobytes())
+    digest.update(np.ascontiguousarray(target, dtype=float).tobytes())
+    digest.update(repr((tuple(fidelity), station, backend)).encode())
+    # keys of models without settings are the same as before settings were added
+    if settings:
+        digest.update(repr(_settings(settings)).encode())
+
+    return digest.hexdigest()
+
+
+def _settings(settings):
+    '''
+    :return: Hashable sorted tuple of (name, value) of the settings
+    '''
+    return tuple(sorted((settings or {}).items()))
+
+
+def _rows(features, target):
+    '''
+    :return: List of hashable (features, target) rows
+    '''
+    target = np.asarray(target, dtype=float).reshape((len(features), -1))
+
+    return [tuple(feature) + tuple(values) for feature, values in zip(np.asarray(features, dtype=float), target)]
+
+
+def _missing_rows(rows, saved_rows):
+    '''
+    :return: Indices of rows that are not in saved rows (counting repeated rows)
+    '''
+    saved = Counter(saved_rows)
+    missing = []
+    for idx, row in enumerate(rows):
+        if saved[row] > 0:
+            saved[row] -= 1
+        else:
+            missing.append(idx)
+
+    return missing
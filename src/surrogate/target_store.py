@@ -0,0 +1,89 @@
+import time
+
+import numpy as np
+
+from src.basic_evolution.swan import SWANParams
+
+
+class TargetStore:
+    def __init__(self, fake_model, **kwargs):
+        '''
+        Outputs of the fake model for all stations cached by (drf, cfw, stpm, fid_time, fid_space),
+        shared by surrogates of all stations so every point is evaluated once for any amount of retrainings.
+        Outputs are the errors of the default window and noise run of the model (see output_from_model_batch),
+        they are not valid after the series of the model change (see clear)
+        :param fake_model: FidelityFakeModel
+        :param cost: Function of fidelity that gives the time of one run, e.g. SWANPerfModel.get_execution_time,
+        the time of evaluated points is summed up in spent
+        :param scheduler: FidelityScheduler to report the time of one run at every fidelity to (see record_cost),
+        it is the cost if it is given, otherwise - the measured time of the batch per point
+        :param clock: Function without arguments that gives the current time, by default - wall-clock seconds
+        '''
+        self.fake_model = fake_model
+        self._outputs = {}
+
+        if 'cost' in kwargs:
+            self.cost = kwargs['cost']
+        else:
+            self.cost = None
+
+        if 'scheduler' in kwargs:
+            self.scheduler = kwargs['scheduler']
+        else:
+            self.scheduler = None
+
+        if 'clock' in kwargs:
+            self.clock = kwargs['clock']
+        else:
+            self.clock = time.perf_counter
+
+        self.hits = 0
+        self.misses = 0
+        self.spent = 0.0
+
+    def targets(self, features, fidelity):
+        '''
+        Outputs for the features, missing ones are evaluated by one batch call of the fake model
+        :param features: Array of (points, 3) with drf, cfw, stpm
+        :param fidelity: Tuple of (fid_time, fid_space)
+        :return: Array of (points, stations)
+        '''
+        keys = [target_key(feature, fidelity) for feature in features]
+
+        missing = list(dict.fromkeys(key for key in keys if key not in self._outputs))
+        if missing:
+            params = [SWANParams(drf=drf, cfw=cfw, stpm=stpm, fidelity_time=fid_time, fidelity_space=fid_space)
+                      for drf, cfw, stpm, fid_time, fid_space in missing]
+            started = self.clock()
+            for key, out in zip(missing, self.fake_model.output_from_model_batch(params=params)):
+                self._outputs[key] = out
+
+            if self.cost is not None:
+                run_time = self.cost(tuple(fidelity))
+                self.spent += run_time * len(missing)
+            else:
+                run_time = (self.clock() - started) / len(missing)
+
+            if self.scheduler is not None:
+                self.scheduler.record_cost(fidelity, run_time)
+
+        self.misses += len(missing)
+        self.hits += len(keys) - len(missing)
+
+        return np.asarray([self._outputs[key] for key in keys]).reshape((len(keys), -1))
+
+    def clear(self):
+        '''
+        Drop cached outputs, e.g. after FidelityFakeModel.extend_series, the time spent is kept
+        '''
+        self._outputs = {}
+
+    def __len__(self):
+        return len(self._outputs)
+
+
+def target_key(feature, fidelity):
+    drf, cfw, stpm = feature
+    fid_time, fid_space = fidelity
+
+    return float(drf), float(cfw), float(stpm), fid_time, fid_space
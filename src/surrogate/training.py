@@ -0,0 +1,61 @@
+from concurrent.futures import ProcessPoolExecutor
+
+
+class ParallelTrainer:
+    def __init__(self, workers=None):
+        '''
+        Trains pending surrogates concurrently in a pool of processes.
+        Targets are computed by surrogates beforehand, workers get only (features, target) arrays
+        and return found hyperparameters, the final factorization is made by a surrogate itself.
+        The pool is started once for all trainings, a single surrogate is trained without it
+        :param workers: Amount of processes, by default - amount of CPUs
+        '''
+        self.workers = workers
+        self._pool = None
+
+    def fit(self, surrogates):
+        '''
+        :param surrogates: List of KrigingModel objects, only ones with pending_fit are trained
+        '''
+        pending = [surrogate for surrogate in surrogates if surrogate.pending_fit]
+        if not pending:
+            return
+
+        # models saved by previous runs are not trained again
+        pending = [surrogate for surrogate in pending if not surrogate.restore()]
+
+        shipped = [surrogate for surrogate in pending if surrogate.is_shippable()]
+        for surrogate in pending:
+            if not surrogate.is_shippable():
+                surrogate.fit()
+
+        if not shipped:
+            return
+
+        new_surrogates = [surrogate.new_surrogate() for surrogate in shipped]
+        features = [surrogate.features for surrogate in shipped]
+        targets = [surrogate.target for surrogate in shipped]
+
+        if len(shipped) < 2:
+            thetas = list(map(optimized_theta, new_surrogates, features, targets))
+        else:
+            print(f'train {len(shipped)} surrogates in parallel')
+            thetas = list(self._started_pool().map(optimized_theta, new_surrogates, features, targets))
+
+        for surrogate, theta in zip(shipped, thetas):
+            surrogate.fit(theta=theta)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def _started_pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+
+        return self._pool
+
+
+def optimized_theta(surrogate, features, target):
+    return surrogate.optimize(features, target)
@@ -0,0 +1,108 @@
+import numpy as np
+
+DUPLICATE_TOLERANCE = 1e-3
+
+
+class TrainingSet:
+    def __init__(self, scale, **kwargs):
+        '''
+        Training points of a surrogate without near-duplicates and with bounded size.
+        Points are duplicates if they differ less than tolerance in every dimension scaled by the ranges of features
+        (e.g. archive members that are repeated in generations), duplicates make the correlation matrix of kriging
+        singular and add nothing to the model. If the size exceeds max_size, the most crowded points
+        (with the nearest neighbour) are evicted, so the set stays space-filling and its training cost is bounded
+        :param scale: Ranges of features, e.g. of the parameters grid
+        :param tolerance: Max scaled difference of duplicates
+        :param max_size: Max amount of points, by default - not bounded
+        '''
+        self.scale = np.where(np.asarray(scale, dtype=float) > 0, scale, 1.0)
+
+        if 'tolerance' in kwargs:
+            self.tolerance = kwargs['tolerance']
+        else:
+            self.tolerance = DUPLICATE_TOLERANCE
+
+        if 'max_size' in kwargs:
+            self.max_size = kwargs['max_size']
+        else:
+            self.max_size = None
+
+        self.features = np.empty((0, len(self.scale)))
+        # targets are evaluated for the points of the set only, see KrigingModel.train
+        self.target = None
+
+    def reset(self, features):
+        '''
+        Replace points with unique ones from features (bounded by max_size), the target must be set after that
+        '''
+        features = np.asarray(features, dtype=float)
+        features = features[_unique_indices(features / self.scale, self.tolerance)]
+
+        if self.max_size is not None and len(features) > self.max_size:
+            features = features[_kept_indices(features / self.scale, self.max_size, protected=0)]
+
+        self.features = features
+        self.target = None
+
+    def new_indices(self, features):
+        '''
+        :return: Indices of features that are not duplicates of the points of the set or of each other
+        '''
+        features = np.asarray(features, dtype=float)
+        if len(features) == 0:
+            return []
+
+        scaled = np.vstack([self.features, features]) / self.scale
+        unique = _unique_indices(scaled, self.tolerance)
+
+        return [idx - len(self.features) for idx in unique if idx >= len(self.features)]
+
+    def add(self, features, target):
+        '''
+        Append points (they should be checked by new_indices), old points are evicted if the size exceeds max_size
+        :return: True if some points were evicted
+        '''
+        self.features = np.vstack([self.features, np.asarray(features, dtype=float)])
+        self.target = np.concatenate([self.target, target])
+
+        if self.max_size is None or len(self.features) <= self.max_size:
+            return False
+
+        kept = _kept_indices(self.features / self.scale, self.max_size, protected=len(features))
+        self.features, self.target = self.features[kept], self.target[kept]
+
+        return True
+
+    def __len__(self):
+        return len(self.features)
+
+
+def _unique_indices(scaled, tolerance):
+    '''
+    :return: Sorted indices of points that differ from all previous ones more than tolerance in some dimension
+    '''
+    unique = []
+    for idx, point in enumerate(scaled):
+        if not unique or np.min(np.max(np.abs(scaled[unique] - point), axis=1)) > tolerance:
+            unique.append(idx)
+
+    return unique
+
+
+def _kept_indices(scaled, size, protected):
+    '''
+    Evict points with the nearest neighbour one by one until size points remain
+    :param protected: Amount of last points that are not evicted (e.g. just added ones)
+    :return: Sorted indices of kept points
+    '''
+    distances = np.linalg.norm(scaled[:, None, :] - scaled[None, :, :], axis=2)
+    np.fill_diagonal(distances, np.inf)
+
+    kept = np.ones(len(scaled), dtype=bool)
+    candidates = np.arange(len(scaled)) < len(scaled) - protected
+    while np.sum(kept) > size and np.any(candidates & kept):
+        crowding = np.where(candidates & kept, np.min(distances[:, kept], axis=1), np.inf)
+        evicted = int(np.argmin(crowding))
+        kept[evicted] = False
+
+    return list(np.flatnonzero(kept))
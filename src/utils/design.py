@@ -0,0 +1,168 @@
+import warnings
+from functools import lru_cache
+
+import numpy as np
+from scipy.spatial.distance import (
+    pdist,
+    squareform
+)
+from scipy.stats import qmc
+from scipy.stats.distributions import norm
+
+LHS_DESIGN = 'lhs'
+MAXIMIN_LHS_DESIGN = 'maximin_lhs'
+SOBOL_DESIGN = 'sobol'
+
+DESIGNS = [LHS_DESIGN, MAXIMIN_LHS_DESIGN, SOBOL_DESIGN]
+
+# random LHS designs to start the maximin search from
+LHS_CANDIDATES = 100
+# swaps of levels tried by the maximin search
+MAXIMIN_SWAPS = 2000
+# bounds of (candidates x points ^ 2) and (swaps x points) to keep the search cheap for large designs
+CANDIDATES_BUDGET = 2e6
+SWAPS_BUDGET = 5e5
+# power of Morris-Mitchell criterion, large values approach the maximin distance
+PHI_POWER = 20
+
+EXTENSION_CANDIDATES = 500
+
+
+def unit_design(dims, points, kind=LHS_DESIGN, seed=None):
+    '''
+    Space-filling design in the unit cube: Latin hypercube with centered levels (as pyDOE lhs with 'center'),
+    the same optimized by the maximin criterion or scrambled Sobol sequence.
+    Designs with a seed are computed once and cached
+    :param kind: LHS_DESIGN, MAXIMIN_LHS_DESIGN or SOBOL_DESIGN
+    :param seed: Seed of the design, None - new design for every call drawn from the global np.random
+    (so np.random.seed of experiments keeps it reproducible)
+    :return: Array of (points, dims)
+    '''
+    if kind not in DESIGNS:
+        raise ValueError(f'unknown design: {kind}')
+
+    if seed is None:
+        return _new_unit_design(dims, points, kind, np.random.RandomState(np.random.randint(2 ** 31)))
+
+    return _cached_unit_design(dims, points, kind, seed).copy()
+
+
+def extend_design(unit, points, seed=None):
+    '''
+    Add points to a design in the unit cube one by one, every point is the farthest
+    from the design among random candidates (greedy maximin). Candidates keep the margin
+    of centered LHS levels of the extended design, so they stay finite under inverse CDF
+    :param unit: Array of (points, dims) in the unit cube, can be empty
+    :return: Array of (new points, dims)
+    '''
+    unit = np.asarray(unit, dtype=float)
+    random = np.random.RandomState(np.random.randint(2 ** 31) if seed is None else seed)
+
+    margin = 0.5 / (len(unit) + points)
+    candidates = margin + (1 - 2 * margin) * random.rand(max(EXTENSION_CANDIDATES, 10 * points), unit.shape[1])
+
+    nearest = np.full(len(candidates), np.inf)
+    if len(unit) > 0:
+        nearest = np.min(np.linalg.norm(candidates[:, None, :] - unit[None, :, :], axis=2), axis=1)
+
+    added = []
+    for _ in range(points):
+        idx = int(np.argmax(nearest))
+        added.append(candidates[idx])
+        nearest = np.minimum(nearest, np.linalg.norm(candidates - candidates[idx], axis=1))
+
+    return np.asarray(added).reshape((points, unit.shape[1]))
+
+
+def params_from_unit(unit, params_ranges):
+    '''
+    Map the unit design to parameters by the normal inverse CDF with the mean and the std of every range of the grid
+    '''
+    params = np.empty_like(unit, dtype=float)
+    for idx, params_range in enumerate(params_ranges):
+        params[:, idx] = norm(loc=np.mean(params_range), scale=np.std(params_range)).ppf(unit[:, idx])
+
+    return params
+
+
+def unit_from_params(params, params_ranges):
+    '''
+    Inverse of params_from_unit
+    '''
+    params = np.asarray(params, dtype=float).reshape((-1, len(params_ranges)))
+    unit = np.empty_like(params)
+    for idx, params_range in enumerate(params_ranges):
+        unit[:, idx] = norm(loc=np.mean(params_range), scale=np.std(params_range)).cdf(params[:, idx])
+
+    return unit
+
+
+def params_design(points, params_ranges, kind=LHS_DESIGN, seed=None):
+    '''
+    :param params_ranges: List of grid values of every parameter, e.g. [drf_grid, cfw_grid, stpm_grid]
+    :return: Array of (points, parameters) of the space-filling design
+    '''
+    return params_from_unit(unit_design(len(params_ranges), points, kind, seed), params_ranges)
+
+
+@lru_cache(maxsize=64)
+def _cached_unit_design(dims, points, kind, seed):
+    return _new_unit_design(dims, points, kind, np.random.RandomState(seed))
+
+
+def _new_unit_design(dims, points, kind, random):
+    if kind == SOBOL_DESIGN:
+        with warnings.catch_warnings():
+            # balance properties of Sobol sequence hold for powers of 2 only
+            warnings.simplefilter('ignore', UserWarning)
+            return qmc.Sobol(dims, scramble=True, seed=random.randint(2 ** 31)).random(points)
+
+    if kind == MAXIMIN_LHS_DESIGN:
+        return _maximin_lhs(dims, points, random)
+
+    return (_lhs_levels(dims, points, random) + 0.5) / points
+
+
+def _lhs_levels(dims, points, random):
+    return np.argsort(random.rand(points, dims), axis=0)
+
+
+def _maximin_lhs(dims, points, random):
+    '''
+    The best of random centered LHS designs improved by swaps of levels within columns,
+    a swap is kept if it reduces Morris-Mitchell criterion. Only distances of two swapped points change,
+    so a swap costs O(points x dims). Amounts of candidates and swaps are reduced for large designs
+    '''
+    candidates = int(max(1, min(LHS_CANDIDATES, CANDIDATES_BUDGET // points ** 2)))
+    design = min((_lhs_levels(dims, points, random) for _ in range(candidates)), key=_phi).astype(float)
+
+    if points > 2:
+        with np.errstate(divide='ignore'):
+            inverse = squareform(pdist(design) ** -PHI_POWER)
+
+        for _ in range(int(min(MAXIMIN_SWAPS, SWAPS_BUDGET // points))):
+            rows = random.choice(points, 2, replace=False)
+            col = random.randint(dims)
+
+            swapped = design[rows]
+            swapped[:, col] = swapped[::-1, col]
+
+            with np.errstate(divide='ignore'):
+                new_inverse = np.linalg.norm(swapped[:, None, :] - design[None, :, :], axis=2) ** -PHI_POWER
+            # the distance between the swapped points does not change
+            new_inverse[:, rows] = inverse[np.ix_(rows, rows)]
+
+            if np.sum(new_inverse) < np.sum(inverse[rows]):
+                design[rows] = swapped
+                inverse[rows] = new_inverse
+                inverse[:, rows] = new_inverse.T
+
+    return (design + 0.5) / points
+
+
+def _phi(design):
+    '''
+    Morris-Mitchell criterion (sum of inverse powers of pairwise distances) of (points, dims) array,
+    the smaller the more space-filling
+    '''
+    return np.sum(pdist(np.asarray(design, dtype=float)) ** -PHI_POWER) ** (1.0 / PHI_POWER)
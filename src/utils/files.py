@@ -4,8 +4,13 @@ import os
 import re
 from datetime import datetime
 
+import numpy as np
+
 PATH_TO_WW3_RESULTS = '../../samples/ww-res/'
 
+FORECAST_COMMENT_PREFIX = '%'
+FORECAST_HEADER_PREFIXES = (FORECAST_COMMENT_PREFIX, 'V')
+
 
 class ObservationFile:
     def __init__(self, path, station_idx):
@@ -15,27 +20,53 @@ class ObservationFile:
     def time_series(self, from_date="", to_date=""):
         '''
         Extract all wave heights from file with observations for a given time period
-        :return: List of wave heights
+        :param from_date: First date of the period in '%Y%m%d.%H0000' format, by default - start of the file
+        :param to_date: Last date of the period (inclusive) in the same format, by default - end of the file
+        :return: Numpy array of wave heights
+        '''
+        timestamps, waves = parsed_observations(os.path.join(os.path.dirname(__file__), self.path),
+                                                parse=self._parsed)
+        idx_from, idx_to = self._from_and_to_idxs(timestamps, from_date, to_date)
+
+        return waves[idx_from:idx_to + 1]
+
+    def _parsed(self, path):
         '''
-        with open(os.path.join(os.path.dirname(__file__), self.path)) as file:
+        Parse the whole file once into a sorted array of timestamps and the array of wave heights
+        '''
+        with open(path) as file:
             lines = self._skip_meta_info(file.readlines())
-            idx_from, idx_to = self._from_and_to_idxs(lines, from_date, to_date)
-            waves = self._wave_heights(time_series=lines[idx_from:idx_to + 1])
-            return waves
+
+        date_pattern = FormattedDate().source_pattern
+        timestamps = []
+        for line in lines:
+            values = line.split()
+            timestamps.append(datetime.strptime(" ".join([values[1], values[2]]), date_pattern))
+
+        timestamps = np.asarray(timestamps, dtype='datetime64[s]')
+        waves = self._wave_heights(time_series=lines)
+
+        order = np.argsort(timestamps, kind='stable')
+
+        return timestamps[order], waves[order]
 
     def _skip_meta_info(self, lines):
         return list(filter(lambda line: line if not (line.startswith("#") or line.startswith("<")) else None, lines))
 
-    def _from_and_to_idxs(self, lines, from_date="", to_date=""):
-        idx_from, idx_to = -1, -1
-        for line in lines:
-            values = line.split()
-            date, time = values[1], values[2]
-            resulted_date = FormattedDate().target(date, time)
-            if resulted_date == from_date:
-                idx_from = lines.index(line)
-            if resulted_date == to_date:
-                idx_to = lines.index(line)
+    def _from_and_to_idxs(self, timestamps, from_date="", to_date=""):
+        '''
+        Resolve the inclusive period [from_date, to_date] to indexes with binary search
+        '''
+        formatted = FormattedDate()
+        idx_from, idx_to = 0, len(timestamps) - 1
+
+        if from_date:
+            date = np.datetime64(formatted.parsed_target(from_date), 's')
+            idx_from = int(np.searchsorted(timestamps, date, side='left'))
+        if to_date:
+            # target dates are truncated to hours, so the whole hour of to_date is included
+            date = np.datetime64(formatted.parsed_target(to_date), 's') + np.timedelta64(1, 'h')
+            idx_to = int(np.searchsorted(timestamps, date, side='left')) - 1
 
         assert idx_from < idx_to
 
@@ -45,11 +76,13 @@ class ObservationFile:
         '''
         Extracting wave heights from time series of observation
         '''
-        waves = [float(line.split()[4]) for line in time_series]
+        waves = np.asarray([float(line.split()[4]) for line in time_series])
         return waves
 
 
 class ForecastFile:
+    HSIG_COLUMN = 1
+
     def __init__(self, path):
         self.path = path
 
@@ -58,6 +91,40 @@ class ForecastFile:
             lines = self._skip_meta_info(file.readlines())
             return lines
 
+    def column(self, column=HSIG_COLUMN):
+        '''
+        Read a single column of the forecast table straight into a numpy array
+        :param column: Index of the column or its name from the SWAN TABLE header (e.g. 'Hsig')
+        :return: 1-d numpy array with values of the column
+        '''
+        with open(self.path) as file:
+            header = []
+            data_start = file.tell()
+            first_line = file.readline()
+            while first_line and first_line.startswith(FORECAST_HEADER_PREFIXES):
+                header.append(first_line)
+                data_start = file.tell()
+                first_line = file.readline()
+
+            if not first_line:
+                return np.empty(0)
+
+            delimiter = ',' if ',' in first_line else None
+            column_idx = column if isinstance(column, int) else self._column_idx(header, column, delimiter)
+
+            file.seek(data_start)
+            return np.loadtxt(file, delimiter=delimiter, usecols=column_idx,
+                              comments=FORECAST_COMMENT_PREFIX, ndmin=1)
+
+    def _column_idx(self, header, name, delimiter):
+        for line in header:
+            values = line.lstrip(''.join(FORECAST_HEADER_PREFIXES)).split(delimiter)
+            names = [value.strip().lower() for value in values]
+            if name.lower() in names:
+                return names.index(name.lower())
+
+        raise ValueError(f'column {name} is not presented in the header of {self.path}')
+
     def _skip_meta_info(self, lines):
         return list(filter(lambda line: line if not line.startswith("V") else None, lines))
 
@@ -68,10 +135,36 @@ class FormattedDate:
         self._target_date_pattern = "%Y%m%d.%H"
         self._target_suffix = "0000"
 
+    @property
+    def source_pattern(self):
+        return self._source_date_pattern
+
     def target(self, date, time):
         return datetime.strptime(" ".join([date, time]), self._source_date_pattern).strftime(
             self._target_date_pattern) + self._target_suffix
 
+    def parsed_target(self, target_date):
+        return datetime.strptime(target_date[:-len(self._target_suffix)], self._target_date_pattern)
+
+
+_parsed_files = {}
+
+
+def parsed_observations(path, parse):
+    '''
+    Process-wide cache of parsed observation files keyed by path and modification time
+    :param path: Path to the file
+    :param parse: Function that parses the file by path, called only when the file is absent in cache or modified
+    :return: Cached result of the parse function
+    '''
+    key = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+
+    if key not in _parsed_files or _parsed_files[key][0] != mtime:
+        _parsed_files[key] = (mtime, parse(path))
+
+    return _parsed_files[key][1]
+
 
 class WaveWatchObservationFile:
     FILE_PATTERN = 'obs_fromww_([1-9]).csv'
@@ -96,7 +189,11 @@ class WaveWatchObservationFile:
 
 
 def observations_from_range(observations, range_values):
-    # TODO: possible duplicate with Forecast._from_range()
+    '''
+    Extract a sublist of the values with relative range indexes, numpy arrays are sliced as views
+    :param observations: List or numpy array of values
+    :param range_values: tuple with relative indexes of a sublist to extract, (0, 1) - full list
+    '''
 
     assert 0 <= range_values[0] <= range_values[1] <= 1
 
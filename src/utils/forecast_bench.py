@@ -0,0 +1,59 @@
+import os
+import random
+import tempfile
+import time
+
+from src.utils.files import ForecastFile
+
+
+def generate_forecast_files(path, files_amount, points):
+    '''
+    Generate synthetic SWAN-like .tab files with a 'V' header line and (time, hsig, tm01) columns
+    :param path: Directory to store files
+    :param files_amount: Amount of files to generate
+    :param points: Amount of time steps in every file
+    :return: List of paths to generated files
+    '''
+    files = []
+    for file_idx in range(files_amount):
+        file_path = os.path.join(path, f'K1a_ns0_run{file_idx}_.tab')
+        with open(file_path, 'w') as file:
+            file.write('V,Hsig,Tm01\n')
+            for step in range(points):
+                file.write(f'{step},{random.uniform(0.0, 3.0):.4f},{random.uniform(1.0, 8.0):.4f}\n')
+        files.append(file_path)
+
+    return files
+
+
+def hsig_by_lines(file):
+    '''
+    Previous parsing path: filter meta info lines and split every line
+    '''
+    hsig_idx = 1
+    return [float(line.split(',')[hsig_idx]) for line in file.time_series()]
+
+
+def hsig_by_column(file):
+    return file.column(ForecastFile.HSIG_COLUMN)
+
+
+def throughput(parse, files):
+    start = time.perf_counter()
+    for file in files:
+        parse(ForecastFile(path=file))
+    elapsed = time.perf_counter() - start
+
+    return len(files) / elapsed
+
+
+def run_benchmark(files_amount=3000, points=745):
+    with tempfile.TemporaryDirectory() as path:
+        files = generate_forecast_files(path, files_amount, points)
+
+        for name, parse in [('lines', hsig_by_lines), ('column', hsig_by_column)]:
+            print(f'{name}: {throughput(parse, files):.1f} files/s ({files_amount} files, {points} points)')
+
+
+if __name__ == '__main__':
+    run_benchmark()
@@ -2,6 +2,8 @@ import csv
 from math import sqrt
 
 from src.basic_evolution.errors import (
+    error_mae_all,
+    error_mae_peak,
     error_rmse_peak,
     error_rmse_all
 )
@@ -10,8 +12,11 @@ from src.basic_evolution.model import (
     FidelityFakeModel
 )
 from src.basic_evolution.swan import SWANParams
-from src.utils.files import (
-    wave_watch_results
+from src.utils.grid_export import (
+    export_error_grids
+)
+from src.utils.observation_store import (
+    wave_watch_observations
 )
 
 
@@ -22,8 +27,7 @@ def grid_rmse():
 
     stations = [1, 2, 3]
 
-    ww3_obs = \
-        [obs.time_series() for obs in wave_watch_results(path_to_results='../../samples/ww-res/', stations=stations)]
+    ww3_obs = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=stations)
 
     fake = FidelityFakeModel(grid_file=grid, observations=ww3_obs, stations_to_out=stations, error=error_rmse_peak,
                              forecasts_path='../../../wind-noice-runs/results_fixed/0')
@@ -54,17 +58,21 @@ def rmse(vars):
     return sqrt(sum([pow(v, 2) for v in vars]) / len(vars))
 
 
-def error_grid(noise_case=0):
+NOISE_CASES = [0, 1, 2, 3, 4, 5, 6, 7, 15, 16, 17, 18, 25, 26]
+
+
+def error_grid(noise_case=0, **kwargs):
     grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
     stations = [1, 2, 3, 4, 5, 6, 7, 8, 9]
 
-    ww3_obs_all = \
-        [obs.time_series() for obs in
-         wave_watch_results(path_to_results='../../samples/ww-res/', stations=stations)]
+    if 'model' in kwargs:
+        model_all = kwargs['model']
+    else:
+        ww3_obs_all = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=stations)
 
-    model_all = FidelityFakeModel(grid_file=grid, observations=ww3_obs_all, stations_to_out=stations,
-                                  error=error_rmse_all,
-                                  forecasts_path='../../../wind-postproc/out')
+        model_all = FidelityFakeModel(grid_file=grid, observations=ww3_obs_all, stations_to_out=stations,
+                                      error=error_rmse_all,
+                                      forecasts_path='../../../wind-postproc/out', noise_run=noise_case)
 
     with open(f'../../samples/params_rmse_{noise_case}.csv', mode='w', newline='') as csv_file:
         writer = csv.writer(csv_file, delimiter=',')
@@ -76,17 +84,41 @@ def error_grid(noise_case=0):
 
         fidelity = 240
         for row in grid.rows:
-            metrics = model_all.output(
+            metrics = model_all.output_from_model(
                 params=SWANParams(drf=row.model_params.drf, cfw=row.model_params.cfw,
-                                  stpm=row.model_params.stpm, fidelity_time=fidelity))
+                                  stpm=row.model_params.stpm, fidelity_time=fidelity), noise_run=noise_case)
             row_to_write = row.model_params.params_list()
             row_to_write.extend(metrics)
             writer.writerow(row_to_write)
 
 
+def noise_cases_model():
+    grid = CSVGridFile('../../samples/wind-exp-params-new.csv')
+    stations = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+
+    ww3_obs_all = wave_watch_observations(path_to_results='../../samples/ww-res/', stations=stations)
+
+    # all noise runs are loaded at once, errors for them are computed in one pass
+    return FidelityFakeModel(grid_file=grid, observations=ww3_obs_all, stations_to_out=stations,
+                             error=error_rmse_all,
+                             forecasts_path='../../../wind-postproc/out', noise_runs=NOISE_CASES)
+
+
 def all_error_grids():
-    for noise_case in [0, 1, 2, 3, 4, 5, 6, 7, 15, 16, 17, 18, 25, 26]:
-        error_grid(noise_case)
+    model_all = noise_cases_model()
+
+    for noise_case in NOISE_CASES:
+        error_grid(noise_case, model=model_all)
+
+
+def export_all_error_grids(file_format='npz'):
+    '''
+    Dump errors for all metrics, noise cases, points of the grid and stations into one file,
+    see src.utils.grid_export.load_error_tensor to load it back
+    '''
+    export_error_grids(f'../../samples/error_grids.{file_format}', noise_cases_model(),
+                       errors=[error_rmse_all, error_rmse_peak, error_mae_all, error_mae_peak],
+                       file_format=file_format)
 
 
 all_error_grids()
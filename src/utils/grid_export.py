@@ -0,0 +1,125 @@
+import csv
+import os
+
+import numpy as np
+
+from src.basic_evolution.model import DEFAULT_WINDOW
+
+ERROR_TENSOR_AXES = ['metric', 'noise_run', 'drf', 'cfw', 'stpm', 'fid_time', 'fid_space', 'station']
+
+FORMATS = ['npz', 'parquet', 'csv']
+
+
+def error_tensor(model, errors, window=DEFAULT_WINDOW):
+    '''
+    Errors for all metrics, noise runs, points of the grid and stations of the model
+    :param model: FidelityFakeModel with loaded noise runs
+    :param errors: List of error_* functions
+    :param window: Name of the window or tuple with relative range of the series
+    :return: Tuple (tensor with axes ERROR_TENSOR_AXES, dict with coordinates of the axes)
+    '''
+    tensor = np.stack([model.ensemble_error_grid(window, error=error) for error in errors])
+
+    coords = {'metric': [error.__name__ for error in errors], 'noise_run': model.noise_runs}
+    coords.update(model.grid_coords())
+
+    return tensor, {axis: np.asarray(coords[axis]) for axis in ERROR_TENSOR_AXES}
+
+
+def export_error_grids(path, model, errors, window=DEFAULT_WINDOW, file_format='npz'):
+    '''
+    Dump the full error tensor with axis coordinates in one shot
+    :param path: Path to the output file
+    :param file_format: 'npz', 'parquet' (requires pyarrow) or 'csv' (long table, one row per tensor element)
+    '''
+    tensor, coords = error_tensor(model, errors, window)
+    save_error_tensor(path, tensor, coords, file_format)
+
+
+def save_error_tensor(path, tensor, coords, file_format='npz'):
+    if file_format not in FORMATS:
+        raise ValueError(f'unknown format {file_format}, expected one of {FORMATS}')
+
+    if file_format == 'npz':
+        np.savez(path, errors=tensor, **coords)
+        return
+
+    columns = _long_columns(tensor, coords)
+
+    if file_format == 'parquet':
+        pa, pq = _pyarrow()
+        pq.write_table(pa.table(columns), path)
+    else:
+        with open(path, mode='w', newline='') as csv_file:
+            writer = csv.writer(csv_file, delimiter=',')
+            writer.writerow(list(columns.keys()))
+            writer.writerows(zip(*columns.values()))
+
+
+def load_error_tensor(path):
+    '''
+    Load the error tensor saved by export_error_grids, format is chosen by the extension of the file
+    :return: Tuple (tensor with axes ERROR_TENSOR_AXES, dict with coordinates of the axes)
+    '''
+    _, extension = os.path.splitext(path)
+
+    if extension == '.npz':
+        with np.load(path) as data:
+            return data['errors'], {axis: data[axis] for axis in ERROR_TENSOR_AXES}
+
+    if extension == '.parquet':
+        _, pq = _pyarrow()
+        table = pq.read_table(path)
+        columns = {name: table.column(name).to_numpy() for name in ERROR_TENSOR_AXES + ['error']}
+    else:
+        with open(path, newline='') as csv_file:
+            reader = csv.reader(csv_file)
+            header = next(reader)
+            values = list(zip(*reader))
+        columns = {name: np.asarray(column) for name, column in zip(header, values)}
+        for name in ERROR_TENSOR_AXES[1:] + ['error']:
+            columns[name] = columns[name].astype(float)
+
+    return _tensor_from_columns(columns)
+
+
+def _long_columns(tensor, coords):
+    mesh = np.meshgrid(*[coords[axis] for axis in ERROR_TENSOR_AXES], indexing='ij')
+
+    columns = {axis: values.ravel() for axis, values in zip(ERROR_TENSOR_AXES, mesh)}
+    columns['error'] = tensor.ravel()
+
+    return columns
+
+
+def _tensor_from_columns(columns):
+    coords, idxs = {}, []
+    for axis in ERROR_TENSOR_AXES:
+        coords[axis], inverse = _coords_in_order_of_appearance(columns[axis])
+        idxs.append(inverse)
+
+    tensor = np.full([len(coords[axis]) for axis in ERROR_TENSOR_AXES], np.nan)
+    tensor[tuple(idxs)] = columns['error']
+
+    return tensor, coords
+
+
+def _coords_in_order_of_appearance(column):
+    '''
+    Unique values of the column in order of their first appearance, so axes keep the order of the exported grid
+    :return: Tuple (values, index of the value for every element of the column)
+    '''
+    values, first_idxs, inverse = np.unique(column, return_index=True, return_inverse=True)
+    order = np.argsort(first_idxs)
+
+    return values[order], np.argsort(order)[inverse.ravel()]
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('parquet format requires pyarrow to be installed')
+
+    return pyarrow, pyarrow.parquet
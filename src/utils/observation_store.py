@@ -0,0 +1,140 @@
+import csv
+import glob
+import os
+import re
+
+import numpy as np
+
+from src.utils.files import (
+    PATH_TO_WW3_RESULTS,
+    WaveWatchObservationFile,
+    parsed_observations
+)
+
+MISSING_VALUE = 'NA'
+
+
+class ObservationStore:
+    VALUES_SUFFIX = '.npy'
+    INDEX_SUFFIX = '-idx.npy'
+
+    def __init__(self, path):
+        '''
+        Memory-mapped station x time store of observations
+        :param path: Path to the store without suffixes (see build_observation_store)
+        '''
+        self.path = path
+
+        index = np.load(path + ObservationStore.INDEX_SUFFIX)
+        self.stations = index[:, 0]
+        self._offsets = index[:, 1]
+        self._lengths = index[:, 2]
+
+        self._values = np.load(path + ObservationStore.VALUES_SUFFIX, mmap_mode='r')
+
+    def series(self, station):
+        '''
+        :param station: Index of a station
+        :return: Read-only view of the station's time series
+        '''
+        station_idxs = np.flatnonzero(self.stations == int(station))
+        if len(station_idxs) == 0:
+            raise KeyError(f'station {station} is not presented in the store {self.path}')
+
+        idx = station_idxs[0]
+        offset = self._offsets[idx]
+
+        return self._values[offset:offset + self._lengths[idx]]
+
+    def time_series(self, stations):
+        return [self.series(station) for station in stations]
+
+
+def build_observation_store(path_to_results=PATH_TO_WW3_RESULTS, store_path=None,
+                            file_pattern=WaveWatchObservationFile.FILE_PATTERN):
+    '''
+    Convert ww3 results stored as csv-files into a single array file with a per-station offset index
+    :param path_to_results: Path to directory with ww3 results
+    :param store_path: Path to the store without suffixes, by default - near the results
+    :param file_pattern: Pattern of the csv-files names, the only group is an index of a station
+    :return: Path to the store
+    '''
+    store_path = _default_store_path(path_to_results, file_pattern) if store_path is None else store_path
+
+    files = _results_files(path_to_results, file_pattern)
+
+    if not files:
+        raise FileNotFoundError(f'no ww3 results in {path_to_results}')
+
+    stations, series = [], []
+    for station, file in sorted(files.items()):
+        stations.append(station)
+        series.append(_hs_values(file))
+
+    lengths = np.asarray([len(values) for values in series], dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(lengths)[:-1]])
+
+    np.save(store_path + ObservationStore.VALUES_SUFFIX, np.concatenate(series))
+    np.save(store_path + ObservationStore.INDEX_SUFFIX, np.column_stack([stations, offsets, lengths]))
+
+    return store_path
+
+
+def wave_watch_observations(path_to_results=PATH_TO_WW3_RESULTS, stations=None,
+                            file_pattern=WaveWatchObservationFile.FILE_PATTERN):
+    '''
+    Time series of ww3 results for chosen stations, the store is built on the first call
+    and rebuilt if any of csv-files is newer than the store
+    :param path_to_results: Path to directory with ww3 results stored as csv-files
+    :param stations: List of stations to take
+    :param file_pattern: Pattern of the csv-files names
+    :return: List of read-only arrays according to chosen stations
+    '''
+    path_to_results = os.path.join(os.path.dirname(__file__), path_to_results)
+    store_path = _default_store_path(path_to_results, file_pattern)
+
+    if _is_outdated(store_path, _results_files(path_to_results, file_pattern).values()):
+        build_observation_store(path_to_results=path_to_results, store_path=store_path, file_pattern=file_pattern)
+
+    store = parsed_observations(store_path + ObservationStore.VALUES_SUFFIX,
+                                parse=lambda _: ObservationStore(store_path))
+
+    return store.time_series(stations)
+
+
+def _default_store_path(path_to_results, file_pattern):
+    name = file_pattern.split('(')[0].rstrip('_')
+
+    return os.path.join(path_to_results, f'{name}-store')
+
+
+def _results_files(path_to_results, file_pattern):
+    p = re.compile(file_pattern)
+
+    files = {}
+    for file in glob.iglob(os.path.join(path_to_results, '*.csv')):
+        match = p.search(os.path.basename(file))
+        if match and match.group(0) == os.path.basename(file):
+            files[int(match.groups()[0])] = file
+
+    return files
+
+
+def _is_outdated(store_path, files):
+    paths = [store_path + ObservationStore.VALUES_SUFFIX, store_path + ObservationStore.INDEX_SUFFIX]
+    if not all(os.path.isfile(path) for path in paths):
+        return True
+
+    store_mtime = min(os.path.getmtime(path) for path in paths)
+
+    return any(os.path.getmtime(file) > store_mtime for file in files)
+
+
+def _hs_values(file):
+    with open(file, newline='') as csvfile:
+        reader = csv.reader(csvfile)
+        header = [name.strip() for name in next(reader)]
+        hs_idx = header.index('hs')
+
+        return np.asarray([np.nan if row[hs_idx].strip() == MISSING_VALUE else float(row[hs_idx])
+                           for row in reader])
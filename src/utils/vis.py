@@ -8,21 +8,29 @@ from src.utils.files import observations_from_range
 
 
 def plot_results(forecasts, observations, **kwargs):
+    '''
+    :param forecasts: List of Forecast objects per station
+    :param observations: List of observed time series per station, e.g. from wave_watch_observations
+    :param stations: List of stations for the labels, by default - their order
+    '''
     fig, axs = plt.subplots(3, 3)
     time = np.linspace(1, len(forecasts[0].hsig_series), num=len(forecasts[0].hsig_series))
 
+    if 'stations' in kwargs:
+        stations = kwargs['stations']
+    else:
+        stations = range(1, len(observations) + 1)
+
     obs_series = []
     for obs in observations:
 
         if 'values_range' in kwargs:
-            obs_in_range = observations_from_range(
-                obs.time_series(from_date="20140814.120000", to_date="20140915.000000"), kwargs['values_range'])
+            obs_in_range = observations_from_range(obs, kwargs['values_range'])
             obs_series.append(obs_in_range[:len(time)])
         else:
-            obs_series.append(obs.time_series(from_date="20140814.120000", to_date="20140915.000000")[:len(time)])
-    for idx in range(min(len(forecasts), len(observations))):
+            obs_series.append(obs[:len(time)])
+    for idx, station_idx in zip(range(min(len(forecasts), len(observations))), stations):
         i, j = divmod(idx, 3)
-        station_idx = observations[idx].station_idx
         axs[i, j].plot(time, obs_series[idx],
                        label=f'Observations, Station {station_idx}')
         axs[i, j].plot(time, forecasts[idx].hsig_series,
@@ -0,0 +1,80 @@
+import numpy as np
+
+from src.basic_evolution.swan import SWANParams
+from src.multifidelity_evolution.fidelity_handler import FidelityHandler
+from src.surrogate.accuracy import RetrainPolicy
+from src.surrogate.kriging import KrigingModel
+
+
+class EstimatedSurrogate:
+    def __init__(self, loo, infill):
+        self.target = np.asarray([0.0, 2.0])
+        self.loo = loo
+        self.infill = infill
+
+    def loo_error(self):
+        return self.loo
+
+    def infill_error(self):
+        return self.infill
+
+
+class Grid:
+    drf_grid = [0.2, 1.0, 1.8, 2.6]
+    cfw_grid = [0.005, 0.02, 0.035, 0.05]
+    stpm_grid = [0.001, 0.004, 0.007, 0.01]
+
+
+# narrow peak that the initial design does not see
+PEAK = SWANParams(drf=2.3, cfw=0.045, stpm=0.0085)
+
+
+class PeakModel:
+    def output_from_model_batch(self, params):
+        return np.asarray([[np.sin(p.drf) + 20 * p.cfw + 50 * p.stpm +
+                            5 * np.exp(-((p.drf - PEAK.drf) / 0.05) ** 2 - ((p.cfw - PEAK.cfw) / 0.002) ** 2)]
+                           for p in params])
+
+
+class Individ:
+    def __init__(self, genotype, objective):
+        self.genotype = genotype
+        self.objectives = (objective,)
+
+
+def test_retrain_policy_skips_accurate_surrogates():
+    policy = RetrainPolicy(threshold=0.1, max_skips=2)
+    accurate = [EstimatedSurrogate(loo=0.02, infill=0.03), EstimatedSurrogate(loo=0.01, infill=None)]
+
+    decisions = [policy.should_retrain(accurate, gen_idx=gen) for gen in range(4)]
+
+    assert decisions == [False, False, True, False]
+    assert [entry['reason'] for entry in policy.history][2] == '2 retrainings skipped'
+
+
+def test_retrain_policy_retrains_inaccurate_or_drifting_surrogates():
+    policy = RetrainPolicy(threshold=0.1, drift=2.0)
+
+    assert policy.should_retrain([EstimatedSurrogate(loo=0.5, infill=None)], gen_idx=0)
+    assert policy.should_retrain([EstimatedSurrogate(loo=0.01, infill=0.05)], gen_idx=1)
+    assert policy.should_retrain([EstimatedSurrogate(loo=None, infill=None)], gen_idx=2)
+    assert not policy.should_retrain([EstimatedSurrogate(loo=0.02, infill=0.03)], gen_idx=3)
+
+
+def test_skipped_retrainings_end_when_error_drifts():
+    surrogate = KrigingModel(Grid(), PeakModel(), 0, 20, (60, 14))
+    policy = RetrainPolicy(threshold=10.0, drift=2.0, max_skips=10)
+    handler = FidelityHandler(surrogates=[surrogate], time_delta=30, space_delta=14, point_for_retrain=1,
+                              gens_to_change_fidelity=5, retrain_policy=policy)
+    handler.train_surrogates(fidelity=(60, 14))
+
+    smooth = [Individ(SWANParams(drf=1.1 + 0.1 * idx, cfw=0.025, stpm=0.005), objective=-idx) for idx in range(3)]
+    for gen_idx, best in enumerate(smooth):
+        handler.handle_new_min_found(population=[best], gen_idx=gen_idx)
+    points = len(surrogate.training_set)
+
+    handler.handle_new_min_found(population=[Individ(PEAK, objective=-10)], gen_idx=3)
+
+    assert [entry['retrain'] for entry in policy.history] == [False, False, False, True]
+    assert 'drifts' in policy.history[-1]['reason']
+    assert len(surrogate.training_set) == points + 1
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from src.surrogate.backends import (
+    QUADRATIC_BACKEND,
+    RANDOM_FOREST_BACKEND,
+    RBF_BACKEND,
+    new_surrogate
+)
+
+
+def quadratic_function(features):
+    return 1.0 + features[:, 0] - 2.0 * features[:, 1] ** 2 + 3.0 * features[:, 0] * features[:, 2]
+
+
+def training_data(points=40):
+    features = np.random.RandomState(0).rand(points, 3) * [2.0, 0.05, 0.01]
+
+    return features, quadratic_function(features)
+
+
+def test_quadratic_surrogate_is_exact_for_quadratic_function():
+    features, target = training_data()
+    test = np.random.RandomState(1).rand(10, 3) * [2.0, 0.05, 0.01]
+
+    surrogate = new_surrogate(QUADRATIC_BACKEND).fit(features, target)
+
+    assert np.allclose(surrogate.predict(test), quadratic_function(test))
+
+
+def test_rbf_surrogate_interpolates_all_outputs():
+    features, target = training_data()
+    targets = np.column_stack([target, -target])
+
+    surrogate = new_surrogate(RBF_BACKEND).fit(features, targets)
+
+    assert np.allclose(surrogate.predict(features), targets)
+    assert surrogate.predict(features[0]).shape == (2,)
+
+
+def test_random_forest_surrogate_variance():
+    pytest.importorskip('sklearn')
+    features, target = training_data()
+
+    surrogate = new_surrogate(RANDOM_FOREST_BACKEND, seed=1).fit(features, target)
+
+    assert surrogate.predict(features).shape == target.shape
+    assert np.all(surrogate.predict_var(features) >= 0.0)
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        new_surrogate('unknown')
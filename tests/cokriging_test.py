@@ -0,0 +1,39 @@
+import numpy as np
+
+from src.surrogate.cokriging import CoKriging
+from src.surrogate.gp import GaussianProcess
+
+
+def low_fidelity(features):
+    return np.sin(6 * features[:, 0]) + features[:, 1] ** 2 + 0.3 * features[:, 2]
+
+
+def high_fidelity(features):
+    return 1.6 * low_fidelity(features) + 0.3 * features[:, 0] - 0.2
+
+
+def test_cokriging_uses_cheap_level():
+    random = np.random.RandomState(0)
+    low_features, high_features, test = random.rand(150, 3), random.rand(12, 3), random.rand(200, 3)
+
+    cokriging = CoKriging(seed=1).fit([(low_features, low_fidelity(low_features)),
+                                       (high_features, high_fidelity(high_features))])
+    kriging = GaussianProcess(seed=1).fit(high_features, high_fidelity(high_features))
+
+    cokriging_error = np.mean((cokriging.predict(test) - high_fidelity(test)) ** 2)
+    kriging_error = np.mean((kriging.predict(test) - high_fidelity(test)) ** 2)
+
+    assert abs(cokriging.rhos[1] - 1.6) < 0.1
+    assert cokriging_error < 0.1 * kriging_error
+    assert np.allclose(cokriging.predict(high_features), high_fidelity(high_features), atol=1e-3)
+
+
+def test_cokriging_with_one_level_is_kriging():
+    random = np.random.RandomState(0)
+    features, test = random.rand(30, 3), random.rand(10, 3)
+
+    cokriging = CoKriging(seed=1).fit([(features, low_fidelity(features))])
+    kriging = GaussianProcess(seed=1).fit(features, low_fidelity(features))
+
+    assert np.allclose(cokriging.predict(test), kriging.predict(test))
+    assert np.allclose(cokriging.predict_var(test), kriging.predict_var(test))
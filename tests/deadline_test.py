@@ -0,0 +1,99 @@
+import pytest
+
+from src.evolution.spea2.deadline import (
+    DeadlineController,
+    RETRAIN,
+    SWITCH,
+    TRAIN
+)
+from src.evolution.spea2.spea2 import SPEA2
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def cost(fidelity):
+    return 3600.0 / fidelity[0] * 14 / fidelity[1]
+
+
+def params(max_gens=20, pop_size=10):
+    return SPEA2.Params(max_gens=max_gens, pop_size=pop_size, archive_size=5, crossover_rate=0.7,
+                        mutation_rate=0.7, mutation_value_rate=[0.1, 0.01, 0.001])
+
+
+def test_stages_are_estimated_by_unit_cost():
+    clock = FakeClock()
+    controller = DeadlineController(1000.0, clock=clock, cost=cost, safety=1.0)
+
+    with controller.timed(TRAIN) as train:
+        clock.now += 100.0
+        train.points, train.fidelity = 10, (120, 28)
+
+    # 10 seconds per run of 15 seconds at the initial level
+    assert controller.estimate(RETRAIN, points=2, fidelity=(120, 28)) == pytest.approx(20.0)
+    assert controller.estimate(SWITCH, points=10, fidelity=(60, 14)) == pytest.approx(400.0)
+    assert controller.estimate(SWITCH) == 100.0
+
+
+def test_stages_that_do_not_fit_are_skipped():
+    clock = FakeClock()
+    controller = DeadlineController(1000.0, clock=clock, cost=cost, safety=1.0)
+
+    with controller.timed(TRAIN) as train:
+        clock.now += 700.0
+        train.points, train.fidelity = 10, (120, 28)
+
+    assert controller.allows(RETRAIN, pop_size=10, gen_idx=0, points=2, fidelity=(120, 28))
+    assert not controller.allows(SWITCH, pop_size=10, gen_idx=0, points=10, fidelity=(60, 14))
+    assert not controller.allows(SWITCH, pop_size=10, gen_idx=1, points=10, fidelity=(60, 14))
+
+    # the decision is logged once
+    assert [entry['decision'] for entry in controller.history] == ['skip switch']
+
+
+def test_not_done_stage_is_left_to_generation():
+    clock = FakeClock()
+    controller = DeadlineController(1000.0, clock=clock)
+
+    controller.start_generation()
+    with controller.timed(SWITCH) as switch:
+        clock.now += 10.0
+        switch.done = False
+    controller.end_generation(pop_size=10)
+
+    assert controller.costs[SWITCH] == []
+    assert controller.generation_cost(pop_size=10) == 10.0
+
+
+def test_population_and_generations_fit_remaining_time():
+    clock = FakeClock()
+    controller = DeadlineController(100.0, clock=clock, safety=1.0, min_pop_size=4)
+    dyn_params = params(max_gens=20, pop_size=10)
+
+    for gen_idx in range(2):
+        controller.start_generation()
+        clock.now += 5.0
+        controller.end_generation(pop_size=10)
+        controller.adapt(dyn_params, gen_idx)
+
+    # 90 seconds left for 18 generations of 0.5 seconds per individual
+    assert dyn_params.pop_size == 10
+    assert dyn_params.max_gens == 20
+
+    controller.start_generation()
+    clock.now += 40.0
+    controller.end_generation(pop_size=10)
+    controller.adapt(dyn_params, 2)
+
+    # 50 seconds left, the population is reduced to the minimum and then generations are cut
+    assert dyn_params.pop_size == 4
+    assert dyn_params.max_gens == 6
+
+    assert controller.can_continue(pop_size=4, gen_idx=3)
+    clock.now += 40.0
+    assert not controller.can_continue(pop_size=4, gen_idx=3)
@@ -0,0 +1,63 @@
+import time
+
+import numpy as np
+from scipy.spatial.distance import pdist
+
+from src.utils.design import (
+    MAXIMIN_LHS_DESIGN,
+    SOBOL_DESIGN,
+    extend_design,
+    params_design,
+    unit_design,
+    unit_from_params
+)
+
+
+def test_maximin_lhs_is_latin_hypercube():
+    design = unit_design(3, 12, kind=MAXIMIN_LHS_DESIGN, seed=1)
+
+    for column in design.T:
+        assert np.allclose(np.sort(column), (np.arange(12) + 0.5) / 12)
+
+    assert pdist(design).min() > pdist(unit_design(3, 12, seed=1)).min()
+
+
+def test_maximin_lhs_of_large_design_is_fast():
+    started = time.perf_counter()
+    design = unit_design(3, 850, kind=MAXIMIN_LHS_DESIGN, seed=5)
+
+    assert time.perf_counter() - started < 5.0
+    for column in design.T:
+        assert np.allclose(np.sort(column), (np.arange(850) + 0.5) / 850)
+
+
+def test_seeded_designs_are_cached():
+    first = unit_design(3, 16, seed=2)
+    first[0, 0] = -1.0
+
+    assert np.all(unit_design(3, 16, seed=2) >= 0)
+    assert np.allclose(unit_design(3, 16, kind=SOBOL_DESIGN, seed=2), unit_design(3, 16, kind=SOBOL_DESIGN, seed=2))
+
+
+def test_extended_design_keeps_distance():
+    design = unit_design(3, 20, seed=3)
+    extended = np.vstack([design, extend_design(design, 5, seed=0)])
+
+    assert extended.shape == (25, 3)
+    assert pdist(extended).min() > 0.5 * pdist(design).min()
+
+
+def test_params_design_round_trip():
+    ranges = [[0.2, 1.0, 2.6], [0.005, 0.05], [0.001, 0.01]]
+    params = params_design(10, ranges, seed=4)
+
+    assert np.allclose(unit_from_params(params, ranges), unit_design(3, 10, seed=4))
+
+
+def test_unseeded_design_follows_global_random_state():
+    np.random.seed(42)
+    first = unit_design(3, 10)
+    np.random.seed(42)
+
+    assert np.array_equal(unit_design(3, 10), first)
+    assert not np.array_equal(unit_design(3, 10), first)
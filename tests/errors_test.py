@@ -0,0 +1,82 @@
+from math import sqrt
+
+import numpy as np
+
+from src.basic_evolution.errors import (
+    ObservationStats,
+    OnlineErrors,
+    dtw_all_kernel,
+    error_mae_peak,
+    error_rmse_all,
+    rmse_all_kernel
+)
+
+
+class FakeForecast:
+    def __init__(self, hsig_series):
+        self.hsig_series = hsig_series
+
+
+def test_error_rmse_all_correct():
+    observations = [1.0, 2.0, 3.0, 4.0]
+    forecast = FakeForecast([1.0, 2.0, 3.0, 6.0])
+
+    penalty_var = abs((np.var(observations) - np.var(forecast.hsig_series)) / np.var(observations)) + 1
+    expected = sqrt(4.0 / len(observations)) * penalty_var
+
+    assert np.isclose(error_rmse_all(forecast, observations), expected)
+
+
+def test_error_mae_peak_correct():
+    observations = [1.0, 2.0, 3.0, 4.0]
+    forecast = FakeForecast([0.0, 0.0, 2.0, 2.0])
+
+    assert np.isclose(error_mae_peak(forecast, observations), 1.5)
+
+
+def test_rmse_all_kernel_for_many_forecasts():
+    observations = np.sin(np.linspace(0, 10, 50)) + 2.0
+    forecasts = observations + np.random.RandomState(42).normal(0, 0.1, size=(4, 3, 50))
+
+    errors = rmse_all_kernel(forecasts, ObservationStats(observations))
+
+    assert errors.shape == (4, 3)
+    assert np.isclose(errors[2, 1], error_rmse_all(FakeForecast(forecasts[2, 1]), observations))
+
+
+def test_dtw_all_kernel_matches_banded_dtw():
+    def banded_dtw(pred, obs, band):
+        points = len(pred)
+        costs = np.full((points + 1, points + 1), np.inf)
+        costs[0, 0] = 0.0
+        for i in range(1, points + 1):
+            for j in range(max(1, i - band), min(points, i + band) + 1):
+                costs[i, j] = (pred[i - 1] - obs[j - 1]) ** 2 + min(costs[i - 1, j], costs[i, j - 1],
+                                                                     costs[i - 1, j - 1])
+        return sqrt(costs[points, points] / points)
+
+    random_state = np.random.RandomState(42)
+    observations = random_state.rand(30)
+    forecasts = random_state.rand(5, 30)
+
+    errors = dtw_all_kernel(forecasts, ObservationStats(observations), band=3)
+    expected = [banded_dtw(forecast, observations, band=3) for forecast in forecasts]
+
+    assert np.allclose(errors, expected)
+
+    abandoned = dtw_all_kernel(forecasts, ObservationStats(observations), band=3, cutoff=np.median(errors))
+
+    assert np.all(np.isinf(abandoned[errors > np.median(errors)]))
+    assert np.allclose(abandoned[errors <= np.median(errors)], errors[errors <= np.median(errors)])
+
+
+def test_online_errors_equal_to_full_series():
+    random_state = np.random.RandomState(42)
+    observations = random_state.rand(60) + 1.0
+    forecasts = random_state.rand(4, 3, 60) + 1.0
+
+    online = OnlineErrors(error_rmse_all, forecasts[..., :40], observations[:40])
+    online.update(forecasts[..., 40:50], observations[40:50])
+    online.update(forecasts[..., 50:], observations[50:])
+
+    assert np.allclose(online.errors(), rmse_all_kernel(forecasts, ObservationStats(observations)))
@@ -0,0 +1,173 @@
+import os
+
+import numpy as np
+
+from src.basic_evolution.errors import error_rmse_all
+from src.basic_evolution.model import (
+    CSVGridFile,
+    FidelityFakeModel
+)
+from src.basic_evolution.swan import SWANParams
+from src.utils.files import ForecastFile
+
+DRF = [0.2, 1.0]
+CFW = [0.005, 0.05]
+STPM = [0.001, 0.01]
+FIDELITIES = [(60, 14), (120, 14)]
+STATIONS = [1, 2]
+STEPS = 40
+
+
+def forecast_series(drf, cfw, stpm, fidelity, station, noise_run, steps=STEPS):
+    time = np.arange(steps)
+    base = 1 + 0.5 * np.sin(time / 5 + station)
+
+    return base * (1 + 0.3 * (drf - 1) ** 2 + 20 * cfw + 50 * stpm) + 0.01 * fidelity[0] / 60 + 0.05 * noise_run
+
+
+def observation_series(station, steps=STEPS):
+    return 1 + 0.5 * np.sin(np.arange(steps) / 5 + station) + 0.02 * np.cos(np.arange(steps))
+
+
+def write_dataset(root, steps=STEPS, noise_runs=(0,)):
+    '''
+    Forecast files of all points of the grid in the layout of the experiments
+    :return: Path to the grid file
+    '''
+    os.makedirs(os.path.join(root, 'grid'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'a', 'b'), exist_ok=True)
+
+    rows = [(drf, cfw, stpm) for drf in DRF for cfw in CFW for stpm in STPM]
+    grid_path = os.path.join(root, 'grid.csv')
+    with open(grid_path, 'w') as grid_file:
+        grid_file.write('ID,DRF,CFW,STPM\n')
+        for run_id, (drf, cfw, stpm) in enumerate(rows, start=1):
+            grid_file.write(f'{run_id},{drf},{cfw},{stpm}\n')
+
+    for fidelity in FIDELITIES:
+        out = os.path.join(root, 'fid', f'out_{fidelity[0]}_{fidelity[1]}km')
+        os.makedirs(out, exist_ok=True)
+        for run_id, (drf, cfw, stpm) in enumerate(rows, start=1):
+            for station in STATIONS:
+                for noise_run in noise_runs:
+                    series = forecast_series(drf, cfw, stpm, fidelity, station, noise_run, steps)
+                    with open(os.path.join(out, f'K{station}a_ns{noise_run}_run{run_id}_.tab'), 'w') as file:
+                        file.write('V,Hsig\n')
+                        file.writelines(f'{idx},{value:.6f}\n' for idx, value in enumerate(series))
+
+    return grid_path
+
+
+def fake_model(root, monkeypatch, steps=STEPS, noise_runs=(0,), **kwargs):
+    grid_path = write_dataset(str(root), steps, noise_runs)
+    # errors grids are cached in ../../grid relative to the working directory
+    monkeypatch.chdir(os.path.join(str(root), 'a', 'b'))
+
+    return FidelityFakeModel(grid_file=CSVGridFile(grid_path), error=error_rmse_all,
+                             observations=[observation_series(station, steps) for station in STATIONS],
+                             stations_to_out=STATIONS, forecasts_path=os.path.join(str(root), 'fid', '*'),
+                             noise_runs=noise_runs, **kwargs)
+
+
+def extend_to_full_series(model, steps):
+    '''
+    Extend series of the model of the given amount of steps up to STEPS
+    '''
+    new_forecasts = np.empty(model.err_grid.shape + (STEPS - steps,))
+    for i, drf in enumerate(DRF):
+        for j, cfw in enumerate(CFW):
+            for k, stpm in enumerate(STPM):
+                for m, fidelity in enumerate(FIDELITIES):
+                    for station_idx, station in enumerate(STATIONS):
+                        new_forecasts[i, j, k, m, 0, station_idx] = \
+                            forecast_series(drf, cfw, stpm, fidelity, station, 0)[steps:]
+    new_observations = [observation_series(station)[steps:] for station in STATIONS]
+
+    model.extend_series(new_observations, new_forecasts)
+
+
+def test_windows_are_served_from_one_load(tmp_path, monkeypatch):
+    reads = []
+    column = ForecastFile.column
+    monkeypatch.setattr(ForecastFile, 'column', lambda file, *args: reads.append(file.path) or column(file, *args))
+
+    model = fake_model(tmp_path / 'windows', monkeypatch, windows={'train': (0, 0.7), 'test': (0.7, 1)})
+    # every file is read once by the construction
+    assert len(reads) == len(set(reads)) == len(DRF) * len(CFW) * len(STPM) * len(FIDELITIES) * len(STATIONS)
+
+    train, test = model.error_grid('train'), model.error_grid('test')
+    assert model.error_grid('train') is train
+    assert len(reads) == len(set(reads))
+
+    train_model = fake_model(tmp_path / 'train', monkeypatch, forecasts_range=(0, 0.7))
+    test_model = fake_model(tmp_path / 'test', monkeypatch, forecasts_range=(0.7, 1))
+
+    assert np.allclose(train, train_model.err_grid)
+    assert np.allclose(test, test_model.err_grid)
+    assert not np.allclose(train, test)
+
+
+def test_extended_series_give_errors_of_longer_files(tmp_path, monkeypatch):
+    model = fake_model(tmp_path / 'short', monkeypatch, steps=30)
+    # the window is cached in memory and on disk before the extension
+    model.error_grid((0.5, 1))
+
+    extend_to_full_series(model, 30)
+    extended_window = model.error_grid((0.5, 1))
+
+    expected = fake_model(tmp_path / 'long', monkeypatch)
+
+    assert np.allclose(model.err_grid, expected.err_grid, atol=1e-5)
+    assert np.allclose(extended_window, expected.error_grid((0.5, 1)), atol=1e-5)
+
+
+def test_ensemble_errors_of_noise_runs(tmp_path, monkeypatch):
+    model = fake_model(tmp_path / 'ensemble', monkeypatch, noise_runs=(0, 1))
+    errors = model.ensemble_error_grid()
+
+    # noise runs are the first axis in the order of model.noise_runs
+    assert errors.shape == (2,) + model.err_grid.shape
+    assert np.allclose(errors[0], model.err_grid)
+    assert np.allclose(errors[1], fake_model(tmp_path / 'noise', monkeypatch, noise_runs=(1,), noise_run=1).err_grid)
+
+    stats = model.ensemble_stats(quantiles=(0.1, 0.5, 0.9))
+    low, high = np.min(errors, axis=0), np.max(errors, axis=0)
+
+    assert stats['quantiles'].shape == (3,) + model.err_grid.shape
+    assert np.allclose(stats['quantiles'][0], low + 0.1 * (high - low))
+    assert np.allclose(stats['quantiles'][1], stats['mean'])
+    assert np.allclose(stats['quantiles'][2], low + 0.9 * (high - low))
+    assert np.allclose(stats['spread'], (high - low) / 2)
+    assert not np.allclose(errors[0], errors[1])
+
+
+def test_surrogates_get_targets_of_extended_series(tmp_path, monkeypatch):
+    model = fake_model(tmp_path / 'surrogate', monkeypatch, steps=30, is_surrogate=True, sur_points=6)
+    surrogate = model.surrogates_by_stations[0]
+    surrogate.train_with_mixed_points(fidelity=(60, 14))
+    old_target = surrogate.target.copy()
+
+    extend_to_full_series(model, 30)
+    surrogate.train_with_mixed_points(fidelity=(60, 14))
+
+    params = [SWANParams(drf=drf, cfw=cfw, stpm=stpm, fidelity_time=60, fidelity_space=14)
+              for drf, cfw, stpm in surrogate.features]
+    assert not np.allclose(surrogate.target, old_target)
+    assert np.allclose(surrogate.target, model.output_from_model_batch(params))
+
+
+def test_surrogates_are_trained_for_chosen_stations(tmp_path, monkeypatch):
+    for multi_output in [True, False]:
+        model = fake_model(tmp_path / f'stations-{multi_output}', monkeypatch, is_surrogate=True, sur_points=6,
+                           sur_stations=[2], sur_multi_output=multi_output)
+        assert len(model.surrogates_by_stations) == 1
+
+        surrogate = model.surrogates_by_stations[0]
+        surrogate.train_with_mixed_points(fidelity=(60, 14))
+
+        params = [SWANParams(drf=drf, cfw=cfw, stpm=stpm, fidelity_time=60, fidelity_space=14)
+                  for drf, cfw, stpm in surrogate.features]
+        # the model itself gives errors of all stations
+        errors = model.output_from_model_batch(params)
+        assert np.allclose(np.reshape(surrogate.target, (len(params), -1)), errors[:, [1]])
+        assert model.output_batch(params).shape == (len(params), 1)
@@ -0,0 +1,88 @@
+import numpy as np
+
+from src.multifidelity_evolution.fidelity_handler import FidelityHandler
+from src.multifidelity_evolution.fidelity_scheduler import FidelityScheduler
+from src.surrogate.kriging import KrigingModel
+from src.surrogate.target_store import TargetStore
+
+FIDELITIES = [(fid_time, fid_space) for fid_time in [60, 120, 180] for fid_space in [14, 28, 56]]
+
+
+def cost(fidelity):
+    return 3600.0 / fidelity[0] * 14 / fidelity[1]
+
+
+class FittedSurrogate:
+    def __init__(self, features, target):
+        self.features = features
+        self.target = target
+
+
+class ShiftedModel:
+    def __init__(self, shift):
+        self.shift = shift
+
+    def predict(self, features):
+        return np.sum(features, axis=1) + self.shift
+
+
+class Grid:
+    drf_grid = [0.2, 1.0, 1.8, 2.6]
+    cfw_grid = [0.005, 0.02, 0.035, 0.05]
+    stpm_grid = [0.001, 0.004, 0.007, 0.01]
+
+
+class TimedModel:
+    def __init__(self, run_time):
+        self.run_time = run_time
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def output_from_model_batch(self, params):
+        self.now += self.run_time * len(params)
+        return np.asarray([[np.sin(p.drf) + 20 * p.cfw + 50 * p.stpm] for p in params])
+
+
+def test_scheduler_moves_to_finer_level_when_surrogate_is_accurate():
+    scheduler = FidelityScheduler(FIDELITIES, cost=cost, discrepancy_rate=0.1)
+    scheduler.surrogate_errors[(180, 56)] = 0.01
+
+    new_fidelity = scheduler.next_fidelity((180, 56))
+
+    assert cost(new_fidelity) > cost((180, 56))
+    assert scheduler.history[-1]['to'] == new_fidelity
+
+
+def test_scheduler_moves_to_coarser_level_when_surrogate_error_dominates():
+    scheduler = FidelityScheduler(FIDELITIES, cost=cost, discrepancy_rate=0.01)
+    scheduler.surrogate_errors[(60, 14)] = 0.5
+
+    assert cost(scheduler.next_fidelity((60, 14))) < cost((60, 14))
+
+
+def test_scheduler_measures_discrepancy_rate():
+    scheduler = FidelityScheduler(FIDELITIES, cost=cost)
+    scheduler.record_cost((120, 28), 10.0)
+
+    features = np.random.RandomState(0).rand(20, 3)
+    target = np.sum(features, axis=1)
+    scheduler.observe_switch((120, 28), (60, 14), [ShiftedModel(0.1)], [FittedSurrogate(features, target)])
+
+    assert np.isclose(scheduler.rate(), 0.1 / np.std(target) / 2)
+    assert scheduler.cost((120, 28)) == 10.0
+
+
+def test_scheduler_takes_run_time_measured_by_target_store():
+    fake_model = TimedModel(run_time=7.0)
+    target_store = TargetStore(fake_model, clock=fake_model.clock)
+    surrogate = KrigingModel(Grid(), fake_model, 0, 10, (60, 14), target_store=target_store, design_seed=1)
+    scheduler = FidelityScheduler(FIDELITIES, cost=cost)
+
+    handler = FidelityHandler(surrogates=[surrogate], time_delta=30, space_delta=14, point_for_retrain=2,
+                              gens_to_change_fidelity=5, scheduler=scheduler)
+    handler.train_surrogates(fidelity=(60, 14))
+
+    assert scheduler.cost((60, 14)) == 7.0
+    assert scheduler.cost((120, 28)) == cost((120, 28))
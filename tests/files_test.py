@@ -1,6 +1,11 @@
+import numpy as np
+
 from src.utils.files import (
-    presented_fidelity,
-    extracted_fidelity
+    ForecastFile,
+    ObservationFile,
+    extracted_fidelity,
+    observations_from_range,
+    presented_fidelity
 )
 
 
@@ -24,3 +29,44 @@ def test_extracted_fidelity():
     expected_fid_time, expected_fid_space = (210, 28)
 
     assert (actual_fid_time, actual_fid_space) == (expected_fid_time, expected_fid_space)
+
+
+def test_forecast_file_column(tmpdir):
+    file = tmpdir.join('K1a_ns0_run1_.tab')
+    file.write('% Time, Hsig, Tm01\n'
+               'V,Hsig,Tm01\n'
+               '0,0.5,3.1\n'
+               '1,0.7,3.3\n'
+               '2,0.9,3.5\n')
+
+    forecast = ForecastFile(path=str(file))
+
+    assert list(forecast.column()) == [0.5, 0.7, 0.9]
+    assert list(forecast.column('Tm01')) == [3.1, 3.3, 3.5]
+
+
+def test_observations_from_range_is_view():
+    values = np.arange(10.0)
+
+    in_range = observations_from_range(values, (0.2, 0.5))
+
+    assert list(in_range) == [2.0, 3.0, 4.0]
+    assert np.shares_memory(in_range, values)
+
+
+def test_observation_file_time_series_in_dates_range(tmpdir):
+    file = tmpdir.join('1a_waves.txt')
+    file.write('# station 1\n'
+               '<meta>\n'
+               '1 14-08-2014 11:00:00 0 0.4\n'
+               '2 14-08-2014 12:00:00 0 0.5\n'
+               '3 14-08-2014 13:00:00 0 0.6\n'
+               '4 14-08-2014 14:00:00 0 0.7\n'
+               '5 14-08-2014 15:00:00 0 0.8\n')
+
+    observations = ObservationFile(path=str(file), station_idx=1)
+
+    waves = observations.time_series(from_date='20140814.120000', to_date='20140814.140000')
+
+    assert list(waves) == [0.5, 0.6, 0.7]
+    assert list(observations.time_series()) == [0.4, 0.5, 0.6, 0.7, 0.8]
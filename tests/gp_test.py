@@ -0,0 +1,180 @@
+import numpy as np
+
+from src.surrogate.gp import GaussianProcess
+from src.surrogate.sparse_gp import SparseGaussianProcess
+
+
+def smooth_function(features):
+    return np.sin(3 * features[:, 0]) + features[:, 1] ** 2 + 0.1 * features[:, 2]
+
+
+def training_data(points=30):
+    features = np.random.RandomState(0).rand(points, 3)
+
+    return features, smooth_function(features)
+
+
+def test_gp_interpolates_training_points():
+    features, target = training_data()
+
+    gp = GaussianProcess(seed=1).fit(features, target)
+
+    assert np.allclose(gp.predict(features), target, atol=1e-4)
+    assert np.allclose(gp.predict_var(features), 0.0, atol=1e-6)
+
+
+def test_gp_point_prediction_is_scalar():
+    features, target = training_data()
+
+    gp = GaussianProcess(seed=1).fit(features, target)
+
+    assert np.ndim(gp.predict(features[0])) == 0
+    assert np.isclose(gp.predict(features[0]), gp.predict(features[:1])[0])
+
+
+def test_gp_predicts_better_than_mean():
+    features, target = training_data()
+    test = np.random.RandomState(1).rand(100, 3)
+
+    gp = GaussianProcess(seed=1).fit(features, target)
+
+    gp_error = np.mean((gp.predict(test) - smooth_function(test)) ** 2)
+    mean_error = np.mean((np.mean(target) - smooth_function(test)) ** 2)
+
+    assert gp_error < 0.05 * mean_error
+
+
+def test_neg_log_likelihood_gradient():
+    features, target = training_data(points=15)
+    gp = GaussianProcess()
+    gp._set_data(features, target)
+
+    log_theta = np.log([0.5, 2.0, 1.0])
+    _, grad = gp.neg_log_likelihood(log_theta)
+
+    eps = 1e-6
+    numeric = []
+    for dim in range(len(log_theta)):
+        shift = np.zeros(len(log_theta))
+        shift[dim] = eps
+        numeric.append((gp.neg_log_likelihood(log_theta + shift)[0] -
+                        gp.neg_log_likelihood(log_theta - shift)[0]) / (2 * eps))
+
+    assert np.allclose(grad, numeric, rtol=1e-4, atol=1e-6)
+
+
+def test_gp_add_points_matches_full_factorization():
+    features, target = training_data(points=40)
+    initial, new = slice(0, 30), slice(30, 40)
+
+    updated = GaussianProcess(seed=1).fit(features[initial], target[initial])
+    updated.add_points(features[new], target[new])
+
+    full = GaussianProcess()
+    full._set_data(features, target)
+    # normalization of the updated model is fixed by the initial points
+    full._x_min, full._x_range = updated._x_min, updated._x_range
+    full._y_min, full._y_range = updated._y_min, updated._y_range
+    full._x, full._y = updated._x, updated._y
+    full.theta = updated.theta
+    full._factorize()
+
+    test = np.random.RandomState(1).rand(20, 3)
+
+    assert np.allclose(updated.predict(test), full.predict(test))
+    assert np.allclose(updated.predict_var(test), full.predict_var(test))
+    assert np.allclose(updated.predict(features[new]), target[new], atol=1e-4)
+
+
+def test_multi_output_gp_shares_factorization():
+    features, target = training_data()
+    targets = np.column_stack([target, 2.0 * target + 1.0, features[:, 0]])
+
+    gp = GaussianProcess(seed=1).fit(features, targets)
+    test = np.random.RandomState(1).rand(10, 3)
+
+    assert gp.predict(features).shape == targets.shape
+    assert gp.predict(test[0]).shape == (3,)
+    assert np.allclose(gp.predict(features), targets, atol=1e-3)
+    # outputs are normalized separately, so the linear transform of an output is predicted exactly
+    assert np.allclose(gp.predict(test)[:, 1], 2.0 * gp.predict(test)[:, 0] + 1.0)
+
+
+def test_gp_batch_prediction_matches_points():
+    features, target = training_data()
+    test = np.random.RandomState(1).rand(10, 3)
+
+    gp = GaussianProcess(seed=1).fit(features, target)
+
+    assert np.allclose(gp.predict(test), [gp.predict(point) for point in test])
+    assert np.allclose(gp.predict_var(test), [gp.predict_var(point) for point in test])
+    assert np.all(gp.predict_var(test) >= 0.0)
+
+
+def test_gp_fit_with_shipped_theta_matches_fit():
+    features, target = training_data()
+    test = np.random.RandomState(1).rand(10, 3)
+
+    theta = GaussianProcess(seed=1).optimize(features, target)
+
+    fitted = GaussianProcess(seed=1).fit(features, target)
+    shipped = GaussianProcess().fit_with_theta(features, target, theta)
+
+    assert np.allclose(fitted.predict(test), shipped.predict(test))
+
+
+def test_seeded_fits_do_not_depend_on_global_random_state():
+    features, target = training_data()
+
+    np.random.seed(0)
+    theta = GaussianProcess(seed=1).optimize(features, target)
+    sparse = SparseGaussianProcess(seed=1, inducing=10).optimize(features, target)
+
+    np.random.seed(1)
+    assert np.array_equal(GaussianProcess(seed=1).optimize(features, target), theta)
+    assert np.array_equal(SparseGaussianProcess(seed=1, inducing=10).optimize(features, target)[1], sparse[1])
+
+
+def test_sparse_gp_approximates_function():
+    features, target = training_data(points=200)
+    test = np.random.RandomState(1).rand(100, 3)
+
+    gp = SparseGaussianProcess(seed=1, inducing=30).fit(features, target)
+
+    assert len(gp._inducing_x) == 30
+    assert np.mean((gp.predict(test) - smooth_function(test)) ** 2) < 1e-3
+    assert np.all(gp.predict_var(test) >= 0.0)
+
+
+def test_sparse_gp_add_points_matches_fit_with_same_hyperparameters():
+    features, target = training_data(points=120)
+    test = np.random.RandomState(1).rand(20, 3)
+
+    hyperparameters = SparseGaussianProcess(seed=1, inducing=20).optimize(features[:100], target[:100])
+
+    updated = SparseGaussianProcess().fit_with_theta(features[:100], target[:100], hyperparameters)
+    updated.add_points(features[100:], target[100:])
+
+    full = SparseGaussianProcess().fit_with_theta(features[:100], target[:100], hyperparameters)
+    full._points = 0
+    full._stats = np.eye(20)
+    full._proj_y = np.zeros_like(full._proj_y)
+    full.add_points(features, target)
+
+    assert np.allclose(updated.predict(test), full.predict(test))
+
+
+def test_gp_loo_residuals_match_refits():
+    corners = np.asarray([[0, 0, 0], [1, 1, 1], [0, 1, 0], [1, 0, 1]], dtype=float)
+    features = np.vstack([corners, np.random.RandomState(0).uniform(0.1, 0.9, (12, 3))])
+    target = np.sin(3 * features[:, 0]) + features[:, 1] ** 2
+
+    model = GaussianProcess(seed=0).fit(features, target)
+    residuals = model.loo_residuals()
+
+    # interior points keep the normalization of the data
+    for idx in range(len(corners), len(features)):
+        mask = np.arange(len(features)) != idx
+        refit = GaussianProcess().fit_with_theta(features[mask], target[mask], model.theta)
+
+        assert np.isclose(residuals[idx], target[idx] - refit.predict(features[idx]), atol=1e-8)
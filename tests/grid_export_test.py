@@ -0,0 +1,53 @@
+import numpy as np
+
+from src.utils.grid_export import (
+    ERROR_TENSOR_AXES,
+    load_error_tensor,
+    save_error_tensor
+)
+
+
+def error_tensor_with_coords():
+    coords = {'metric': np.asarray(['error_mae_all', 'error_rmse_all']), 'noise_run': np.asarray([0, 1, 2]),
+              'drf': np.asarray([0.2, 0.4]), 'cfw': np.asarray([0.005, 0.01]), 'stpm': np.asarray([0.001]),
+              'fid_time': np.asarray([60, 120]), 'fid_space': np.asarray([14]), 'station': np.asarray([1, 2, 3])}
+    tensor = np.random.RandomState(42).rand(*[len(coords[axis]) for axis in ERROR_TENSOR_AXES])
+
+    return tensor, coords
+
+
+def test_error_tensor_npz_round_trip(tmpdir):
+    tensor, coords = error_tensor_with_coords()
+    path = str(tmpdir.join('errors.npz'))
+
+    save_error_tensor(path, tensor, coords, file_format='npz')
+    loaded_tensor, loaded_coords = load_error_tensor(path)
+
+    assert np.array_equal(loaded_tensor, tensor)
+    assert list(loaded_coords['metric']) == list(coords['metric'])
+
+
+def test_error_tensor_csv_round_trip(tmpdir):
+    tensor, coords = error_tensor_with_coords()
+    path = str(tmpdir.join('errors.csv'))
+
+    save_error_tensor(path, tensor, coords, file_format='csv')
+    loaded_tensor, loaded_coords = load_error_tensor(path)
+
+    assert np.allclose(loaded_tensor, tensor)
+    assert np.allclose(loaded_coords['station'], coords['station'])
+
+
+def test_error_tensor_csv_keeps_order_of_unsorted_coords(tmpdir):
+    tensor, coords = error_tensor_with_coords()
+    coords.update({'drf': np.asarray([0.4, 0.2]), 'cfw': np.asarray([0.01, 0.005]), 'station': np.asarray([3, 1, 2])})
+    npz_path, csv_path = str(tmpdir.join('errors.npz')), str(tmpdir.join('errors.csv'))
+
+    save_error_tensor(npz_path, tensor, coords, file_format='npz')
+    save_error_tensor(csv_path, tensor, coords, file_format='csv')
+    npz_tensor, npz_coords = load_error_tensor(npz_path)
+    csv_tensor, csv_coords = load_error_tensor(csv_path)
+
+    assert np.allclose(csv_tensor, npz_tensor)
+    for axis in ['drf', 'cfw', 'station']:
+        assert np.allclose(csv_coords[axis], npz_coords[axis])
@@ -0,0 +1,88 @@
+import numpy as np
+import pytest
+
+from src.basic_evolution.swan import SWANParams
+from src.evolution.spea2.spea2 import SPEA2
+from src.multifidelity_evolution.fidelity_handler import FidelityHandler
+from src.surrogate.backends import RBFSurrogate
+from src.surrogate.gp import GaussianProcess
+from src.surrogate.infill import (
+    LOWER_CONFIDENCE_BOUND,
+    Infill,
+    expected_improvement
+)
+
+
+class TrainedSurrogate:
+    def __init__(self, features, target, backend='gp'):
+        self.features = features
+        self.target = target
+        self.backend = backend
+        self.krig = (RBFSurrogate() if backend == 'rbf' else GaussianProcess(seed=0)).fit(features, target)
+        self.new_points = []
+
+    def estimates_variance(self):
+        return self.backend != 'rbf'
+
+    def retrain_with_new_points(self, new_points, fit=True):
+        self.new_points.extend(new_points)
+
+
+def surrogate():
+    features = np.random.RandomState(0).uniform(0, 1, (15, 3))
+    target = np.sum((features - 0.5) ** 2, axis=1)
+
+    return TrainedSurrogate(features, target)
+
+
+def test_expected_improvement_prefers_uncertain_points():
+    ei = expected_improvement(mean=np.asarray([1.0, 1.0, 0.5]), std=np.asarray([0.0, 1.0, 0.0]), best=0.8)
+
+    assert ei[0] == 0.0 and ei[1] > 0.0
+    assert np.isclose(ei[2], 0.3)
+
+
+def test_infill_skips_trained_and_repeated_points():
+    model = surrogate()
+    candidates = np.vstack([model.features[:3], [[0.5, 0.5, 0.5]] * 2, [[0.9, 0.1, 0.9]]])
+
+    chosen = Infill().select([model], candidates, points=3)
+
+    assert sorted(chosen) == [3, 5]
+
+
+def test_kriging_believer_spreads_batch():
+    model = surrogate()
+    candidates = np.random.RandomState(1).uniform(0, 1, (200, 3))
+
+    for criterion in ['ei', LOWER_CONFIDENCE_BOUND]:
+        chosen = Infill(criterion=criterion).select([model], candidates, points=4)
+        distances = np.linalg.norm(candidates[chosen][:, None] - candidates[chosen][None, :], axis=2)
+
+        assert len(set(chosen)) == 4
+        assert np.min(distances + np.eye(4)) > 1e-3
+
+
+def test_infill_rejects_surrogates_without_variance():
+    model = surrogate()
+    model = TrainedSurrogate(model.features, model.target, backend='rbf')
+
+    with pytest.raises(ValueError):
+        Infill().select([model], np.random.RandomState(1).uniform(0, 1, (10, 3)), points=2)
+
+
+def test_handler_takes_best_individuals_for_surrogates_without_variance():
+    model = surrogate()
+    model = TrainedSurrogate(model.features, model.target, backend='rbf')
+    handler = FidelityHandler(surrogates=[model], time_delta=30, space_delta=14, point_for_retrain=2,
+                              gens_to_change_fidelity=5, infill=Infill())
+
+    population = []
+    for error in [3.0, 1.0, 2.0]:
+        individ = SPEA2.Individ(genotype=SWANParams(drf=error, cfw=0.01, stpm=0.001))
+        individ.objectives = (error,)
+        population.append(individ)
+
+    handler.handle_new_min_found(population=population, gen_idx=0)
+
+    assert [point.drf for point in model.new_points] == [1.0, 2.0]
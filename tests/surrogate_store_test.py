@@ -0,0 +1,116 @@
+import numpy as np
+
+from src.basic_evolution.swan import SWANParams
+from src.surrogate.gp import GaussianProcess
+from src.surrogate.kriging import KrigingModel
+from src.surrogate.surrogate_store import SurrogateStore
+from src.surrogate.target_store import TargetStore
+
+
+class Grid:
+    drf_grid = [0.2, 1.0, 1.8, 2.6]
+    cfw_grid = [0.005, 0.02, 0.035, 0.05]
+    stpm_grid = [0.001, 0.004, 0.007, 0.01]
+
+
+class SmoothModel:
+    def output_from_model_batch(self, params):
+        return np.asarray([[np.sin(p.drf) + 20 * p.cfw + 50 * p.stpm] for p in params])
+
+
+def sample(points, seed):
+    features = np.random.RandomState(seed).uniform(0, 1, (points, 3))
+    target = np.sin(3 * features[:, 0]) + features[:, 1] * features[:, 2]
+
+    return features, target
+
+
+def test_surrogate_store_restores_model_in_other_run(tmp_path):
+    features, target = sample(20, seed=1)
+    model = GaussianProcess(seed=0).fit(features, target)
+    SurrogateStore(path=str(tmp_path)).save(model, features, target, (60, 14), 0, 'gp')
+
+    store = SurrogateStore(path=str(tmp_path))
+    restored = store.restored(features, target, (60, 14), 0, 'gp')
+
+    assert np.allclose(restored.predict(features), model.predict(features))
+    assert store.restored(features, target, (120, 14), 0, 'gp') is None
+    assert store.hits == 1 and store.misses == 1
+
+
+def test_surrogate_store_extends_model_of_subset(tmp_path):
+    features, target = sample(30, seed=2)
+    store = SurrogateStore(path=str(tmp_path))
+    store.save(GaussianProcess(seed=0).fit(features[:20], target[:20]), features[:20], target[:20], (60, 14), 0, 'gp')
+
+    restored = store.restored(features, target, (60, 14), 0, 'gp')
+
+    assert store.extended == 1 and len(store) == 2
+    assert np.allclose(restored.predict(features), target, atol=1e-4)
+
+
+def test_surrogate_store_gives_nearest_hyperparameters(tmp_path):
+    store = SurrogateStore(path=str(tmp_path))
+    for points, fidelity in [(10, (60, 14)), (20, (120, 14)), (15, (60, 14))]:
+        features, target = sample(points, seed=points)
+        store.save(GaussianProcess(seed=0).fit(features, target), features, target, fidelity, 0, 'gp')
+
+    features, target = sample(15, seed=15)
+    nearest = GaussianProcess(seed=0).fit(features, target)
+
+    assert np.allclose(store.hyperparameters((60, 14), 0, 'gp'), nearest.theta, rtol=1e-4)
+    assert store.hyperparameters((60, 14), 1, 'gp') is None
+
+
+def test_surrogate_store_does_not_freeze_reoptimised_hyperparameters(tmp_path):
+    store = SurrogateStore(path=str(tmp_path))
+    fake_model = SmoothModel()
+
+    def kriging():
+        return KrigingModel(Grid(), fake_model, 0, 12, (60, 14), target_store=TargetStore(fake_model),
+                            surrogate_store=store, reoptimise_every=2, design_seed=1)
+
+    model = kriging()
+    model.train_with_mixed_points(fidelity=(60, 14))
+    initial_theta = model.krig.theta.copy()
+
+    new_points = [SWANParams(drf=drf, cfw=0.03, stpm=0.005) for drf in [0.5, 1.2, 2.0, 2.4]]
+    model.retrain_with_new_points(new_points[:2])
+    model.retrain_with_new_points(new_points[2:])
+
+    # the second retraining optimizes hyperparameters for the grown set instead of extending the saved model
+    assert store.extended == 0
+    assert not np.array_equal(model.krig.theta, initial_theta)
+    assert np.allclose(model.krig.predict(model.features), model.target, atol=1e-3)
+
+    # the initial training of the same configuration is restored in other run
+    kriging().train_with_mixed_points(fidelity=(60, 14))
+    assert store.hits == 1
+
+
+def test_surrogate_store_keeps_models_of_other_settings_apart(tmp_path):
+    features, target = sample(25, seed=5)
+    store = SurrogateStore(path=str(tmp_path))
+    store.save(GaussianProcess(seed=0).fit(features[:20], target[:20]), features[:20], target[:20], (60, 14), 0,
+               'sparse_gp', settings={'inducing': 50})
+
+    assert store.restored(features[:20], target[:20], (60, 14), 0, 'sparse_gp', settings={'inducing': 200}) is None
+    assert store.restored(features, target, (60, 14), 0, 'sparse_gp', settings={'inducing': 200}) is None
+    assert store.hyperparameters((60, 14), 0, 'sparse_gp', settings={'inducing': 200}) is None
+
+    assert store.restored(features, target, (60, 14), 0, 'sparse_gp', settings={'inducing': 50}) is not None
+    assert store.misses == 2 and store.extended == 1
+
+
+def test_kriging_model_does_not_restore_sparse_model_of_other_size(tmp_path):
+    store = SurrogateStore(path=str(tmp_path))
+    fake_model = SmoothModel()
+
+    for inducing in [4, 6]:
+        surrogate = KrigingModel(Grid(), fake_model, 0, 10, (60, 14), backend='sparse_gp', inducing=inducing,
+                                 surrogate_store=store)
+        surrogate.train_with_mixed_points(fidelity=(60, 14))
+
+        assert surrogate.krig.inducing == inducing
+
+    assert store.hits == 0 and len(store) == 2
@@ -0,0 +1,54 @@
+import numpy as np
+
+from src.surrogate.target_store import TargetStore
+
+
+class CountingModel:
+    def __init__(self):
+        self.evaluated = []
+
+    def output_from_model_batch(self, params):
+        self.evaluated.extend(params)
+
+        return np.asarray([[p.drf + p.cfw, p.stpm * p.fid_time] for p in params])
+
+
+def test_target_store_evaluates_every_point_once():
+    model = CountingModel()
+    store = TargetStore(model)
+
+    features = np.asarray([[1.0, 0.01, 0.001], [2.0, 0.02, 0.002], [1.0, 0.01, 0.001]])
+
+    first = store.targets(features, fidelity=(60, 14))
+    second = store.targets(features[:2], fidelity=(60, 14))
+
+    assert len(model.evaluated) == 2
+    assert np.allclose(first, [[1.01, 0.06], [2.02, 0.12], [1.01, 0.06]])
+    assert np.allclose(second, first[:2])
+    assert store.hits == 3 and store.misses == 2
+
+
+def test_target_store_keys_by_fidelity():
+    model = CountingModel()
+    store = TargetStore(model)
+
+    features = np.asarray([[1.0, 0.01, 0.001]])
+
+    store.targets(features, fidelity=(60, 14))
+    targets = store.targets(features, fidelity=(120, 14))
+
+    assert len(model.evaluated) == 2
+    assert np.allclose(targets, [[1.01, 0.12]])
+
+
+def test_target_store_sums_cost_of_evaluated_points():
+    model = CountingModel()
+    store = TargetStore(model, cost=lambda fidelity: 3600.0 / fidelity[0])
+
+    features = np.asarray([[1.0, 0.01, 0.001], [2.0, 0.02, 0.002]])
+
+    store.targets(features, fidelity=(60, 14))
+    store.targets(features, fidelity=(60, 14))
+    store.targets(features[:1], fidelity=(120, 14))
+
+    assert store.spent == 150.0
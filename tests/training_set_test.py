@@ -0,0 +1,27 @@
+import numpy as np
+
+from src.surrogate.training_set import TrainingSet
+
+
+def test_training_set_drops_near_duplicates():
+    training_set = TrainingSet(scale=[2.0, 0.04, 0.01], tolerance=1e-3)
+    training_set.reset([[1.0, 0.02, 0.005], [1.0001, 0.02, 0.005], [1.5, 0.02, 0.005]])
+    training_set.target = np.asarray([1.0, 2.0])
+
+    new_idx = training_set.new_indices([[1.5, 0.02, 0.005], [0.5, 0.01, 0.001], [0.5, 0.01, 0.001]])
+
+    assert len(training_set) == 2
+    assert new_idx == [1]
+
+
+def test_training_set_evicts_crowded_old_points():
+    training_set = TrainingSet(scale=[1.0, 1.0], max_size=4)
+    training_set.reset([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    training_set.target = np.arange(4.0)
+
+    evicted = training_set.add(np.asarray([[0.9, 0.9], [0.5, 0.5]]), np.asarray([4.0, 5.0]))
+
+    assert evicted and len(training_set) == 4
+    # the new points are kept, the corner next to one of them is evicted first
+    assert training_set.features.tolist() == [[1.0, 0.0], [0.0, 1.0], [0.9, 0.9], [0.5, 0.5]]
+    assert np.allclose(training_set.target, [1.0, 2.0, 4.0, 5.0])
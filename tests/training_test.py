@@ -0,0 +1,62 @@
+import numpy as np
+
+from src.basic_evolution.swan import SWANParams
+from src.multifidelity_evolution.fidelity_handler import FidelityHandler
+from src.surrogate.kriging import KrigingModel
+from src.surrogate.target_store import TargetStore
+from src.surrogate.training import ParallelTrainer
+
+
+class Grid:
+    drf_grid = [0.2, 1.0, 1.8, 2.6]
+    cfw_grid = [0.005, 0.02, 0.035, 0.05]
+    stpm_grid = [0.001, 0.004, 0.007, 0.01]
+
+
+class StationsModel:
+    def output_from_model_batch(self, params):
+        return np.asarray([[np.sin(p.drf) + 20 * p.cfw, np.cos(p.drf) + 50 * p.stpm] for p in params])
+
+
+def station_surrogates():
+    fake_model = StationsModel()
+    target_store = TargetStore(fake_model)
+
+    return [KrigingModel(Grid(), fake_model, station, 10, (60, 14), target_store=target_store, design_seed=1)
+            for station in range(2)]
+
+
+def test_handler_defers_fits_to_parallel_trainer():
+    surrogates = station_surrogates()
+    trainer = ParallelTrainer(workers=2)
+    handler = FidelityHandler(surrogates=surrogates, time_delta=30, space_delta=14, point_for_retrain=2,
+                              gens_to_change_fidelity=5, trainer=trainer)
+
+    try:
+        handler.train_surrogates(fidelity=(60, 14))
+        pool = trainer._pool
+
+        for surrogate in surrogates:
+            surrogate.retrain_with_new_points([SWANParams(drf=1.5, cfw=0.03, stpm=0.005)], fit=False)
+            surrogate.pending_fit = True
+        trainer.fit(surrogates)
+
+        # one pool serves all trainings
+        assert pool is not None and trainer._pool is pool
+    finally:
+        trainer.close()
+
+    for surrogate in surrogates:
+        assert not surrogate.pending_fit
+        assert np.allclose(surrogate.krig.predict(surrogate.features), surrogate.target, atol=1e-3)
+
+
+def test_single_pending_surrogate_is_trained_without_pool():
+    surrogate = station_surrogates()[0]
+    trainer = ParallelTrainer()
+
+    surrogate.train_with_mixed_points(fidelity=(60, 14), fit=False)
+    trainer.fit([surrogate])
+
+    assert trainer._pool is None
+    assert not surrogate.pending_fit and surrogate.krig is not None